@@ -0,0 +1,264 @@
+import math
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+import numpy as np
+
+# Secondi di dati mostrati sotto il video, con il cursore al centro
+WINDOW_SECONDS = 6.0
+# Altezza in pixel di ogni pannello di grafici
+LANE_HEIGHT = 120
+# Frame minimi per blocco: blocchi più piccoli sprecherebbero tempo nei seek
+MIN_CHUNK_FRAMES = 150
+# Blocchi per processo, per avere un avanzamento regolare e bilanciare il carico
+CHUNKS_PER_WORKER = 4
+
+BACKGROUND_COLOR = (46, 46, 46)
+PLAYHEAD_COLOR = (0, 215, 255)
+STEP_MARKER_COLOR = (0, 255, 255)
+EMICICLO_MARKER_COLOR = (0, 200, 0)
+TEXT_COLOR = (240, 240, 240)
+
+
+def hex_to_bgr(color):
+    color = color.lstrip('#')
+    r, g, b = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+    return b, g, r
+
+
+class RenderLane:
+    """
+    Un pannello di grafici dell'export: le curve di un dispositivo con i suoi
+    marker. Contiene solo array NumPy e tuple, così passa ai processi worker.
+    """
+
+    def __init__(self, label, time, curves, step_markers=(), emiciclo_markers=(), region_color=None):
+        self.label = label
+        self.time = np.asarray(time, dtype=np.float64)
+        # Lista di (valori float32, colore BGR)
+        self.curves = curves
+        self.step_markers = np.sort(np.asarray(step_markers, dtype=np.float64))
+        self.emiciclo_markers = np.sort(np.asarray(emiciclo_markers, dtype=np.float64))
+        # (B, G, R, alpha 0-255) come le regioni dei passi nel player, o None
+        self.region_color = region_color
+
+        finite = [values[np.isfinite(values)] for values, _ in curves]
+        finite = [values for values in finite if len(values)]
+        low = min(float(values.min()) for values in finite) if finite else 0.0
+        high = max(float(values.max()) for values in finite) if finite else 1.0
+        margin = 0.05 * (high - low) if high > low else 1.0
+        self.y_min, self.y_max = low - margin, high + margin
+
+
+class RenderSpec:
+    """
+    Tutto quello che serve per l'export: video, tempo dei dati per ogni frame
+    (già sincronizzato) e pannelli da disegnare.
+    """
+
+    def __init__(self, video_path, data_times, fps, lanes, window=WINDOW_SECONDS, lane_height=LANE_HEIGHT):
+        self.video_path = video_path
+        self.data_times = np.asarray(data_times, dtype=np.float64)
+        self.fps = fps
+        self.lanes = lanes
+        self.window = window
+        self.lane_height = lane_height
+
+
+class FrameCompositor:
+    """
+    Compone un frame dell'export: il frame del video sopra e i pannelli dei
+    grafici sotto, disegnati con NumPy in un buffer preallocato e riusato per
+    tutti i frame. Ogni colonna di pixel corrisponde a un istante della finestra.
+    """
+
+    def __init__(self, spec, width, height):
+        self.spec = spec
+        self.width = width
+        self.height = height
+        self.lane_height = spec.lane_height
+        self.buffer = np.empty((height + len(spec.lanes) * spec.lane_height, width, 3), dtype=np.uint8)
+        self.column_offsets = (np.arange(width) - width // 2) / width * spec.window
+        self.rows = np.arange(spec.lane_height)[:, np.newaxis]
+        # Tratteggio delle linee dei marker, come nel player
+        self.step_dash = (np.arange(spec.lane_height) // 6) % 2 == 0
+        self.emiciclo_dash = (np.arange(spec.lane_height) // 4) % 3 != 2
+
+        self.region_colors = []
+        for lane in spec.lanes:
+            if lane.region_color is None:
+                self.region_colors.append(None)
+                continue
+            # Sfondo già miscelato con il colore delle regioni: due intensità alternate
+            b, g, r, alpha = lane.region_color
+            background = np.array(BACKGROUND_COLOR, dtype=np.float64)
+            color = np.array((b, g, r), dtype=np.float64)
+            shades = [background + (color - background) * (alpha / 255.0) * k for k in (1.0, 0.6)]
+            self.region_colors.append(np.array(shades, dtype=np.uint8))
+
+    def compose(self, frame, data_time):
+        if frame.shape[:2] != (self.height, self.width):
+            frame = cv2.resize(frame, (self.width, self.height))
+        self.buffer[:self.height] = frame
+        column_times = data_time + self.column_offsets
+        for i, lane in enumerate(self.spec.lanes):
+            top = self.height + i * self.lane_height
+            self.draw_lane(self.buffer[top:top + self.lane_height], lane, self.region_colors[i], column_times)
+        if self.spec.lanes:
+            cv2.putText(self.buffer, f"{data_time:.2f} s", (self.width // 2 + 6, self.height + 16),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, PLAYHEAD_COLOR, 1, cv2.LINE_AA)
+        return self.buffer
+
+    def draw_lane(self, panel, lane, region_colors, column_times):
+        panel[:] = BACKGROUND_COLOR
+        if not len(lane.time):
+            return
+        inside = (column_times >= lane.time[0]) & (column_times <= lane.time[-1])
+
+        # Regioni dei passi: dal primo marker (o dall'inizio) fino alla fine dei dati
+        if region_colors is not None and len(lane.step_markers):
+            step = np.searchsorted(lane.step_markers, column_times, side='right')
+            covered = inside & (column_times >= min(lane.step_markers[0], 0.0))
+            panel[:, covered] = region_colors[step[covered] % 2]
+
+        for markers, color, dash in ((lane.step_markers, STEP_MARKER_COLOR, self.step_dash),
+                                     (lane.emiciclo_markers, EMICICLO_MARKER_COLOR, self.emiciclo_dash)):
+            columns = self.columns_for(markers, column_times)
+            if len(columns):
+                panel[np.ix_(np.flatnonzero(dash), columns)] = color
+
+        # Curve: tra due colonne consecutive si riempie il tratto verticale
+        # dal valore dell'una a quello dell'altra, così la linea resta continua
+        scale = (self.lane_height - 1) / (lane.y_max - lane.y_min)
+        for values, color in lane.curves:
+            y = np.interp(column_times, lane.time, values)
+            pixel = np.clip((lane.y_max - y) * scale, 0, self.lane_height - 1)
+            pixel[~inside | ~np.isfinite(pixel)] = np.nan
+            low = np.fmin(pixel[:-1], pixel[1:])
+            high = np.fmax(pixel[:-1], pixel[1:])
+            mask = (self.rows >= np.floor(low)) & (self.rows <= np.ceil(high))
+            panel[:, :-1][mask] = color
+
+        center = self.width // 2
+        panel[:, center:center + 2] = PLAYHEAD_COLOR
+        cv2.putText(panel, lane.label, (8, 16), cv2.FONT_HERSHEY_SIMPLEX, 0.45, TEXT_COLOR, 1, cv2.LINE_AA)
+
+    def columns_for(self, markers, column_times):
+        if not len(markers):
+            return np.zeros(0, dtype=np.int64)
+        t0 = column_times[0]
+        step = column_times[1] - column_times[0] if len(column_times) > 1 else 1.0
+        visible = markers[(markers >= t0) & (markers <= column_times[-1])]
+        return np.round((visible - t0) / step).astype(np.int64)
+
+
+def output_fourcc(path):
+    return cv2.VideoWriter_fourcc(*('MJPG' if path.lower().endswith('.avi') else 'mp4v'))
+
+
+# -----------------------------
+# WORKER (processi separati)
+# -----------------------------
+_worker_spec = None
+
+
+def init_worker(spec):
+    # I dati arrivano una volta per processo, non a ogni blocco
+    global _worker_spec
+    _worker_spec = spec
+    cv2.setNumThreads(1)
+
+
+def render_chunk(start, stop, chunk_path):
+    """
+    Rende i frame [start, stop) in un file a sé, con un decoder proprio:
+    un solo seek all'inizio, poi lettura sequenziale.
+    """
+    spec = _worker_spec
+    cap = cv2.VideoCapture(spec.video_path)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    compositor = FrameCompositor(spec, width, height)
+    writer = cv2.VideoWriter(chunk_path, output_fourcc(chunk_path), spec.fps,
+                             (width, compositor.buffer.shape[0]))
+    written = 0
+    try:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        for index in range(start, stop):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            writer.write(compositor.compose(frame, spec.data_times[index]))
+            written += 1
+    finally:
+        writer.release()
+        cap.release()
+    return written
+
+
+def chunk_ranges(total_frames, workers):
+    chunks = max(1, min(workers * CHUNKS_PER_WORKER, math.ceil(total_frames / MIN_CHUNK_FRAMES)))
+    bounds = np.linspace(0, total_frames, chunks + 1).round().astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def find_ffmpeg():
+    # ffmpeg è richiesto dall'export: unisce i blocchi senza ricodificarli
+    return shutil.which('ffmpeg')
+
+
+def concatenate_chunks(chunk_paths, output_path):
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg non trovato: installalo e aggiungilo al PATH per esportare il video.")
+    list_path = output_path + '.txt'
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in chunk_paths:
+            f.write(f"file '{os.path.abspath(path)}'\n")
+    try:
+        result = subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                                 '-i', list_path, '-c', 'copy', output_path], capture_output=True)
+    finally:
+        os.remove(list_path)
+    if result.returncode != 0:
+        message = result.stderr.decode('utf-8', errors='replace').strip()
+        raise RuntimeError(f"ffmpeg non è riuscito a unire i blocchi del video: {message}")
+
+
+def render_annotated_video(spec, output_path, workers=None, progress=None):
+    """
+    Export del video con grafici, cursore e passi sovrapposti. La sessione è
+    divisa in intervalli di frame resi in parallelo da processi separati, poi
+    i blocchi vengono concatenati con ffmpeg (obbligatorio: senza si solleva
+    RuntimeError). Restituisce il numero di frame scritti.
+    """
+    workers = workers or os.cpu_count() or 1
+    total_frames = len(spec.data_times)
+    ranges = chunk_ranges(total_frames, workers)
+    temp_dir = tempfile.mkdtemp(prefix='render_', dir=os.path.dirname(os.path.abspath(output_path)))
+    extension = os.path.splitext(output_path)[1] or '.mp4'
+    chunk_paths = [os.path.join(temp_dir, f"chunk_{i:04d}{extension}") for i in range(len(ranges))]
+
+    written = 0
+    try:
+        # 'spawn': i worker non ereditano lo stato di Qt né i thread del player
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges)),
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_worker, initargs=(spec,)) as executor:
+            futures = [executor.submit(render_chunk, start, stop, path)
+                       for (start, stop), path in zip(ranges, chunk_paths)]
+            for future in as_completed(futures):
+                written += future.result()
+                if progress is not None:
+                    # L'ultimo 10% è la concatenazione
+                    progress(int(90 * written / max(total_frames, 1)))
+        concatenate_chunks(chunk_paths, output_path)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    if progress is not None:
+        progress(100)
+    return written
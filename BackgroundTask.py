@@ -0,0 +1,37 @@
+import traceback
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TaskSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(int)
+
+
+class BackgroundTask(QRunnable):
+    """
+    Esegue una funzione nel thread pool di Qt. I segnali arrivano nel thread
+    della GUI, quindi gli slot collegati possono aggiornare i widget.
+    Se la funzione accetta 'progress', riceve una callback con la percentuale.
+    """
+
+    def __init__(self, function, *args, with_progress=False, **kwargs):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        if with_progress:
+            self.kwargs['progress'] = self.signals.progress.emit
+
+    def run(self):
+        try:
+            result = self.function(*self.args, **self.kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+    def start(self, pool=None, priority=0):
+        (pool or QThreadPool.globalInstance()).start(self, priority)
@@ -2,20 +2,47 @@ import sys
 import os
 import cv2
 import numpy as np
-import pandas as pd
 import json
 import hashlib
-import random
-from PyQt5.QtCore import Qt, QTimer, pyqtSlot, QPointF, QRectF
+from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSlot, QPointF, QRectF
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QSlider, QSplitter, QPushButton,
                              QCheckBox, QSizePolicy, QApplication, QAction,
                              QFileDialog, QMessageBox, QComboBox, QDialog,
-                             QDialogButtonBox, QListWidget, QGridLayout,
-                             QGraphicsView, QGraphicsScene, QGraphicsPixmapItem)
+                             QDialogButtonBox, QListWidget, QGridLayout, QInputDialog,
+                             QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QProgressDialog)
 from PyQt5.QtGui import QPixmap, QImage, QIcon, QCursor
 import pyqtgraph as pg
 from platformdirs import user_data_dir, user_cache_dir
+from SensorSession import SensorSession
+from SensorStore import read_export_frame
+from GaitSteps import step_segments, gait_feature_tables, gait_symmetry_table
+from GaitFeatureDialog import GaitFeatureDialog
+from StepEnsembleView import StepEnsembleView
+from SensorResampler import SensorResampler, write_columnar
+from DerivedChannels import DerivedPipeline
+from BackgroundTask import BackgroundTask
+from StepClips import extract_clips
+from AnnotatedRender import RenderLane, RenderSpec, render_annotated_video, hex_to_bgr, find_ffmpeg
+from FrameCache import FrameCache
+from SeekCoordinator import SeekCoordinator
+from PlaybackClock import PlaybackClock
+from VideoTimestamps import (load_timestamps, scan_timestamps, constant_rate_timestamps,
+                             same_timestamps, CACHE_VERSION as TIMESTAMPS_VERSION)
+from CacheManager import CacheManager, file_fingerprint, DEFAULT_MAX_BYTES as DEFAULT_CACHE_BYTES
+from CacheDialog import CacheDialog
+from LiveView import LiveView
+from CameraView import CameraView
+from CatalogDialog import CatalogDialog
+from Filmstrip import FilmstripWidget
+from FramePrefetcher import (FramePrefetcher, PRIORITY_PLAYHEAD, PRIORITY_JUMP,
+                             PRIORITY_HOVER, PRIORITY_MARKERS)
+from EventSearch import adjacent_event
+from EventSearchDialog import EventSearchDialog
+from IntervalsItem import IntervalsItem
+from PlayheadItem import PlayheadItem, cache_static_items
+from SpectrogramPanel import SpectrogramPanel
+from SpectrogramTiles import SpectrogramTileCache
 
 class BaseVideoPlayer(QMainWindow):
     def __init__(self, video_filePath=None, csv_filePath_right=None, csv_filePath_left=None):
@@ -29,14 +56,34 @@ class BaseVideoPlayer(QMainWindow):
         # -----------------------------
         # Parametri per l'ottimizzazione
         # -----------------------------
-        # Aggiorna i grafici solo ogni N frame
-        self.GRAPH_UPDATE_EVERY_N_FRAMES = 5
+        # Aggiorna i grafici ogni N frame: il contenuto fisso è in cache e a
+        # ogni frame si ridisegna solo il cursore, quindi basta 1
+        self.GRAPH_UPDATE_EVERY_N_FRAMES = 1
+
+        # Riproduzione: intervallo minimo del timer, limiti di velocità e frame
+        # saltati con grab() (senza conversione) prima di ricorrere a un seek
+        self.MIN_TIMER_INTERVAL_MS = 10
+        self.MIN_PLAYBACK_SPEED = 0.05
+        self.MAX_PLAYBACK_SPEED = 16.0
+        self.MAX_GRAB_SKIP = 8
         self.frame_counter_internal = 0  # Contatore per stabilire quando aggiornare i grafici
 
-        # Debounce sul movimento mouse (per evitare continui refresh in on_mouse_moved)
-        self.mouse_move_debounce = True
-        self.mouse_move_skip_counter = 0
-        self.MOUSE_MOVE_SKIP_EVERY = 3  # Salta l'aggiornamento per i primi 2 movimenti di mouse, aggiorna al 3° (esempio)
+        # Nome predefinito del video annotato esportato nella cartella della sessione
+        self.ANNOTATED_VIDEO_NAME = 'Video_Annotato'
+
+        # Orologio dei tempi salvati nella configurazione (marker, offset di
+        # sincronizzazione): 1 = zero sul primo campione di ogni dispositivo,
+        # 2 = zero comune della sessione
+        self.CLOCK_VERSION = 2
+
+        # Marker visibili per cui si preparano in background i frame vicini
+        self.MAX_PREFETCH_MARKERS = 40
+
+        # Modalità "segui cursore": secondi mostrati prima e dopo il cursore
+        self.FOLLOW_WINDOW_SECONDS = 3.0
+        # Punti al massimo per curva: oltre si disegna la panoramica min/max
+        # e i campioni veri solo per la finestra visibile
+        self.MAX_PLOT_POINTS = 10000
 
         self.theme = 'dark'
         self.playback_speed = 1.0
@@ -47,12 +94,46 @@ class BaseVideoPlayer(QMainWindow):
         self.app_cache_dir = user_cache_dir(self.app_name)
         os.makedirs(self.app_data_dir, exist_ok=True)
         os.makedirs(self.app_cache_dir, exist_ok=True)
-
-        self.step_markers_right = []
-        self.step_markers_left = []
-        self.emiciclo_markers_right = []
-        self.emiciclo_markers_left = []
+        # Tutti i file in app_cache_dir passano dal cache manager (budget e scarto LRU)
+        self.cache_manager = CacheManager(self.app_cache_dir, self.load_app_setting('cache_max_bytes', DEFAULT_CACHE_BYTES))
+
+        # Marker per ruolo del dispositivo ('right', 'left', 'imu1', ...)
+        self.step_markers = {}
+        self.emiciclo_markers = {}
+        self.session = None
+        self.frame_lookup = None
+        self.frame_lookup_key = None
+        self.resampler = SensorResampler()
+        self.derived_pipeline = DerivedPipeline(cache_manager=self.cache_manager)
+        self.pending_derived = set()
+        self.background_tasks = set()
+        self.gait_feature_cache = {}
+        self.gait_symmetry_cache = None
+        self.gait_feature_dialog = None
+        self.step_ensemble_view = None
+        self.spectrogram_tiles = SpectrogramTileCache()
+        self.spectrogram_panels = []
+        self.frame_cache = FrameCache()
+        # Indice del frame che cap.read() restituirà, None se non noto
+        self.cap_next_frame = None
+        self.frame_prefetcher = FramePrefetcher(self.frame_cache)
+        self.frame_prefetcher.start(QThread.LowestPriority)
+        # Slider e trascinamento sui grafici: vale solo l'ultima richiesta di seek
+        self.seek_coordinator = SeekCoordinator(self)
+        # Direzione della riproduzione (1 avanti, -1 indietro), anche per il prefetch
+        self.play_direction = 1
+        self.playback_clock = PlaybackClock()
+        self.video_timestamps_version = 0
+        self.reverse_block = None
+        self.event_intervals = None
+        self.event_search_dialog = None
+        self.export_progress = None
+        self.live_view = None
+        self.catalog_dialog = None
+        # Telecamere aggiuntive della prova, mostrate in griglia accanto al video principale
+        self.cameras = []
         self.show_steps = True
+        self.follow_playhead = bool(self.load_app_setting('follow_playhead', False))
         self.current_frame = 0
 
         # Variabile per layout del video: 'vertical' o 'horizontal' o None
@@ -71,7 +152,9 @@ class BaseVideoPlayer(QMainWindow):
         self.load_last_folder()
 
         if video_filePath and csv_filePath_right and csv_filePath_left:
-            self.load_video_and_data(video_filePath, [csv_filePath_right, csv_filePath_left])
+            self.load_video_and_data(video_filePath, [csv_filePath_right, csv_filePath_left],
+                                     {os.path.basename(csv_filePath_right): 'right',
+                                      os.path.basename(csv_filePath_left): 'left'})
 
     def setup_ui(self):
         self.menu_bar = self.menuBar()
@@ -83,14 +166,53 @@ class BaseVideoPlayer(QMainWindow):
         open_action.triggered.connect(self.open_files)
         self.file_menu.addAction(open_action)
 
+        catalog_action = QAction('Catalogo Sessioni...', self)
+        catalog_action.triggered.connect(self.show_catalog)
+        self.file_menu.addAction(catalog_action)
+
         switch_csv_action = QAction('Scambia File CSV', self)
         switch_csv_action.triggered.connect(self.switch_csv_files)
         self.file_menu.addAction(switch_csv_action)
 
         generate_csv_action = QAction('Genera CSV per Passi', self)
-        generate_csv_action.triggered.connect(self.generate_csv_for_steps)
+        generate_csv_action.triggered.connect(lambda: self.generate_csv_for_steps())
         self.file_menu.addAction(generate_csv_action)
 
+        generate_clips_action = QAction('Genera CSV e Clip Video per Passi', self)
+        generate_clips_action.triggered.connect(lambda: self.generate_csv_for_steps(with_clips=True))
+        self.file_menu.addAction(generate_clips_action)
+
+        export_dataset_action = QAction('Esporta Dataset Allineato ai Frame', self)
+        export_dataset_action.triggered.connect(self.export_frame_aligned_dataset)
+        self.file_menu.addAction(export_dataset_action)
+
+        export_uniform_action = QAction('Esporta Dataset a Frequenza Fissa...', self)
+        export_uniform_action.triggered.connect(self.export_uniform_dataset)
+        self.file_menu.addAction(export_uniform_action)
+
+        export_video_action = QAction('Esporta Video Annotato', self)
+        export_video_action.triggered.connect(self.export_annotated_video)
+        self.file_menu.addAction(export_video_action)
+
+        live_action = QAction('Acquisizione Live...', self)
+        live_action.triggered.connect(self.show_live_view)
+        self.file_menu.addAction(live_action)
+
+        # Menu Analisi
+        self.analysis_menu = self.menu_bar.addMenu('Analisi')
+
+        gait_features_action = QAction('Caratteristiche dei Passi', self)
+        gait_features_action.triggered.connect(self.show_gait_features)
+        self.analysis_menu.addAction(gait_features_action)
+
+        step_ensemble_action = QAction('Sovrapposizione Passi Normalizzati', self)
+        step_ensemble_action.triggered.connect(self.show_step_ensemble)
+        self.analysis_menu.addAction(step_ensemble_action)
+
+        event_search_action = QAction('Cerca Eventi', self)
+        event_search_action.triggered.connect(self.show_event_search)
+        self.analysis_menu.addAction(event_search_action)
+
         # Menu Opzioni
         self.options_menu = self.menu_bar.addMenu('Opzioni')
 
@@ -106,6 +228,16 @@ class BaseVideoPlayer(QMainWindow):
         toggle_theme_action.triggered.connect(self.toggle_theme)
         self.options_menu.addAction(toggle_theme_action)
 
+        self.follow_playhead_action = QAction('Grafici Seguono il Cursore', self)
+        self.follow_playhead_action.setCheckable(True)
+        self.follow_playhead_action.setChecked(self.follow_playhead)
+        self.follow_playhead_action.toggled.connect(self.set_follow_playhead)
+        self.options_menu.addAction(self.follow_playhead_action)
+
+        cache_action = QAction('Cache...', self)
+        cache_action.triggered.connect(self.show_cache_dialog)
+        self.options_menu.addAction(cache_action)
+
         # Sottomenu per layout video
         layout_menu = self.options_menu.addMenu("Layout Video")
 
@@ -137,6 +269,11 @@ class BaseVideoPlayer(QMainWindow):
         self.video_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.video_graphs_layout.addWidget(self.video_widget)
 
+        # Miniature del video: posizione degli eventi a colpo d'occhio e anteprima al passaggio del mouse
+        self.filmstrip = FilmstripWidget(self)
+        self.filmstrip.hide()
+        self.video_graphs_layout.addWidget(self.filmstrip)
+
         self.video_layout = QGridLayout(self.video_widget)
         self.video_layout.setContentsMargins(0, 0, 0, 0)
         self.video_layout.setSpacing(0)
@@ -179,7 +316,9 @@ class BaseVideoPlayer(QMainWindow):
         self.control_layout.addWidget(self.play_button)
 
         self.speed_selector = QComboBox(self)
-        self.speed_selector.addItems(["0.25x", "0.5x", "1x", "1.5x", "2x"])
+        # Modificabile: si può scrivere qualsiasi velocità (es. 3x, 0.1x)
+        self.speed_selector.setEditable(True)
+        self.speed_selector.addItems(["0.1x", "0.25x", "0.5x", "1x", "1.5x", "2x", "4x", "8x"])
         self.speed_selector.setCurrentText("1x")
         self.speed_selector.currentTextChanged.connect(self.change_playback_speed)
         self.control_layout.addWidget(self.speed_selector)
@@ -216,39 +355,13 @@ class BaseVideoPlayer(QMainWindow):
         self.controls_and_graphs_container.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.video_graphs_layout.addWidget(self.controls_and_graphs_container)
 
-        right_foot_layout = QHBoxLayout()
-        self.right_label = QLabel("Piede Destro")
-        self.right_label.setStyleSheet("font-weight: bold;")
-        right_foot_layout.addWidget(self.right_label)
-
-        self.checkboxes_right = []
-        checkbox_labels_right = ["Accelerazioni Dx (Ax, Ay, Az)",
-                                 "Giroscopio Dx (Gx, Gy, Gz)",
-                                 "Pressione Dx (S0, S1, S2)"]
-        for label in checkbox_labels_right:
-            checkbox = QCheckBox(label, self)
-            checkbox.stateChanged.connect(self.update_selected_columns)
-            right_foot_layout.addWidget(checkbox)
-            self.checkboxes_right.append(checkbox)
-
-        self.controls_and_graphs_layout.addLayout(right_foot_layout)
-
-        left_foot_layout = QHBoxLayout()
-        self.left_label = QLabel("Piede Sinistro")
-        self.left_label.setStyleSheet("font-weight: bold;")
-        left_foot_layout.addWidget(self.left_label)
-
-        self.checkboxes_left = []
-        checkbox_labels_left = ["Accelerazioni Sx (Ax, Ay, Az)",
-                                "Giroscopio Sx (Gx, Gy, Gz)",
-                                "Pressione Sx (S0, S1, S2)"]
-        for label in checkbox_labels_left:
-            checkbox = QCheckBox(label, self)
-            checkbox.stateChanged.connect(self.update_selected_columns)
-            left_foot_layout.addWidget(checkbox)
-            self.checkboxes_left.append(checkbox)
-
-        self.controls_and_graphs_layout.addLayout(left_foot_layout)
+        # Una riga di checkbox per ogni dispositivo, creata al caricamento dei dati
+        self.device_rows_widget = QWidget(self)
+        self.device_rows_layout = QVBoxLayout(self.device_rows_widget)
+        self.device_rows_layout.setContentsMargins(0, 0, 0, 0)
+        self.controls_and_graphs_layout.addWidget(self.device_rows_widget)
+        self.device_labels = []
+        self.device_checkboxes = []
 
         self.graph_splitter = QSplitter(Qt.Vertical, self)
         self.graph_splitter.setHandleWidth(8)
@@ -292,36 +405,55 @@ class BaseVideoPlayer(QMainWindow):
         video_container = QWidget()
         video_layout = QVBoxLayout(video_container)
         video_layout.addWidget(self.video_widget)
+        video_layout.addWidget(self.filmstrip)
         video_layout.addWidget(self.control_panel)
 
         self.main_splitter.addWidget(video_container)
         self.main_splitter.addWidget(self.controls_and_graphs_container)
 
-    def load_video_and_data(self, video_filePath, csv_filePaths):
-        self.csv_filePaths = csv_filePaths.copy()
+    def load_video_and_data(self, video_filePath, csv_filePaths, role_overrides=None, camera_filePaths=()):
+        self.csv_filePaths = list(csv_filePaths)
+        self.clear_cameras()
 
         if hasattr(self, 'cap') and self.cap.isOpened():
             self.cap.release()
 
         self.video_path = video_filePath
         self.cap = cv2.VideoCapture(self.video_path)
+        self.frame_cache.clear()
+        self.cap_next_frame = 0
         if not self.cap.isOpened():
             QMessageBox.critical(self, "Errore", f"Impossibile aprire il file video: {self.video_path}")
             return
 
-        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
         self.video_fps = self.cap.get(cv2.CAP_PROP_FPS)
-        self.video_timestamps = np.arange(0, self.total_frames) / self.video_fps
+        self.frame_nbytes = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH) * self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT) * 3)
+        # Tempi reali dei frame se già scansionati, altrimenti frame rate costante
+        # finché la scansione in background non termina
+        self.video_key = file_fingerprint(self.video_path)
+        timestamps_path = self.cache_manager.entry_path('timestamps', self.video_key, TIMESTAMPS_VERSION, '.npy')
+        timestamps = load_timestamps(timestamps_path) if self.cache_manager.lookup(timestamps_path) else None
+        if timestamps is None:
+            timestamps = constant_rate_timestamps(int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)), self.video_fps)
+            self.scan_video_timestamps(timestamps_path)
+        self.set_video_timestamps(timestamps)
+        self.frame_prefetcher.set_video(self.video_path, self.total_frames)
+
+        self.frame_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.filmstrip.load_video(self.video_path, self.video_key, self.total_frames, *self.frame_size)
+        self.filmstrip.show()
+        self.seek_coordinator.proxy_lookup = lambda index: self.filmstrip.proxy_frame(index, *self.frame_size)
         self.current_frame = 0
-        self.trackbar.setRange(0, self.total_frames - 1)
         self.video_finished = False
 
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.next_frame)
         self.is_playing = False
 
-        self.load_and_preprocess_data(self.csv_filePaths[0], self.csv_filePaths[1])
+        if not self.load_and_preprocess_data(self.csv_filePaths, role_overrides):
+            return
         self.load_config()
+        self.load_cameras(camera_filePaths)
 
         width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
@@ -351,29 +483,191 @@ class BaseVideoPlayer(QMainWindow):
         self.show_first_frame()
         self.update_selected_columns()
         self.update_frame_counter()
+        self.notify_markers_changed()
 
-    def load_and_preprocess_data(self, csv_filePath_right, csv_filePath_left):
+    def load_and_preprocess_data(self, csv_filePaths, role_overrides=None):
+        # Ogni file Sensoria diventa un dispositivo con il proprio ruolo,
+        # tutti sullo stesso orologio e con i soli canali usati in float32
         try:
-            self.data_right = pd.read_csv(csv_filePath_right, skiprows=18)
-            self.data_left = pd.read_csv(csv_filePath_left, skiprows=18)
+            # Con la cache i CSV si convertono una volta sola e poi si mappano in memoria
+            self.session = SensorSession.from_files(csv_filePaths, role_overrides, self.cache_manager)
         except Exception as e:
             QMessageBox.critical(self, "Errore", f"Impossibile caricare i file CSV: {e}")
+            self.session = None
+            return False
+
+        if not len(self.session):
+            QMessageBox.critical(self, "Errore", "Nessun file CSV Sensoria valido da caricare.")
+            self.session = None
+            return False
+
+        self.frame_lookup = None
+        self.frame_lookup_key = None
+        self.resampler.invalidate()
+        self.derived_pipeline.retain([device.store for device in self.session])
+        self.pending_derived.clear()
+        self.spectrogram_tiles.retain([device.store for device in self.session])
+        for panel in list(self.spectrogram_panels):
+            self.close_spectrogram(panel)
+        self.event_intervals = None
+        if self.event_search_dialog is not None:
+            self.event_search_dialog.update_devices()
+        self.ensure_marker_lists()
+        self.build_device_controls()
+        # I grafici esistenti puntano ai dispositivi della sessione precedente
+        self.update_plot_widgets()
+        return True
+
+    def ensure_marker_lists(self):
+        for role in self.session.roles:
+            self.step_markers.setdefault(role, [])
+            self.emiciclo_markers.setdefault(role, [])
+
+    def build_device_controls(self):
+        # Ricrea le righe di checkbox mantenendo le selezioni correnti
+        for label in self.device_labels:
+            label.deleteLater()
+        for checkbox in self.device_checkboxes:
+            checkbox.deleteLater()
+        while self.device_rows_layout.count():
+            item = self.device_rows_layout.takeAt(0)
+            if item.layout() is not None:
+                item.layout().deleteLater()
+        self.device_labels = []
+        self.device_checkboxes = []
+
+        for device in self.session:
+            row_layout = QHBoxLayout()
+            label = QLabel(device.label)
+            label.setToolTip(f"{device.device_name}\nSerial: {device.serial_number}\n"
+                             f"Location: {device.location}\nFile: {device.file_name}")
+            row_layout.addWidget(label)
+            self.device_labels.append(label)
+
+            for group_name, columns in device.groups():
+                checkbox = QCheckBox(device.group_label(group_name, columns), self)
+                checkbox.device = device
+                checkbox.columns = columns
+                checkbox.setChecked(checkbox.text() in self.selected_columns)
+                checkbox.stateChanged.connect(self.update_selected_columns)
+                row_layout.addWidget(checkbox)
+                self.device_checkboxes.append(checkbox)
+            row_layout.addStretch()
+            self.device_rows_layout.addLayout(row_layout)
+
+        self.update_foot_labels_theme()
+
+    def set_video_timestamps(self, timestamps):
+        # Tabella frame -> tempo del video: tutte le conversioni tempo <-> frame passano da qui
+        self.video_timestamps = timestamps
+        self.total_frames = len(timestamps)
+        self.video_timestamps_version += 1
+        if self.total_frames > 1 and timestamps[-1] > 0:
+            self.video_fps = (self.total_frames - 1) / timestamps[-1]
+        self.trackbar.setRange(0, max(self.total_frames - 1, 0))
+        self.frame_lookup = None
+        self.resampler.invalidate()
+
+    def scan_video_timestamps(self, cache_path):
+        task = BackgroundTask(scan_timestamps, self.video_path, self.cache_manager, cache_path)
+        task.signals.finished.connect(
+            lambda timestamps, path=self.video_path: self.on_video_timestamps_scanned(path, timestamps))
+        self.start_background_task(task)
+
+    def on_video_timestamps_scanned(self, video_path, timestamps):
+        if timestamps is None or video_path != self.video_path:
             return
+        # Differenze sotto un quarto di frame: il video è davvero a frame rate costante
+        if same_timestamps(timestamps, self.video_timestamps, 0.25 / max(self.video_fps, 1.0)):
+            return
+        count_changed = len(timestamps) != self.total_frames
+        self.set_video_timestamps(timestamps)
+        self.current_frame = max(0, min(self.current_frame, self.total_frames - 1))
+        if count_changed:
+            self.frame_prefetcher.set_video(self.video_path, self.total_frames)
+            self.filmstrip.load_video(self.video_path, self.video_key, self.total_frames, *self.frame_size)
+        if self.is_playing:
+            self.start_playback_timer()
+        self.trackbar.setValue(self.current_frame)
+        self.update_frame_counter()
+        self.update_graphs_real()
 
-        for data in [self.data_right, self.data_left]:
-            data['Timestamp'] = pd.to_datetime(data['Timestamp'], format='%H:%M:%S.%f', errors='coerce')
-            data.dropna(subset=['Timestamp'], inplace=True)
-            data['Timestamp'] = (data['Timestamp'] - data['Timestamp'].iloc[0]).dt.total_seconds()
-            data.sort_values('Timestamp', inplace=True)
-            data.reset_index(drop=True, inplace=True)
-            data['VideoTime'] = data['Timestamp']
+    # -----------------------------
+    # TELECAMERE AGGIUNTIVE
+    # -----------------------------
+    def load_cameras(self, video_filePaths):
+        """
+        Altri video della stessa prova (es. vista frontale) in griglia accanto
+        al video principale, che resta il riferimento per dati, marker ed
+        esportazioni. Ogni telecamera ha il proprio decoder e il proprio offset.
+        """
+        camera_offsets = self.config.get('camera_offsets', {})
+        for path in video_filePaths:
+            cap = cv2.VideoCapture(path)
+            if not cap.isOpened():
+                cap.release()
+                continue
+            fps = cap.get(cv2.CAP_PROP_FPS) or self.video_fps
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+            # Come per il video principale: tempi reali se già scansionati, poi la scansione li corregge
+            cache_path = self.cache_manager.entry_path('timestamps', file_fingerprint(path), TIMESTAMPS_VERSION, '.npy')
+            timestamps = load_timestamps(cache_path) if self.cache_manager.lookup(cache_path) else None
+            camera = CameraView(self, path,
+                                timestamps if timestamps is not None else constant_rate_timestamps(frame_count, fps),
+                                float(camera_offsets.get(os.path.basename(path), 0.0)))
+            if timestamps is None:
+                task = BackgroundTask(scan_timestamps, path, self.cache_manager, cache_path)
+                task.signals.finished.connect(lambda result, c=camera: self.on_camera_timestamps_scanned(c, result))
+                self.start_background_task(task)
+            self.cameras.append(camera)
+        self.update_camera_layout()
+
+    def on_camera_timestamps_scanned(self, camera, timestamps):
+        if timestamps is not None and camera in self.cameras:
+            camera.worker.set_timestamps(timestamps)
+            self.request_camera_frames()
+
+    def update_camera_layout(self):
+        # Video principale in alto a sinistra, le altre telecamere a seguire in una griglia quasi quadrata
+        columns = int(np.ceil(np.sqrt(len(self.cameras) + 1)))
+        rows = -(-(len(self.cameras) + 1) // columns)
+        for i, camera in enumerate(self.cameras, start=1):
+            self.video_layout.addWidget(camera, i // columns, i % columns)
+        # Stesso spazio per ogni riquadro; con il solo video principale tutto a lui
+        for row in range(self.video_layout.rowCount()):
+            self.video_layout.setRowStretch(row, 1 if row < rows else 0)
+        for column in range(self.video_layout.columnCount()):
+            self.video_layout.setColumnStretch(column, 1 if column < columns else 0)
+
+    def clear_cameras(self):
+        for camera in self.cameras:
+            self.video_layout.removeWidget(camera)
+            camera.close_camera()
+        self.cameras = []
+        self.update_camera_layout()
+
+    def request_camera_frames(self):
+        # Tutte le telecamere seguono l'orologio del video principale; quelle lente saltano frame
+        if not self.cameras or not hasattr(self, 'video_timestamps'):
+            return
+        video_time = self.video_timestamps[max(0, min(self.current_frame, len(self.video_timestamps) - 1))]
+        for camera in self.cameras:
+            camera.request(video_time)
 
-        self.data_right.interpolate(method='linear', inplace=True)
-        self.data_left.interpolate(method='linear', inplace=True)
+    def set_camera_offset(self, camera, offset):
+        camera.offset = offset
+        self.request_camera_frames()
+        self.save_config()
 
-        # Convertiamo in array NumPy per ricerche più veloci
-        self.timestamps_right = self.data_right['VideoTime'].values
-        self.timestamps_left = self.data_left['VideoTime'].values
+    def get_frame_lookup(self):
+        # Tabella frame -> indice campione per tutti i dispositivi, ricalcolata
+        # solo quando cambiano i dati o la sincronizzazione
+        key = (id(self.session), self.session.version, self.video_timestamps_version, float(self.sync_offset))
+        if self.frame_lookup is None or self.frame_lookup_key != key:
+            self.frame_lookup = self.session.build_lookup(self.video_timestamps - self.sync_offset)
+            self.frame_lookup_key = key
+        return self.frame_lookup
 
     def open_files(self):
         folder_path = QFileDialog.getExistingDirectory(self, "Seleziona Cartella", "")
@@ -383,32 +677,92 @@ class BaseVideoPlayer(QMainWindow):
     def open_folder(self, folder_path):
         self.open_folder_label.hide()
         self.folder_path = folder_path
-        video_file = None
+        config = self.read_folder_config()
+        # I video esportati dal player nella cartella non sono telecamere
+        exported = set(config.get('exported_videos', []))
+        video_files = []
         csv_files = []
         for file in os.listdir(folder_path):
             if file.lower().endswith(('.mp4', '.avi', '.mov')):
-                video_file = os.path.join(folder_path, file)
+                if file not in exported and not file.startswith(self.ANNOTATED_VIDEO_NAME):
+                    video_files.append(os.path.join(folder_path, file))
             elif file.lower().endswith('.csv'):
                 csv_files.append(os.path.join(folder_path, file))
-        if video_file and len(csv_files) >= 2:
-            assigned_csv_files = random.sample(csv_files, 2)
-            self.load_video_and_data(video_file, assigned_csv_files)
+        if video_files and csv_files:
+            # I ruoli dei dispositivi si ricavano dalle intestazioni, non dall'ordine dei file.
+            # Con più video il principale è quello salvato nella configurazione; alla
+            # prima apertura il primo in ordine alfabetico, poi resta quello
+            video_files.sort()
+            main_video = os.path.join(folder_path, config.get('main_video', ''))
+            if main_video not in video_files:
+                main_video = video_files[0]
+            cameras = [path for path in video_files if path != main_video]
+            self.load_video_and_data(main_video, sorted(csv_files), camera_filePaths=cameras)
             self.save_last_folder(folder_path)
         else:
-            QMessageBox.warning(self, "Errore", "La cartella deve contenere un file video e almeno due file CSV.")
+            QMessageBox.warning(self, "Errore", "La cartella deve contenere un file video e almeno un file CSV.")
+
+    def read_folder_config(self):
+        # Configurazione salvata della cartella corrente, senza applicarla
+        config_file = self.get_config_file_path()
+        try:
+            with open(config_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
 
     def save_last_folder(self, folder_path):
+        self.save_app_setting('last_folder', folder_path)
+
+    def load_app_setting(self, key, default=None):
+        # Impostazioni dell'applicazione, comuni a tutte le cartelle
+        app_config_file = os.path.join(self.app_data_dir, 'app_config.json')
+        try:
+            if os.path.exists(app_config_file):
+                with open(app_config_file, 'r') as f:
+                    return json.load(f).get(key, default)
+        except Exception as e:
+            print(f"Errore nel caricamento delle impostazioni: {e}")
+        return default
+
+    def save_app_setting(self, key, value):
         app_config_file = os.path.join(self.app_data_dir, 'app_config.json')
         try:
             app_config = {}
             if os.path.exists(app_config_file):
                 with open(app_config_file, 'r') as f:
                     app_config = json.load(f)
-            app_config['last_folder'] = folder_path
+            app_config[key] = value
             with open(app_config_file, 'w') as f:
                 json.dump(app_config, f)
         except Exception as e:
-            print(f"Errore nel salvataggio dell'ultima cartella: {e}")
+            print(f"Errore nel salvataggio delle impostazioni: {e}")
+
+    def show_catalog(self):
+        if self.catalog_dialog is None:
+            self.catalog_dialog = CatalogDialog(self)
+        else:
+            self.catalog_dialog.refresh()
+            self.catalog_dialog.start_scan()
+        self.catalog_dialog.show()
+        self.catalog_dialog.raise_()
+
+    def show_live_view(self):
+        # Dati dei sensori mentre vengono registrati, prima di avere il video
+        folder_path = QFileDialog.getExistingDirectory(self, "Cartella dell'Acquisizione", "")
+        if not folder_path:
+            return
+        if self.live_view is not None:
+            self.live_view.close()
+        self.live_view = LiveView(self, folder_path)
+        self.live_view.show()
+
+    def show_cache_dialog(self):
+        CacheDialog(self).exec_()
+
+    def set_cache_budget(self, max_bytes):
+        self.cache_manager.set_max_bytes(max_bytes)
+        self.save_app_setting('cache_max_bytes', max_bytes)
 
     def load_last_folder(self):
         app_config_file = os.path.join(self.app_data_dir, 'app_config.json')
@@ -425,21 +779,30 @@ class BaseVideoPlayer(QMainWindow):
     def save_config(self):
         config_file = self.get_config_file_path()
         self.config['sync_offset'] = float(self.sync_offset)
+        self.config['clock_version'] = self.CLOCK_VERSION
+        if hasattr(self, 'video_path'):
+            self.config['main_video'] = os.path.basename(self.video_path)
         self.config['playback_speed'] = float(self.playback_speed)
         self.config['current_frame'] = int(self.current_frame)
-        self.config['selected_columns'] = [checkbox.text() for checkbox in
-                                           (self.checkboxes_right + self.checkboxes_left)
+        self.config['selected_columns'] = [checkbox.text() for checkbox in self.device_checkboxes
                                            if checkbox.isChecked()]
-        if hasattr(self, 'csv_filePaths'):
-            self.config['right_csv'] = os.path.basename(self.csv_filePaths[0])
-            self.config['left_csv'] = os.path.basename(self.csv_filePaths[1])
+        if self.session is not None:
+            # Ruolo di ogni file: sostituisce le vecchie chiavi right_csv/left_csv
+            self.config['device_roles'] = self.session.role_map()
+            self.config.pop('right_csv', None)
+            self.config.pop('left_csv', None)
         self.config['theme'] = self.theme
-        self.config['step_markers_right'] = self.step_markers_right
-        self.config['step_markers_left'] = self.step_markers_left
-        self.config['emiciclo_markers_right'] = self.emiciclo_markers_right
-        self.config['emiciclo_markers_left'] = self.emiciclo_markers_left
+        for role, markers in self.step_markers.items():
+            self.config[f'step_markers_{role}'] = markers
+        for role, markers in self.emiciclo_markers.items():
+            self.config[f'emiciclo_markers_{role}'] = markers
         self.config['show_steps'] = self.show_steps
 
+        # Offset delle telecamere aggiuntive, anche di quelle non più presenti
+        camera_offsets = self.config.get('camera_offsets', {})
+        camera_offsets.update({camera.file_name: camera.offset for camera in self.cameras})
+        self.config['camera_offsets'] = camera_offsets
+
         # Salva l'orientamento del layout video
         if self.video_layout_orientation is not None:
             self.config['video_layout_orientation'] = self.video_layout_orientation
@@ -467,22 +830,25 @@ class BaseVideoPlayer(QMainWindow):
             with open(config_file, 'r') as f:
                 self.config = json.load(f)
 
-            right_csv = self.config.get('right_csv')
-            left_csv = self.config.get('left_csv')
-            if right_csv and left_csv and hasattr(self, 'folder_path'):
-                right_path = os.path.join(self.folder_path, right_csv)
-                left_path = os.path.join(self.folder_path, left_csv)
-                if os.path.exists(right_path) and os.path.exists(left_path):
-                    self.load_and_preprocess_data(right_path, left_path)
+            # Ruoli salvati dall'utente (con le vecchie configurazioni a due file)
+            device_roles = self.config.get('device_roles')
+            if device_roles is None and self.config.get('right_csv') and self.config.get('left_csv'):
+                device_roles = {self.config['right_csv']: 'right', self.config['left_csv']: 'left'}
+            if device_roles and self.session is not None and self.session.apply_roles(device_roles):
+                self.build_device_controls()
 
-            self.step_markers_right = self.config.get('step_markers_right', [])
-            self.step_markers_left = self.config.get('step_markers_left', [])
-            self.emiciclo_markers_right = self.config.get('emiciclo_markers_right', [])
-            self.emiciclo_markers_left = self.config.get('emiciclo_markers_left', [])
+            if self.session is not None:
+                self.step_markers = {role: self.config.get(f'step_markers_{role}', [])
+                                     for role in self.session.roles}
+                self.emiciclo_markers = {role: self.config.get(f'emiciclo_markers_{role}', [])
+                                         for role in self.session.roles}
 
             self.sync_offset = float(self.config.get('sync_offset', 0.0))
+            if self.session is not None and self.config.get('clock_version', 1) < self.CLOCK_VERSION:
+                self.convert_device_clock_times()
+            self.on_sync_changed()
             self.playback_speed = float(self.config.get('playback_speed', 1.0))
-            speed_text = f"{self.playback_speed}x"
+            speed_text = f"{self.playback_speed:g}x"
             items = [self.speed_selector.itemText(i) for i in range(self.speed_selector.count())]
             if speed_text in items:
                 self.speed_selector.setCurrentText(speed_text)
@@ -492,13 +858,12 @@ class BaseVideoPlayer(QMainWindow):
 
             self.current_frame = int(self.config.get('current_frame', 0))
             if hasattr(self, 'cap'):
-                self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-                ret, frame = self.cap.read()
-                if ret:
+                frame = self.read_frame(self.current_frame)
+                if frame is not None:
                     self.update_frame_display(frame)
 
             selected_columns = self.config.get('selected_columns', [])
-            for checkbox in (self.checkboxes_right + self.checkboxes_left):
+            for checkbox in self.device_checkboxes:
                 checkbox.setChecked(checkbox.text() in selected_columns)
 
             self.theme = self.config.get('theme', 'dark')
@@ -510,12 +875,25 @@ class BaseVideoPlayer(QMainWindow):
             self.video_layout_orientation = self.config.get('video_layout_orientation', None)
         else:
             self.config = {}
-            self.step_markers_right = []
-            self.step_markers_left = []
-            self.emiciclo_markers_right = []
-            self.emiciclo_markers_left = []
+            self.step_markers = {}
+            self.emiciclo_markers = {}
+            if self.session is not None:
+                self.ensure_marker_lists()
             self.video_layout_orientation = None
 
+    def convert_device_clock_times(self):
+        # Configurazioni salvate quando ogni dispositivo aveva lo zero sul proprio
+        # primo campione: i marker passano all'orologio comune della sessione.
+        # L'offset di sincronizzazione valeva per tutti i dispositivi e si
+        # riferisce al piede destro, come i grafici di allora
+        for markers in (self.step_markers, self.emiciclo_markers):
+            for role in markers:
+                device = self.session.device(role)
+                if device is not None:
+                    markers[role] = [t + device.clock_offset for t in markers[role]]
+        reference = self.session.device('right') or self.session.devices[0]
+        self.sync_offset -= reference.clock_offset
+
     def get_folder_hash(self):
         if not hasattr(self, 'folder_path') or not self.folder_path:
             return ""
@@ -590,8 +968,8 @@ class BaseVideoPlayer(QMainWindow):
             label_color = 'color: #F0F0F0;'
         else:
             label_color = 'color: #000000;'
-        self.right_label.setStyleSheet(f"{label_color} font-weight: bold;")
-        self.left_label.setStyleSheet(f"{label_color} font-weight: bold;")
+        for label in self.device_labels:
+            label.setStyleSheet(f"{label_color} font-weight: bold;")
 
     def seek_video(self):
         self.timer.stop()
@@ -599,26 +977,46 @@ class BaseVideoPlayer(QMainWindow):
         self.play_button.setText("Play")
         self.play_button.setIcon(QIcon("play.png"))
         self.play_button.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
-        self.current_frame = self.trackbar.value()
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-        ret, frame = self.cap.read()
-        if ret:
-            self.update_frame_display(frame)
-            self.update_graphs_real()  # Aggiorna subito in modo sincronizzato
         self.video_finished = False
-        self.save_config()
+        # Al rilascio si mostra subito il frame esatto
+        self.seek_to_frame(self.trackbar.value())
+        self.finish_seek()
 
     def handle_slider_move(self, position):
-        # Aggiorna il frame in tempo reale mentre si muove lo slider
-        self.current_frame = position
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-        ret, frame = self.cap.read()
-        if ret:
-            self.update_frame_display(frame)
-            # Possiamo decidere di non aggiornare i grafici in tempo reale qui
-            # (se vogliamo massima fluidità dello slider).
-            # Oppure aggiornarli meno frequentemente.
-            self.update_graphs_real()
+        self.seek_to_frame(position)
+
+    def seek_to_frame(self, index):
+        """
+        Punto d'ingresso dei seek interattivi (slider, filmstrip, grafici):
+        ogni posizione sostituisce la precedente e, in riproduzione,
+        l'orologio riparte dal frame mostrato (show_seek_position).
+        """
+        self.seek_coordinator.request(index)
+
+    def finish_seek(self):
+        # Fine del trascinamento: si mostra subito il frame esatto
+        self.seek_coordinator.flush()
+
+    def show_seek_frame(self, index, frame):
+        # Frame (esatto o approssimato) per il seek in corso; i grafici seguono sempre index
+        self.current_frame = index
+        self.update_frame_display(frame)
+        self.show_seek_position(index)
+
+    def show_seek_position(self, index):
+        # Anche senza un frame da mostrare, posizione, slider e contatore seguono subito il seek
+        self.current_frame = index
+        self.update_frame_counter()
+        self.update_graphs_real()
+        if self.trackbar.value() != index:
+            self.trackbar.setValue(index)
+        if self.is_playing:
+            # In riproduzione l'orologio riparte dal frame scelto, altrimenti
+            # al tick successivo riporterebbe il video dov'era prima del seek
+            self.start_playback_timer()
+
+    def on_seek_settled(self):
+        self.update_playhead_prefetch()
         self.save_config()
 
     def update_frame_display(self, frame):
@@ -631,46 +1029,146 @@ class BaseVideoPlayer(QMainWindow):
         self.pixmap_item = self.graphics_scene.addPixmap(pixmap)
         self.graphics_scene.setSceneRect(QRectF(pixmap.rect()))
         self.update_frame_counter()
+        self.request_camera_frames()
 
     def update_frame_counter(self):
         self.frame_counter_label.setText(f"Frame: {self.current_frame}/{self.total_frames}")
+        self.filmstrip.set_current_frame(self.current_frame)
 
-    def show_first_frame(self):
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
+    def read_frame(self, index):
+        """
+        Frame BGR all'indice richiesto, dalla cache se già decodificato.
+        Il seek si fa solo se il decoder non è già posizionato su quel frame,
+        quindi le letture consecutive restano sequenziali.
+        """
+        frame = self.frame_cache.get(index)
+        if frame is not None:
+            return frame
+        self.frame_prefetcher.notify_foreground()
+        if self.cap_next_frame != index:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
         ret, frame = self.cap.read()
-        if ret:
+        if not ret:
+            self.cap_next_frame = None
+            return None
+        self.cap_next_frame = index + 1
+        self.frame_cache.put(index, frame)
+        return frame
+
+    def frame_at_data_time(self, data_time):
+        # Frame del video corrispondente a un tempo dei dati (con l'offset di sincronizzazione)
+        index = int(np.searchsorted(self.video_timestamps, data_time + self.sync_offset))
+        return max(0, min(index, self.total_frames - 1))
+
+    def prefetch_frames(self, name, priority, center, before=15, after=30):
+        # Frame attorno a center in ordine crescente: il thread li decodifica in sequenza
+        self.frame_prefetcher.set_target(name, priority, range(center - before, center + after + 1))
+
+    def update_playhead_prefetch(self):
+        # Da fermo: i frame che servirebbero riprendendo la riproduzione o avanzando
+        if not hasattr(self, 'cap'):
+            return
+        ahead = max(int(self.video_fps), 1)
+        if self.play_direction >= 0:
+            frames = range(self.current_frame + 1, self.current_frame + ahead + 1)
+        else:
+            frames = range(self.current_frame - ahead, self.current_frame)
+        self.frame_prefetcher.set_target('playhead', PRIORITY_PLAYHEAD, frames)
+
+    def update_marker_prefetch(self):
+        # Frame attorno ai marker visibili nei grafici, al massimo MAX_PREFETCH_MARKERS
+        if not hasattr(self, 'cap'):
+            return
+        frames = []
+        for plot_widget, _, _, _ in self.plot_widgets:
+            t0, t1 = plot_widget.getViewBox().viewRange()[0]
+            markers = np.concatenate((np.asarray(self.step_markers.get(plot_widget.role, []), dtype=np.float64),
+                                      np.asarray(self.emiciclo_markers.get(plot_widget.role, []), dtype=np.float64)))
+            visible = np.sort(markers[(markers >= t0) & (markers <= t1)])[:self.MAX_PREFETCH_MARKERS]
+            for marker_time in visible:
+                center = self.frame_at_data_time(marker_time)
+                frames.extend(range(center - 2, center + 3))
+        self.frame_prefetcher.set_target('markers', PRIORITY_MARKERS, frames)
+
+    def show_first_frame(self):
+        frame = self.read_frame(self.current_frame)
+        if frame is not None:
             self.update_frame_display(frame)
             self.update_frame_counter()
             self.update_graphs_real()
 
     def toggle_playback(self):
-        if self.video_finished:
-            self.restart_video()
+        # Spazio e pulsante Play riprendono sempre in avanti
         if self.is_playing:
-            self.timer.stop()
-            self.play_button.setText("Play")
-            self.play_button.setIcon(QIcon("play.png"))
-            self.play_button.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
+            self.pause_playback()
         else:
-            self.timer.start(int(1000 / (self.video_fps * self.playback_speed)))
-            self.play_button.setText("Pause")
-            self.play_button.setIcon(QIcon("pause.png"))
-            self.play_button.setStyleSheet("background-color: #f44336; color: white; font-weight: bold;")
-        self.is_playing = not self.is_playing
+            self.play_direction = 1
+            self.start_playback()
+
+    def start_playback(self):
+        if self.play_direction > 0 and self.video_finished:
+            self.restart_video()
+        else:
+            self.start_playback_timer()
+        self.play_button.setText("Pause")
+        self.play_button.setIcon(QIcon("pause.png"))
+        self.play_button.setStyleSheet("background-color: #f44336; color: white; font-weight: bold;")
+        self.is_playing = True
+
+    def pause_playback(self):
+        self.timer.stop()
+        self.play_button.setText("Play")
+        self.play_button.setIcon(QIcon("play.png"))
+        self.play_button.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
+        self.is_playing = False
+        self.update_graphs_real()
+        self.update_playhead_prefetch()
+
+    def start_playback_timer(self):
+        # La posizione segue l'orologio: il timer decide solo quanto spesso ridisegnare
+        self.playback_clock.start(self.current_frame, self.video_timestamps, self.playback_speed, self.play_direction)
+        self.reverse_block = None
+        interval = 1000 / (self.video_fps * self.playback_speed)
+        self.timer.start(int(max(self.MIN_TIMER_INTERVAL_MS, interval)))
+
+    def shuttle(self, direction):
+        """
+        Comandi J/L: avvia nella direzione indicata a 1x; premuti di nuovo nella
+        stessa direzione raddoppiano la velocità.
+        """
+        if self.is_playing and self.play_direction == direction:
+            speed = min(self.playback_speed * 2, self.MAX_PLAYBACK_SPEED)
+        else:
+            speed = 1.0
+        reversed_direction = self.is_playing and self.play_direction != direction
+        self.play_direction = direction
+        self.speed_selector.setCurrentText(f"{speed:g}x")
+        if not self.is_playing:
+            self.start_playback()
+        elif reversed_direction:
+            # Se la velocità non cambia (es. già a 1x) il selettore non emette
+            # segnali: l'orologio va fatto ripartire nella nuova direzione
+            self.timer.stop()
+            self.start_playback_timer()
 
     def change_playback_speed(self, speed_text):
-        speed_factor = float(speed_text.replace('x', ''))
-        self.playback_speed = speed_factor
+        # Il campo è modificabile: i testi non validi (es. durante la digitazione) si ignorano
+        try:
+            speed_factor = float(speed_text.strip().rstrip('xX'))
+        except ValueError:
+            return
+        if speed_factor <= 0:
+            return
+        self.playback_speed = max(self.MIN_PLAYBACK_SPEED, min(speed_factor, self.MAX_PLAYBACK_SPEED))
         if self.is_playing:
             self.timer.stop()
-            self.timer.start(int(1000 / (self.video_fps * self.playback_speed)))
+            self.start_playback_timer()
         self.save_config()
 
     def restart_video(self):
         self.current_frame = 0
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-        ret, frame = self.cap.read()
-        if ret:
+        frame = self.read_frame(self.current_frame)
+        if frame is not None:
             self.trackbar.setValue(self.current_frame)
             self.update_frame_display(frame)
             self.update_graphs_real()
@@ -678,41 +1176,108 @@ class BaseVideoPlayer(QMainWindow):
         self.play_button.setText("Pause")
         self.play_button.setIcon(QIcon("pause.png"))
         self.play_button.setStyleSheet("background-color: #f44336; color: white; font-weight: bold;")
-        self.timer.start(int(1000 / (self.video_fps * self.playback_speed)))
+        self.start_playback_timer()
 
     # -------------------------------------------------------------------------
     # AGGIORNAMENTO GRAFICI
     # -------------------------------------------------------------------------
     def update_graphs_real(self):
         """
-        Effettua l'aggiornamento "reale" dei grafici, con searchsorted.
+        Effettua l'aggiornamento "reale" dei grafici, con la tabella di lookup.
         Chiamare questa funzione solo quando è effettivamente necessario.
         """
-        current_video_time = self.video_timestamps[self.current_frame]
-        synced_time = current_video_time - self.sync_offset
+        # Una sola colonna della tabella precalcolata dà l'indice di tutti i dispositivi
+        if self.session is None or not (self.plot_widgets or self.spectrogram_panels):
+            return
+        indices = self.get_frame_lookup()[:, self.current_frame]
+        if self.follow_playhead:
+            self.update_follow_window(self.follow_center_time())
+
+        for panel in self.spectrogram_panels:
+            panel.set_playhead(panel.store.time[indices[panel.device.index]])
+
+        for plot_widget, playhead, columns, store in self.plot_widgets:
+            idx = indices[plot_widget.device.index]
+            # Solo il cursore si muove: niente autorange né ridisegno delle curve
+            playhead.set_position(store.time[idx], [store.column(column)[idx] for column in columns
+                                                    if column in plot_widget.selected_columns])
+
+    def set_follow_playhead(self, enabled):
+        self.follow_playhead = enabled
+        self.save_app_setting('follow_playhead', enabled)
+        self.update_plot_widgets()
+        self.update_graphs_real()
 
-        # Aggiorna i plot di destra e sinistra
-        for i, (plot_widget, moving_points, columns, data) in enumerate(self.plot_widgets):
-            # A seconda del piede, usiamo i timestamp corretti
-            if plot_widget.foot == 'right':
-                arr_timestamps = self.timestamps_right
-            else:
-                arr_timestamps = self.timestamps_left
+    def follow_center_time(self):
+        # Tempo dei dati al centro della finestra: in riproduzione segue l'orologio, non il frame
+        if self.is_playing:
+            video_time = self.playback_clock.video_time()
+        else:
+            video_time = self.video_timestamps[self.current_frame]
+        return video_time - self.sync_offset
+
+    def update_follow_window(self, center):
+        """
+        Modalità "segui cursore": tutti i grafici mostrano la stessa finestra
+        attorno al cursore (asse x collegato) e le curve ricevono solo i campioni
+        della finestra, come viste sullo store. Il costo per frame dipende dalla
+        larghezza della finestra, non dalla durata della sessione.
+        """
+        if not self.plot_widgets:
+            return
+        t_start = center - self.FOLLOW_WINDOW_SECONDS
+        t_end = center + self.FOLLOW_WINDOW_SECONDS
+        for plot_widget, _, columns, store in self.plot_widgets:
+            i0, i1 = store.index_range(t_start, t_end)
+            # Un campione in più per lato, così la curva arriva ai bordi
+            i0, i1 = max(i0 - 1, 0), min(i1 + 1, len(store))
+            time_values = store.time[i0:i1]
+            curves = iter(plot_widget.plot_curves)
+            for column in columns:
+                if column in plot_widget.selected_columns:
+                    next(curves).setData(time_values, store.column(column)[i0:i1])
+        self.plot_widgets[0][0].setXRange(t_start, t_end, padding=0)
 
-            # Troviamo l'indice con searchsorted
-            idx = np.searchsorted(arr_timestamps, synced_time)
-            # Sistemiamo i boundary
-            idx = max(0, min(idx, len(arr_timestamps) - 1))
+    def on_plot_range_changed(self, plot_widget):
+        # In riproduzione con la finestra che scorre i marker visibili cambiano a ogni frame
+        if not (self.follow_playhead and self.is_playing):
+            self.update_marker_prefetch()
+        if not self.follow_playhead:
+            self.update_plot_detail(plot_widget)
 
-            x_val = arr_timestamps[idx]
+    def update_plot_detail(self, plot_widget):
+        """
+        Con molti campioni le curve mostrano la panoramica min/max; quando lo
+        zoom lascia visibili pochi campioni si passano quelli veri, come viste
+        sullo store (un margine di una finestra per lato evita di ricalcolare
+        a ogni piccolo spostamento). Si leggono solo i dati della finestra.
+        """
+        if not getattr(plot_widget, 'plot_curves', None) or len(plot_widget.store) <= self.MAX_PLOT_POINTS:
+            return
+        store = plot_widget.store
+        t0, t1 = plot_widget.getViewBox().viewRange()[0]
+        i0, i1 = store.index_range(t0, t1)
+        current = plot_widget.detail_range
+        if 3 * (i1 - i0) > self.MAX_PLOT_POINTS:
+            detail_range = None
+        elif current is not None and current[0] <= i0 and i1 <= current[1]:
+            return
+        else:
+            margin = max(i1 - i0, 1)
+            detail_range = (max(i0 - margin, 0), min(i1 + margin, len(store)))
+        if detail_range == current:
+            return
+        plot_widget.detail_range = detail_range
 
-            # Aggiorna i moving points
-            point_idx = 0
-            for col_idx, column in enumerate(plot_widget.all_columns):
-                if column in plot_widget.selected_columns:
-                    y_val = data[column].values[idx]
-                    plot_widget.moving_points[point_idx].setData([x_val], [y_val])
-                    point_idx += 1
+        curves = iter(plot_widget.plot_curves)
+        for column in plot_widget.all_columns:
+            if column in plot_widget.selected_columns:
+                if detail_range is None:
+                    time_values, values = store.overview(column, self.MAX_PLOT_POINTS)
+                else:
+                    time_values = store.time[detail_range[0]:detail_range[1]]
+                    values = store.column(column)[detail_range[0]:detail_range[1]]
+                next(curves).setData(time_values, values)
 
     def toggle_synchronization(self):
         if self.sync_state is None:
@@ -762,14 +1327,9 @@ class BaseVideoPlayer(QMainWindow):
         pos = event.scenePos()
         vb = widget.plotItem.vb
         mouse_point = vb.mapSceneToView(pos)
-        data = self.plot_widgets[idx][-1]
-        # Nel caso stessimo usando la colonna 'VideoTime' nativa, potremmo fare
-        # closest_index = np.abs(data['VideoTime'] - mouse_point.x()).idxmin()
-        # Ma qui potremmo usare lo stesso approach con searchsorted
-        arr_timestamps = self.timestamps_right if widget.foot == 'right' else self.timestamps_left
-        idx_closest = np.searchsorted(arr_timestamps, mouse_point.x())
-        idx_closest = max(0, min(idx_closest, len(arr_timestamps) - 1))
-        self.sync_data_time = arr_timestamps[idx_closest]
+        store = self.plot_widgets[idx][-1]
+        idx_closest = store.index_at(mouse_point.x())
+        self.sync_data_time = store.time[idx_closest]
 
         for idx2, (plot_widget, _, _, _) in enumerate(self.plot_widgets):
             self.stop_interactivity(plot_widget, idx2)
@@ -789,6 +1349,7 @@ class BaseVideoPlayer(QMainWindow):
     def check_sync_ready(self):
         if self.sync_video_time is not None and self.sync_data_time is not None:
             self.sync_offset = self.sync_video_time - self.sync_data_time
+            self.on_sync_changed()
             print(f"Offset di sincronizzazione impostato a {self.sync_offset} secondi")
             self.update_graphs_real()
             self.sync_video_time = None
@@ -799,8 +1360,20 @@ class BaseVideoPlayer(QMainWindow):
             self.play_button.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
             self.save_config()
 
+    def on_sync_changed(self):
+        # I dati ricampionati sui tempi dei frame dipendono dall'offset
+        self.resampler.invalidate()
+
+    def sync_state_key(self):
+        version = self.session.version if self.session is not None else 0
+        return (float(self.sync_offset), version)
+
+    def video_grid_key(self):
+        return ('video', self.video_path, self.video_timestamps_version)
+
     def reset_synchronization(self):
         self.sync_offset = 0.0
+        self.on_sync_changed()
         self.update_graphs_real()
         self.save_config()
         QMessageBox.information(self, "Sincronizzazione Reimpostata", "L'offset di sincronizzazione è stato reimpostato.")
@@ -814,23 +1387,27 @@ class BaseVideoPlayer(QMainWindow):
             if os.path.exists(config_file):
                 os.remove(config_file)
             self.sync_offset = 0.0
+            self.on_sync_changed()
             self.playback_speed = 1.0
             self.speed_selector.setCurrentText("1x")
             self.current_frame = 0
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-            ret, frame = self.cap.read()
-            if ret:
+            frame = self.read_frame(self.current_frame)
+            if frame is not None:
                 self.update_frame_display(frame)
                 self.update_graphs_real()
-            for checkbox in (self.checkboxes_right + self.checkboxes_left):
+            for checkbox in self.device_checkboxes:
                 checkbox.setChecked(False)
             self.update_selected_columns()
-            self.step_markers_right = []
-            self.step_markers_left = []
-            self.emiciclo_markers_right = []
-            self.emiciclo_markers_left = []
+            self.step_markers = {}
+            self.emiciclo_markers = {}
+            if self.session is not None:
+                self.ensure_marker_lists()
             self.show_steps = True
             self.video_layout_orientation = None
+            for camera in self.cameras:
+                camera.offset = 0.0
+            self.request_camera_frames()
+            self.notify_markers_changed()
             self.save_config()
             QMessageBox.information(self, "Impostazioni Reimpostate",
                                     "Le impostazioni sono state reimpostate ai valori predefiniti.")
@@ -841,6 +1418,8 @@ class BaseVideoPlayer(QMainWindow):
         else:
             self.theme = 'dark'
         self.apply_theme()
+        for panel in self.spectrogram_panels:
+            panel.setBackground('#2E2E2E' if self.theme == 'dark' else '#FFFFFF')
         for plot_widget, _, _, _ in self.plot_widgets:
             if self.theme == 'dark':
                 plot_widget.setBackground('#2E2E2E')
@@ -855,6 +1434,10 @@ class BaseVideoPlayer(QMainWindow):
         self.save_config()
 
     def closeEvent(self, event):
+        self.frame_prefetcher.stop()
+        self.clear_cameras()
+        self.filmstrip.stop_loading()
+        self.filmstrip.preview.close()
         if hasattr(self, 'folder_path'):
             self.save_config()
         if hasattr(self, 'cap'):
@@ -863,9 +1446,18 @@ class BaseVideoPlayer(QMainWindow):
 
     def next_frame(self):
         if not any(self.interactive_flags) and self.sync_state != "data":
-            ret, frame = self.cap.read()
-            if ret:
-                self.current_frame = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
+            target = self.playback_clock.frame()
+            if target == self.current_frame:
+                # La finestra dei grafici scorre anche tra un frame e l'altro
+                if self.follow_playhead:
+                    self.update_follow_window(self.follow_center_time())
+                return
+            # Indietro fino all'inizio: ci fermiamo sul primo frame
+            reached_start = target < 0
+            target = max(target, 0)
+            frame = self.read_playback_frame(target) if target < self.total_frames else None
+            if frame is not None:
+                self.current_frame = target
                 self.trackbar.setValue(self.current_frame)
                 self.update_frame_display(frame)
 
@@ -873,6 +1465,8 @@ class BaseVideoPlayer(QMainWindow):
                 self.frame_counter_internal += 1
                 if self.frame_counter_internal % self.GRAPH_UPDATE_EVERY_N_FRAMES == 0:
                     self.update_graphs_real()
+                if reached_start:
+                    self.pause_playback()
 
             else:
                 self.timer.stop()
@@ -882,6 +1476,56 @@ class BaseVideoPlayer(QMainWindow):
                 self.play_button.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
                 self.video_finished = True
 
+    def read_playback_frame(self, target):
+        if self.play_direction < 0:
+            return self.read_reverse_frame(target)
+        # In avanti: i pochi frame saltati (velocità > 1x o tick in ritardo)
+        # si scorrono con grab(), che non converte l'immagine
+        if target not in self.frame_cache and self.cap_next_frame is not None:
+            skip = target - self.cap_next_frame
+            if 0 < skip <= self.MAX_GRAB_SKIP:
+                for _ in range(skip):
+                    if not self.cap.grab():
+                        return None
+                self.cap_next_frame = target
+        return self.read_frame(target)
+
+    def reverse_block_size(self):
+        # Un secondo di video, ma al più un quarto della cache dei frame
+        return max(1, min(int(self.video_fps), self.frame_cache.max_bytes // (4 * max(self.frame_nbytes, 1))))
+
+    def read_reverse_frame(self, target):
+        """
+        Riproduzione all'indietro: i frame si decodificano in avanti a blocchi
+        (un seek per blocco) e si riproducono dalla cache al contrario. Mentre
+        si riproduce un blocco, il thread di prefetch decodifica il precedente
+        e, da metà blocco, anche quello prima ancora. Se il prefetch è in
+        ritardo si mostra il frame pronto più vicino invece di decodificare qui.
+        """
+        block = self.reverse_block_size()
+        block_start = (target // block) * block
+        frame = self.frame_cache.get(target)
+        if frame is None:
+            nearest = self.frame_cache.nearest(target, block)
+            if nearest is not None:
+                frame = nearest[1]
+            else:
+                # Avvio (o salto) della riproduzione: nulla di pronto nei dintorni
+                for index in range(block_start, target + 1):
+                    frame = self.read_frame(index)
+                    if frame is None:
+                        return None
+        past_half = target < block_start + block // 2
+        if self.reverse_block != (block_start, past_half):
+            self.reverse_block = (block_start, past_half)
+            # In ordine di urgenza: il resto di questo blocco, poi i precedenti
+            # (ognuno in avanti, così il decoder legge in sequenza)
+            frames = list(range(block_start, target))
+            for depth in range(1, 3 if past_half else 2):
+                frames += range(max(block_start - depth * block, 0), max(block_start - (depth - 1) * block, 0))
+            self.frame_prefetcher.set_target('playhead', PRIORITY_PLAYHEAD, frames)
+        return frame
+
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_Right or event.key() == Qt.Key_Up:
             self.step_frame(1)
@@ -889,6 +1533,17 @@ class BaseVideoPlayer(QMainWindow):
             self.step_frame(-1)
         elif event.key() == Qt.Key_Space:
             self.toggle_playback()
+        elif event.key() == Qt.Key_N:
+            self.jump_to_event(1)
+        elif event.key() == Qt.Key_P:
+            self.jump_to_event(-1)
+        elif event.key() == Qt.Key_J:
+            self.shuttle(-1)
+        elif event.key() == Qt.Key_K:
+            if self.is_playing:
+                self.pause_playback()
+        elif event.key() == Qt.Key_L:
+            self.shuttle(1)
 
     def step_frame(self, step):
         self.timer.stop()
@@ -898,20 +1553,20 @@ class BaseVideoPlayer(QMainWindow):
         self.play_button.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
 
         self.current_frame = max(0, min(self.total_frames - 1, self.current_frame + step))
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-
-        ret, frame = self.cap.read()
-        if ret:
+        frame = self.read_frame(self.current_frame)
+        if frame is not None:
             self.trackbar.setValue(self.current_frame)
             self.update_frame_display(frame)
             self.update_graphs_real()
         self.update_frame_counter()
         self.video_finished = False
+        if step:
+            self.play_direction = 1 if step > 0 else -1
+        self.update_playhead_prefetch()
         self.save_config()
 
     def update_selected_columns(self):
-        selected_columns = [checkbox.text() for checkbox in
-                            (self.checkboxes_right + self.checkboxes_left)
+        selected_columns = [checkbox.text() for checkbox in self.device_checkboxes
                             if checkbox.isChecked()]
         if selected_columns != self.selected_columns:
             self.selected_columns = selected_columns
@@ -920,6 +1575,8 @@ class BaseVideoPlayer(QMainWindow):
 
     def update_plot_widgets(self):
         for widget, _, _, _ in self.plot_widgets:
+            # Gli item vanno tolti subito: il widget resta in scena fino a deleteLater
+            widget.clear()
             widget.deleteLater()
         self.plot_widgets.clear()
         self.interactive_flags.clear()
@@ -928,37 +1585,52 @@ class BaseVideoPlayer(QMainWindow):
         if not self.selected_columns:
             return
 
-        if "Accelerazioni Dx (Ax, Ay, Az)" in self.selected_columns:
-            self.create_plot_widget(["Ax", "Ay", "Az"],
-                                    ["#FF0000", "#00FF00", "#0000FF"],
-                                    self.data_right, 'right')
-
-        if "Giroscopio Dx (Gx, Gy, Gz)" in self.selected_columns:
-            self.create_plot_widget(["Gx", "Gy", "Gz"],
-                                    ["#FF0000", "#00FF00", "#0000FF"],
-                                    self.data_right, 'right')
-
-        if "Pressione Dx (S0, S1, S2)" in self.selected_columns:
-            self.create_plot_widget(["S0", "S1", "S2"],
-                                    ["#FF0000", "#00FF00", "#0000FF"],
-                                    self.data_right, 'right')
-
-        if "Accelerazioni Sx (Ax, Ay, Az)" in self.selected_columns:
-            self.create_plot_widget(["Ax", "Ay", "Az"],
-                                    ["#FFA500", "#800080", "#008080"],
-                                    self.data_left, 'left')
-
-        if "Giroscopio Sx (Gx, Gy, Gz)" in self.selected_columns:
-            self.create_plot_widget(["Gx", "Gy", "Gz"],
-                                    ["#FFA500", "#800080", "#008080"],
-                                    self.data_left, 'left')
-
-        if "Pressione Sx (S0, S1, S2)" in self.selected_columns:
-            self.create_plot_widget(["S0", "S1", "S2"],
-                                    ["#FFA500", "#800080", "#008080"],
-                                    self.data_left, 'left')
-
-    def create_plot_widget(self, columns, colors, data, foot):
+        # Un grafico per ogni gruppo selezionato, dispositivo per dispositivo.
+        # I canali derivati non ancora pronti vengono calcolati in background e
+        # il grafico compare quando il risultato arriva.
+        for checkbox in self.device_checkboxes:
+            if checkbox.isChecked():
+                missing = self.derived_pipeline.missing(checkbox.device.store, checkbox.columns)
+                if missing:
+                    self.request_derived_channels(checkbox.device, missing)
+                    continue
+                self.create_plot_widget(checkbox.columns, checkbox.device.colors, checkbox.device)
+
+    # -----------------------------
+    # CANALI DERIVATI E LAVORI IN BACKGROUND
+    # -----------------------------
+    def start_background_task(self, task):
+        # Teniamo un riferimento finché il lavoro non è terminato
+        self.background_tasks.add(task)
+        task.signals.finished.connect(lambda _, t=task: self.background_tasks.discard(t))
+        task.signals.failed.connect(lambda _, t=task: self.background_tasks.discard(t))
+        task.start()
+
+    def request_derived_channels(self, device, names):
+        store = device.store
+        key = (id(store), tuple(names))
+        if key in self.pending_derived:
+            return
+        self.pending_derived.add(key)
+        task = BackgroundTask(self.derived_pipeline.compute, store.snapshot(), names)
+        task.signals.finished.connect(
+            lambda results, store=store, key=key: self.on_derived_channels_ready(store, key, results))
+        task.signals.failed.connect(
+            lambda error, key=key: self.on_derived_channels_failed(key, error))
+        self.start_background_task(task)
+
+    def on_derived_channels_ready(self, store, key, results):
+        self.pending_derived.discard(key)
+        self.derived_pipeline.attach(store, results)
+        if self.session is not None and any(device.store is store for device in self.session):
+            self.update_plot_widgets()
+            self.update_graphs_real()
+
+    def on_derived_channels_failed(self, key, error):
+        self.pending_derived.discard(key)
+        QMessageBox.warning(self, "Errore", f"Impossibile calcolare i canali derivati: {error}")
+
+    def create_plot_widget(self, columns, colors, device):
         plot_widget = pg.PlotWidget()
         if self.theme == 'dark':
             plot_widget.setBackground('#2E2E2E')
@@ -968,7 +1640,8 @@ class BaseVideoPlayer(QMainWindow):
             axis_color = '#000000'
         plot_widget.showGrid(x=True, y=True, alpha=0.3)
 
-        plot_widget.foot = foot
+        plot_widget.device = device
+        plot_widget.role = device.role
         ylabel = ", ".join([f"<span style='color: {colors[i]};'>{column}</span>"
                             for i, column in enumerate(columns)])
         plot_widget.setLabel('left', ylabel)
@@ -980,7 +1653,7 @@ class BaseVideoPlayer(QMainWindow):
         self.graph_splitter.addWidget(plot_widget)
 
         plot_widget.all_columns = columns
-        plot_widget.data = data
+        plot_widget.store = device.store
         plot_widget.selected_columns = columns.copy()
         plot_widget.colors = colors
 
@@ -1000,6 +1673,10 @@ class BaseVideoPlayer(QMainWindow):
         select_datapoints_action.triggered.connect(lambda: self.select_datapoints(plot_widget))
         view_box.menu.addAction(select_datapoints_action)
 
+        spectrogram_action = QAction("Mostra Spettrogramma", plot_widget)
+        spectrogram_action.triggered.connect(lambda: self.show_spectrogram(plot_widget))
+        view_box.menu.addAction(spectrogram_action)
+
         add_marker_here_action = QAction("Aggiungi Marker Qui", plot_widget)
         add_marker_here_action.triggered.connect(lambda: self.add_marker_here(plot_widget))
         add_marker_current_time_action = QAction("Aggiungi Marker al Timestamp Corrente", plot_widget)
@@ -1036,13 +1713,14 @@ class BaseVideoPlayer(QMainWindow):
         plot_widget.remove_emiciclo_marker_action = remove_emiciclo_marker_action
 
         view_box.menu.aboutToShow.connect(lambda vw=view_box, pw=plot_widget: self.update_context_menu(vw, pw))
+        view_box.sigXRangeChanged.connect(lambda *_, pw=plot_widget: self.on_plot_range_changed(pw))
 
         # Salviamo nei nostri elenchi
-        self.plot_widgets.append((plot_widget, [], columns, data))
+        self.plot_widgets.append((plot_widget, None, columns, device.store))
         self.interactive_flags.append(False)
 
         plot_widget.plot_curves = []
-        plot_widget.moving_points = []
+        plot_widget.playhead = None
 
         self.update_plot_widget(plot_widget)
 
@@ -1058,19 +1736,14 @@ class BaseVideoPlayer(QMainWindow):
         self.on_mouse_moved_slots.append(on_mouse_moved_slot)
 
     def update_plot_widget(self, plot_widget):
-        data = plot_widget.data
+        store = plot_widget.store
         selected_columns = plot_widget.selected_columns
         colors = plot_widget.colors
 
-        max_points = 10000
-        if len(data) > max_points:
-            indices = np.linspace(0, len(data) - 1, max_points).astype(int)
-            data = data.iloc[indices]
-        time_values = data["VideoTime"].values
-
         plot_widget.clear()
         plot_widget.plot_curves = []
-        plot_widget.moving_points = []
+        plot_widget.detail_range = None
+        playhead_colors = []
 
         for i, column in enumerate(plot_widget.all_columns):
             if column in selected_columns:
@@ -1078,21 +1751,47 @@ class BaseVideoPlayer(QMainWindow):
                 color_pg = pg.mkColor(color)
                 color_pg.setAlpha(255)
                 pen = pg.mkPen(color=color_pg, width=2)
-                curve = plot_widget.plot(time_values, data[column].values, pen=pen)
+                # Seguendo il cursore le curve partono vuote: i dati arrivano dalla finestra
+                if self.follow_playhead:
+                    time_values, values = store.time[:0], store.column(column)[:0]
+                else:
+                    time_values, values = store.overview(column, self.MAX_PLOT_POINTS)
+                curve = plot_widget.plot(time_values, values, pen=pen)
                 curve.setDownsampling(auto=True, method='mean')
                 plot_widget.plot_curves.append(curve)
-                moving_point = plot_widget.plot(
-                    [time_values[0]], [data[column].values[0]],
-                    pen=None, symbol='o', symbolBrush=color_pg)
-                plot_widget.moving_points.append(moving_point)
+                playhead_colors.append(color_pg)
+
+        # Il cursore non conta per l'autorange: spostarlo non cambia la vista
+        plot_widget.playhead = PlayheadItem(playhead_colors)
+        plot_widget.addItem(plot_widget.playhead, ignoreBounds=True)
+
+        if self.follow_playhead:
+            # Asse x comune a tutti i grafici e asse y fisso sull'intera sessione,
+            # così la scala non salta mentre la finestra scorre
+            first_widget = self.plot_widgets[0][0]
+            plot_widget.setXLink(first_widget.getViewBox() if first_widget is not plot_widget else None)
+            plot_widget.disableAutoRange()
+            # Gli estremi dalla panoramica min/max (calcolata una volta e condivisa
+            # con la vista intera), senza scorrere le colonne complete a ogni cambio
+            columns = [store.overview(column, self.MAX_PLOT_POINTS)[1]
+                       for column in plot_widget.all_columns if column in selected_columns]
+            if columns and len(store):
+                y_min = min(float(np.nanmin(values)) for values in columns)
+                y_max = max(float(np.nanmax(values)) for values in columns)
+                plot_widget.setYRange(y_min, y_max)
+        else:
+            plot_widget.setXLink(None)
+            plot_widget.enableAutoRange()
 
         # Aggiorno la tupla in self.plot_widgets
         for idx, (pw, _, cols, _) in enumerate(self.plot_widgets):
             if pw == plot_widget:
-                self.plot_widgets[idx] = (plot_widget, plot_widget.moving_points, plot_widget.all_columns, plot_widget.data)
+                self.plot_widgets[idx] = (plot_widget, plot_widget.playhead, plot_widget.all_columns, plot_widget.store)
                 break
 
         self.update_markers(plot_widget)
+        plot_widget.event_item = None
+        self.update_event_highlight(plot_widget)
 
     def select_datapoints(self, plot_widget):
         dialog = QDialog(self)
@@ -1116,6 +1815,24 @@ class BaseVideoPlayer(QMainWindow):
             plot_widget.selected_columns = [cb.text() for cb in checkboxes if cb.isChecked()]
             self.update_plot_widget(plot_widget)
 
+    def show_spectrogram(self, plot_widget):
+        columns = plot_widget.all_columns
+        column = columns[0]
+        if len(columns) > 1:
+            column, ok = QInputDialog.getItem(self, "Mostra Spettrogramma", "Canale:", columns, 0, False)
+            if not ok:
+                return
+        panel = SpectrogramPanel(self, plot_widget.device, column)
+        panel.setBackground('#2E2E2E' if self.theme == 'dark' else '#FFFFFF')
+        self.graph_splitter.addWidget(panel)
+        self.spectrogram_panels.append(panel)
+        self.update_graphs_real()
+
+    def close_spectrogram(self, panel):
+        if panel in self.spectrogram_panels:
+            self.spectrogram_panels.remove(panel)
+        panel.close_panel()
+
     def update_context_menu(self, view_box, plot_widget):
         if hasattr(self, 'context_menu_event_pos'):
             pos = self.context_menu_event_pos
@@ -1123,13 +1840,8 @@ class BaseVideoPlayer(QMainWindow):
             mouse_point = vb.mapSceneToView(pos)
             timestamp = mouse_point.x()
 
-            foot = plot_widget.foot
-            if foot == 'right':
-                step_markers = self.step_markers_right
-                emiciclo_markers = self.emiciclo_markers_right
-            else:
-                step_markers = self.step_markers_left
-                emiciclo_markers = self.emiciclo_markers_left
+            step_markers = self.step_markers.setdefault(plot_widget.role, [])
+            emiciclo_markers = self.emiciclo_markers.setdefault(plot_widget.role, [])
 
             threshold = 0.1
             distances = np.abs(np.array(step_markers) - timestamp)
@@ -1150,27 +1862,35 @@ class BaseVideoPlayer(QMainWindow):
 
         self.update_toggle_steps_action(plot_widget)
 
+    def default_marker_role(self):
+        # Marker dal pulsante: piede destro se presente, altrimenti il primo dispositivo
+        if self.session is None or not len(self.session):
+            return None
+        if self.session.device('right') is not None:
+            return 'right'
+        return self.session.roles[0]
+
     def add_step_marker(self, plot_widget=None):
         if plot_widget is None:
-            foot = 'right'
+            role = self.default_marker_role()
+            if role is None:
+                return
         else:
-            foot = plot_widget.foot
+            role = plot_widget.role
 
         current_video_time = self.video_timestamps[self.current_frame]
         synced_time = current_video_time - self.sync_offset
 
-        if foot == 'right':
-            self.step_markers_right.append(synced_time)
-        else:
-            self.step_markers_left.append(synced_time)
+        self.step_markers.setdefault(role, []).append(synced_time)
 
         if plot_widget:
             self.update_markers(plot_widget)
         else:
             for pw, _, _, _ in self.plot_widgets:
-                if pw.foot == foot:
+                if pw.role == role:
                     self.update_markers(pw)
 
+        self.notify_markers_changed()
         self.save_config()
 
     def add_marker_here(self, plot_widget):
@@ -1179,13 +1899,10 @@ class BaseVideoPlayer(QMainWindow):
         mouse_point = vb.mapSceneToView(pos)
         timestamp = mouse_point.x()
 
-        foot = plot_widget.foot
-        if foot == 'right':
-            self.step_markers_right.append(timestamp)
-        else:
-            self.step_markers_left.append(timestamp)
+        self.step_markers.setdefault(plot_widget.role, []).append(timestamp)
 
         self.update_markers(plot_widget)
+        self.notify_markers_changed()
         self.save_config()
 
     def remove_marker_here(self, plot_widget):
@@ -1194,11 +1911,7 @@ class BaseVideoPlayer(QMainWindow):
         mouse_point = vb.mapSceneToView(pos)
         timestamp = mouse_point.x()
 
-        foot = plot_widget.foot
-        if foot == 'right':
-            markers = self.step_markers_right
-        else:
-            markers = self.step_markers_left
+        markers = self.step_markers.setdefault(plot_widget.role, [])
 
         threshold = 0.1
         distances = np.abs(np.array(markers) - timestamp)
@@ -1208,31 +1921,32 @@ class BaseVideoPlayer(QMainWindow):
             idx_to_remove = np.argmin(distances)
             del markers[idx_to_remove]
             self.update_markers(plot_widget)
+            self.notify_markers_changed()
             self.save_config()
         else:
             QMessageBox.information(self, "Nessun Marker Vicino", "Non ci sono marker vicini alla posizione selezionata.")
 
     def add_emiciclo_marker(self, plot_widget=None):
         if plot_widget is None:
-            foot = 'right'
+            role = self.default_marker_role()
+            if role is None:
+                return
         else:
-            foot = plot_widget.foot
+            role = plot_widget.role
 
         current_video_time = self.video_timestamps[self.current_frame]
         synced_time = current_video_time - self.sync_offset
 
-        if foot == 'right':
-            self.emiciclo_markers_right.append(synced_time)
-        else:
-            self.emiciclo_markers_left.append(synced_time)
+        self.emiciclo_markers.setdefault(role, []).append(synced_time)
 
         if plot_widget:
             self.update_markers(plot_widget)
         else:
             for pw, _, _, _ in self.plot_widgets:
-                if pw.foot == foot:
+                if pw.role == role:
                     self.update_markers(pw)
 
+        self.notify_markers_changed()
         self.save_config()
 
     def add_emiciclo_marker_here(self, plot_widget):
@@ -1241,13 +1955,10 @@ class BaseVideoPlayer(QMainWindow):
         mouse_point = vb.mapSceneToView(pos)
         timestamp = mouse_point.x()
 
-        foot = plot_widget.foot
-        if foot == 'right':
-            self.emiciclo_markers_right.append(timestamp)
-        else:
-            self.emiciclo_markers_left.append(timestamp)
+        self.emiciclo_markers.setdefault(plot_widget.role, []).append(timestamp)
 
         self.update_markers(plot_widget)
+        self.notify_markers_changed()
         self.save_config()
 
     def remove_emiciclo_marker_here(self, plot_widget):
@@ -1256,11 +1967,7 @@ class BaseVideoPlayer(QMainWindow):
         mouse_point = vb.mapSceneToView(pos)
         timestamp = mouse_point.x()
 
-        foot = plot_widget.foot
-        if foot == 'right':
-            markers = self.emiciclo_markers_right
-        else:
-            markers = self.emiciclo_markers_left
+        markers = self.emiciclo_markers.setdefault(plot_widget.role, [])
 
         threshold = 0.1
         distances = np.abs(np.array(markers) - timestamp)
@@ -1270,6 +1977,7 @@ class BaseVideoPlayer(QMainWindow):
             idx_to_remove = np.argmin(distances)
             del markers[idx_to_remove]
             self.update_markers(plot_widget)
+            self.notify_markers_changed()
             self.save_config()
         else:
             QMessageBox.information(self, "Nessun Marker Emiciclo Vicino",
@@ -1291,13 +1999,8 @@ class BaseVideoPlayer(QMainWindow):
         plot_widget.step_labels = []
         plot_widget.emiciclo_labels = []
 
-        foot = plot_widget.foot
-        if foot == 'right':
-            step_markers = sorted(self.step_markers_right)
-            emiciclo_markers = sorted(self.emiciclo_markers_right)
-        else:
-            step_markers = sorted(self.step_markers_left)
-            emiciclo_markers = sorted(self.emiciclo_markers_left)
+        step_markers = sorted(self.step_markers.get(plot_widget.role, []))
+        emiciclo_markers = sorted(self.emiciclo_markers.get(plot_widget.role, []))
 
         # Linee verticali per i singoli marker
         for timestamp in step_markers:
@@ -1319,7 +2022,7 @@ class BaseVideoPlayer(QMainWindow):
                 for i in range(len(step_markers) - 1):
                     start_time = step_markers[i]
                     end_time = step_markers[i + 1]
-                    color = (255, 0, 0, 50) if foot == 'right' else (0, 0, 255, 50)
+                    color = plot_widget.device.region_color
                     region = pg.LinearRegionItem(values=(start_time, end_time), brush=pg.mkBrush(color=color))
                     plot_widget.addItem(region)
                     plot_widget.step_regions.append(region)
@@ -1333,11 +2036,11 @@ class BaseVideoPlayer(QMainWindow):
 
                 # Ultimo passo fino alla fine
                 last_marker = step_markers[-1]
-                data_max_time = plot_widget.data['VideoTime'].max()
+                data_max_time = plot_widget.store.t_max
                 if last_marker < data_max_time:
                     start_time = last_marker
                     end_time = data_max_time
-                    color = (255, 0, 0, 50) if foot == 'right' else (0, 0, 255, 50)
+                    color = plot_widget.device.region_color
                     region = pg.LinearRegionItem(values=(start_time, end_time), brush=pg.mkBrush(color=color))
                     plot_widget.addItem(region)
                     plot_widget.step_regions.append(region)
@@ -1349,6 +2052,119 @@ class BaseVideoPlayer(QMainWindow):
                     plot_widget.addItem(label)
                     plot_widget.step_labels.append(label)
 
+        # Curve, marker e regioni non cambiano durante la riproduzione: in cache come pixmap.
+        # Seguendo il cursore la vista cambia a ogni frame e la cache non servirebbe
+        if not self.follow_playhead:
+            cache_static_items(plot_widget, exclude=(plot_widget.playhead,))
+
+    def notify_markers_changed(self):
+        # Aggiorna le viste di analisi che dipendono dai marker
+        self.update_marker_prefetch()
+        if self.gait_feature_dialog is not None and self.gait_feature_dialog.isVisible():
+            self.gait_feature_dialog.update_devices()
+        if self.step_ensemble_view is not None and self.step_ensemble_view.isVisible():
+            self.step_ensemble_view.update_devices()
+
+    # -----------------------------
+    # ANALISI DEI PASSI
+    # -----------------------------
+    def gait_features(self, role):
+        """
+        Tabelle (passi, mezzi passi) di un dispositivo. Il risultato resta in cache
+        finché non cambiano i dati o i marker di quel dispositivo.
+        """
+        device = self.session.device(role)
+        step_markers = tuple(sorted(self.step_markers.get(role, [])))
+        emiciclo_markers = tuple(sorted(self.emiciclo_markers.get(role, [])))
+        key = (id(device.store), step_markers, emiciclo_markers)
+        cached = self.gait_feature_cache.get(role)
+        if cached is None or cached[0] != key:
+            cached = (key, gait_feature_tables(device.store, step_markers, emiciclo_markers))
+            self.gait_feature_cache[role] = cached
+        return cached[1]
+
+    def gait_symmetry(self):
+        """
+        Tabella di simmetria tra piede destro e sinistro, ricalcolata solo quando
+        cambiano i marker dei due piedi. None se manca uno dei due piedi.
+        """
+        if self.session is None or self.session.device('right') is None or self.session.device('left') is None:
+            return None
+        key = tuple(tuple(sorted(markers.get(role, [])))
+                    for markers in (self.step_markers, self.emiciclo_markers) for role in ('right', 'left'))
+        if self.gait_symmetry_cache is None or self.gait_symmetry_cache[0] != key:
+            self.gait_symmetry_cache = (key, gait_symmetry_table(*key))
+        return self.gait_symmetry_cache[1]
+
+    def show_gait_features(self):
+        if self.session is None:
+            QMessageBox.warning(self, "Nessun Dato", "Apri una cartella prima di calcolare le caratteristiche.")
+            return
+        if self.gait_feature_dialog is None:
+            self.gait_feature_dialog = GaitFeatureDialog(self)
+        self.gait_feature_dialog.update_devices()
+        self.gait_feature_dialog.show()
+        self.gait_feature_dialog.raise_()
+
+    def show_step_ensemble(self):
+        if self.session is None:
+            QMessageBox.warning(self, "Nessun Dato", "Apri una cartella prima di sovrapporre i passi.")
+            return
+        if self.step_ensemble_view is None:
+            self.step_ensemble_view = StepEnsembleView(self)
+        self.step_ensemble_view.update_devices()
+        self.step_ensemble_view.show()
+        self.step_ensemble_view.raise_()
+
+    # -----------------------------
+    # RICERCA EVENTI
+    # -----------------------------
+    def show_event_search(self):
+        if self.session is None:
+            QMessageBox.warning(self, "Nessun Dato", "Apri una cartella prima di cercare eventi.")
+            return
+        if self.event_search_dialog is None:
+            self.event_search_dialog = EventSearchDialog(self)
+        self.event_search_dialog.update_devices()
+        self.event_search_dialog.show()
+        self.event_search_dialog.raise_()
+
+    def set_event_intervals(self, role, starts, ends):
+        self.event_intervals = (role, np.asarray(starts, dtype=np.float64), np.asarray(ends, dtype=np.float64))
+        for plot_widget, _, _, _ in self.plot_widgets:
+            self.update_event_highlight(plot_widget)
+
+    def update_event_highlight(self, plot_widget):
+        # Un solo item per grafico con tutti gli intervalli trovati
+        if getattr(plot_widget, 'event_item', None) is not None:
+            plot_widget.removeItem(plot_widget.event_item)
+            plot_widget.event_item = None
+        # Gli intervalli valgono solo per il dispositivo su cui sono stati cercati
+        if (self.event_intervals is not None and len(self.event_intervals[1])
+                and plot_widget.role == self.event_intervals[0]):
+            plot_widget.event_item = IntervalsItem(self.event_intervals[1], self.event_intervals[2])
+            plot_widget.addItem(plot_widget.event_item)
+        if not self.follow_playhead:
+            cache_static_items(plot_widget, exclude=(plot_widget.playhead,))
+
+    def jump_to_event(self, direction):
+        if self.event_intervals is None or not len(self.event_intervals[1]) or not hasattr(self, 'cap'):
+            return
+        current_time = self.video_timestamps[self.current_frame] - self.sync_offset
+        # Il frame mostrato può seguire l'inizio dell'evento fino a un periodo di frame
+        index = adjacent_event(self.event_intervals[1], current_time, direction, tolerance=1.0 / self.video_fps)
+        if index is not None:
+            self.jump_to_event_index(index)
+
+    def jump_to_event_index(self, index):
+        # Porta il video all'inizio dell'evento (tempo dei dati + offset di sincronizzazione)
+        if self.event_intervals is None or not hasattr(self, 'cap'):
+            return
+        frame_index = self.frame_at_data_time(self.event_intervals[1][index])
+        self.step_frame(frame_index - self.current_frame)
+        # I frame vicini vengono preparati in background per scorrere senza attese
+        self.prefetch_frames('jump', PRIORITY_JUMP, frame_index)
+
     def toggle_step_visualization(self):
         self.show_steps = not self.show_steps
         for plot_widget, _, _, _ in self.plot_widgets:
@@ -1386,29 +2202,11 @@ class BaseVideoPlayer(QMainWindow):
             # mentre il video sta girando.
             return
 
-        if self.mouse_move_debounce:
-            self.mouse_move_skip_counter += 1
-            if self.mouse_move_skip_counter < self.MOUSE_MOVE_SKIP_EVERY:
-                return
-            self.mouse_move_skip_counter = 0
-
         vb = widget.plotItem.vb
         mouse_point = vb.mapSceneToView(pos)
-        # Calcola l'indice del frame corrispondente
-        synced_time = mouse_point.x() + self.sync_offset
-        synced_time_clipped = max(0, min(self.video_timestamps[-1], synced_time))
-        closest_frame = np.searchsorted(self.video_timestamps, synced_time_clipped)
-        closest_frame = max(0, min(closest_frame, self.total_frames - 1))
-
-        self.current_frame = closest_frame
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.current_frame)
-        ret, frame = self.cap.read()
-        if ret:
-            self.update_frame_display(frame)
-            # Anche qui, se vogliamo ottimizzare ulteriormente, possiamo
-            # fare l'aggiornamento grafici a bassa frequenza
-            self.update_graphs_real()
-            self.trackbar.setValue(self.current_frame)
+        # Frame corrispondente alla posizione del mouse: il coordinatore
+        # mostra subito un'anteprima e decodifica il frame esatto quando ci si ferma
+        self.seek_to_frame(self.frame_at_data_time(mouse_point.x()))
 
     @pyqtSlot(object)
     def on_mouse_hover(self, pos, widget):
@@ -1417,6 +2215,8 @@ class BaseVideoPlayer(QMainWindow):
         timestamp = mouse_point.x()
         self.mouse_timestamp_label.setText(f"Timestamp: {timestamp:.2f} s")
         self.mouse_timestamp_label.show()
+        if hasattr(self, 'cap'):
+            self.prefetch_frames('hover', PRIORITY_HOVER, self.frame_at_data_time(timestamp), before=5, after=5)
 
     def toggle_interactivity(self, event, widget, idx):
         if self.sync_state == "data":
@@ -1431,193 +2231,292 @@ class BaseVideoPlayer(QMainWindow):
             else:
                 self.stop_interactivity(widget, idx)
 
-    def generate_csv_for_steps(self):
-        if not self.step_markers_right and not self.step_markers_left:
+    def generate_csv_for_steps(self, with_clips=False):
+        if self.session is None or not any(self.step_markers.get(role) for role in self.session.roles):
             QMessageBox.warning(self, "Nessun Marker", "Non ci sono marker per generare i CSV dei passi.")
             return
 
+        if self.export_progress is not None:
+            QMessageBox.information(self, "Export in Corso", "Attendi la fine dell'export in corso.")
+            return
+        self.prepare_export_channels(lambda derived: self.write_step_files(derived, with_clips))
+
+    def write_step_files(self, derived, with_clips):
         steps_folder = os.path.join(self.folder_path, 'Passi')
         os.makedirs(steps_folder, exist_ok=True)
 
-        right_folder = os.path.join(steps_folder, 'Piede_Destro')
-        left_folder = os.path.join(steps_folder, 'Piede_Sinistro')
-        os.makedirs(right_folder, exist_ok=True)
-        os.makedirs(left_folder, exist_ok=True)
-
-        right_steps_folder = os.path.join(right_folder, 'Passi_Interi')
-        right_half_steps_folder = os.path.join(right_folder, 'Mezzi_Passi')
-        os.makedirs(right_steps_folder, exist_ok=True)
-        os.makedirs(right_half_steps_folder, exist_ok=True)
-
-        left_steps_folder = os.path.join(left_folder, 'Passi_Interi')
-        left_half_steps_folder = os.path.join(left_folder, 'Mezzi_Passi')
-        os.makedirs(left_steps_folder, exist_ok=True)
-        os.makedirs(left_half_steps_folder, exist_ok=True)
-
-        # Generazione CSV per piede destro
-        if self.step_markers_right:
-            markers_right_sorted = sorted(self.step_markers_right)
-            emicicli_right_sorted = sorted(self.emiciclo_markers_right)
-            if markers_right_sorted and markers_right_sorted[0] > 0:
-                markers_right_sorted.insert(0, 0)
-            step_count = len(markers_right_sorted)
-            for i in range(step_count - 1):
-                step_start = markers_right_sorted[i]
-                step_end = markers_right_sorted[i + 1]
-                data_segment = self.data_right[
-                    (self.data_right['VideoTime'] >= step_start) &
-                    (self.data_right['VideoTime'] <= step_end)]
-                if not data_segment.empty:
-                    filename = os.path.join(right_steps_folder, f'Passo_{i+1}.csv')
-                    data_segment.to_csv(filename, index=False)
-
-                emicicli_in_step = [e for e in emicicli_right_sorted if step_start < e < step_end]
-                if emicicli_in_step:
-                    data_half_step = self.data_right[
-                        (self.data_right['VideoTime'] >= step_start) &
-                        (self.data_right['VideoTime'] <= emicicli_in_step[0])]
-                    if not data_half_step.empty:
-                        filename = os.path.join(right_half_steps_folder, f'Passo{i+1}.1.csv')
-                        data_half_step.to_csv(filename, index=False)
-
-                    data_half_step = self.data_right[
-                        (self.data_right['VideoTime'] >= emicicli_in_step[0]) &
-                        (self.data_right['VideoTime'] <= step_end)]
-                    if not data_half_step.empty:
-                        filename = os.path.join(right_half_steps_folder, f'Passo{i+1}.2.csv')
-                        data_half_step.to_csv(filename, index=False)
-                else:
-                    midpoint = (step_start + step_end) / 2
-                    data_half_step = self.data_right[
-                        (self.data_right['VideoTime'] >= step_start) &
-                        (self.data_right['VideoTime'] <= midpoint)]
-                    if not data_half_step.empty:
-                        filename = os.path.join(right_half_steps_folder, f'Passo{i+1}.1.csv')
-                        data_half_step.to_csv(filename, index=False)
-                    data_half_step = self.data_right[
-                        (self.data_right['VideoTime'] >= midpoint) &
-                        (self.data_right['VideoTime'] <= step_end)]
-                    if not data_half_step.empty:
-                        filename = os.path.join(right_half_steps_folder, f'Passo{i+1}.2.csv')
-                        data_half_step.to_csv(filename, index=False)
-
-            if step_count > 0:
-                last_marker = markers_right_sorted[-1]
-                data_segment = self.data_right[self.data_right['VideoTime'] >= last_marker]
-                if not data_segment.empty:
-                    filename = os.path.join(right_steps_folder, f'Passo_{step_count}.csv')
-                    data_segment.to_csv(filename, index=False)
-                    emicicli_in_step = [e for e in emicicli_right_sorted if e > last_marker]
-                    if emicicli_in_step:
-                        data_half_step = self.data_right[
-                            (self.data_right['VideoTime'] >= last_marker) &
-                            (self.data_right['VideoTime'] <= emicicli_in_step[0])]
-                        if not data_half_step.empty:
-                            filename = os.path.join(right_half_steps_folder, f'Passo{step_count}.1.csv')
-                            data_half_step.to_csv(filename, index=False)
-
-                        data_half_step = self.data_right[self.data_right['VideoTime'] >= emicicli_in_step[0]]
-                        if not data_half_step.empty:
-                            filename = os.path.join(right_half_steps_folder, f'Passo{step_count}.2.csv')
-                            data_half_step.to_csv(filename, index=False)
-                    else:
-                        midpoint = last_marker + (data_segment['VideoTime'].max() - last_marker) / 2
-                        data_half_step = self.data_right[
-                            (self.data_right['VideoTime'] >= last_marker) &
-                            (self.data_right['VideoTime'] <= midpoint)]
-                        if not data_half_step.empty:
-                            filename = os.path.join(right_half_steps_folder, f'Passo{step_count}.1.csv')
-                            data_half_step.to_csv(filename, index=False)
-                        data_half_step = self.data_right[self.data_right['VideoTime'] >= midpoint]
-                        if not data_half_step.empty:
-                            filename = os.path.join(right_half_steps_folder, f'Passo{step_count}.2.csv')
-                            data_half_step.to_csv(filename, index=False)
-        else:
-            QMessageBox.information(self, "Nessun Marker Piede Destro", "Non ci sono marker per il piede destro.")
-
-        # Generazione CSV per piede sinistro
-        if self.step_markers_left:
-            markers_left_sorted = sorted(self.step_markers_left)
-            emicicli_left_sorted = sorted(self.emiciclo_markers_left)
-            if markers_left_sorted and markers_left_sorted[0] > 0:
-                markers_left_sorted.insert(0, 0)
-            step_count = len(markers_left_sorted)
-            for i in range(step_count - 1):
-                step_start = markers_left_sorted[i]
-                step_end = markers_left_sorted[i + 1]
-                data_segment = self.data_left[
-                    (self.data_left['VideoTime'] >= step_start) &
-                    (self.data_left['VideoTime'] <= step_end)]
-                if not data_segment.empty:
-                    filename = os.path.join(left_steps_folder, f'Passo_{i+1}.csv')
-                    data_segment.to_csv(filename, index=False)
-
-                emicicli_in_step = [e for e in emicicli_left_sorted if step_start < e < step_end]
-                if emicicli_in_step:
-                    data_half_step = self.data_left[
-                        (self.data_left['VideoTime'] >= step_start) &
-                        (self.data_left['VideoTime'] <= emicicli_in_step[0])]
-                    if not data_half_step.empty:
-                        filename = os.path.join(left_half_steps_folder, f'Passo{i+1}.1.csv')
-                        data_half_step.to_csv(filename, index=False)
-
-                    data_half_step = self.data_left[
-                        (self.data_left['VideoTime'] >= emicicli_in_step[0]) &
-                        (self.data_left['VideoTime'] <= step_end)]
-                    if not data_half_step.empty:
-                        filename = os.path.join(left_half_steps_folder, f'Passo{i+1}.2.csv')
-                        data_half_step.to_csv(filename, index=False)
-                else:
-                    midpoint = (step_start + step_end) / 2
-                    data_half_step = self.data_left[
-                        (self.data_left['VideoTime'] >= step_start) &
-                        (self.data_left['VideoTime'] <= midpoint)]
-                    if not data_half_step.empty:
-                        filename = os.path.join(left_half_steps_folder, f'Passo{i+1}.1.csv')
-                        data_half_step.to_csv(filename, index=False)
-                    data_half_step = self.data_left[
-                        (self.data_left['VideoTime'] >= midpoint) &
-                        (self.data_left['VideoTime'] <= step_end)]
-                    if not data_half_step.empty:
-                        filename = os.path.join(left_half_steps_folder, f'Passo{i+1}.2.csv')
-                        data_half_step.to_csv(filename, index=False)
-
-            if step_count > 0:
-                last_marker = markers_left_sorted[-1]
-                data_segment = self.data_left[self.data_left['VideoTime'] >= last_marker]
-                if not data_segment.empty:
-                    filename = os.path.join(left_steps_folder, f'Passo_{step_count}.csv')
-                    data_segment.to_csv(filename, index=False)
-                    emicicli_in_step = [e for e in emicicli_left_sorted if e > last_marker]
-                    if emicicli_in_step:
-                        data_half_step = self.data_left[
-                            (self.data_left['VideoTime'] >= last_marker) &
-                            (self.data_left['VideoTime'] <= emicicli_in_step[0])]
-                        if not data_half_step.empty:
-                            filename = os.path.join(left_half_steps_folder, f'Passo{step_count}.1.csv')
-                            data_half_step.to_csv(filename, index=False)
-
-                        data_half_step = self.data_left[self.data_left['VideoTime'] >= emicicli_in_step[0]]
-                        if not data_half_step.empty:
-                            filename = os.path.join(left_half_steps_folder, f'Passo{step_count}.2.csv')
-                            data_half_step.to_csv(filename, index=False)
-                    else:
-                        midpoint = last_marker + (data_segment['VideoTime'].max() - last_marker) / 2
-                        data_half_step = self.data_left[
-                            (self.data_left['VideoTime'] >= last_marker) &
-                            (self.data_left['VideoTime'] <= midpoint)]
-                        if not data_half_step.empty:
-                            filename = os.path.join(left_half_steps_folder, f'Passo{step_count}.1.csv')
-                            data_half_step.to_csv(filename, index=False)
-                        data_half_step = self.data_left[self.data_left['VideoTime'] >= midpoint]
-                        if not data_half_step.empty:
-                            filename = os.path.join(left_half_steps_folder, f'Passo{step_count}.2.csv')
-                            data_half_step.to_csv(filename, index=False)
-        else:
-            QMessageBox.information(self, "Nessun Marker Piede Sinistro", "Non ci sono marker per il piede sinistro.")
+        devices_without_markers = []
+        clips = []
+        for device in self.session:
+            step_markers = self.step_markers.get(device.role, [])
+            if not step_markers:
+                devices_without_markers.append(device.label)
+                continue
+
+            device_folder = os.path.join(steps_folder, device.export_folder)
+            steps_subfolder = os.path.join(device_folder, 'Passi_Interi')
+            half_steps_subfolder = os.path.join(device_folder, 'Mezzi_Passi')
+            os.makedirs(steps_subfolder, exist_ok=True)
+            os.makedirs(half_steps_subfolder, exist_ok=True)
+
+            store = device.store
+            raw = self.device_export_frame(device)
+            names = derived[device.role]
+            segments = step_segments(step_markers, self.emiciclo_markers.get(device.role, []), store.t_max)
+            for number, step_start, step_end, split in segments:
+                self.export_segment(store, raw, names, step_start, step_end,
+                                    os.path.join(steps_subfolder, f'Passo_{number}.csv'))
+                self.export_segment(store, raw, names, step_start, split,
+                                    os.path.join(half_steps_subfolder, f'Passo{number}.1.csv'))
+                self.export_segment(store, raw, names, split, step_end,
+                                    os.path.join(half_steps_subfolder, f'Passo{number}.2.csv'))
+
+            if with_clips:
+                clips.extend(self.step_clip_ranges(device_folder, segments))
+
+            steps, half_steps = self.gait_features(device.role)
+            steps.to_csv(os.path.join(device_folder, 'Caratteristiche_Passi.csv'), index=False)
+            half_steps.to_csv(os.path.join(device_folder, 'Caratteristiche_Mezzi_Passi.csv'), index=False)
+
+        symmetry = self.gait_symmetry()
+        if symmetry is not None and len(symmetry):
+            symmetry.to_csv(os.path.join(steps_folder, 'Simmetria_Passi.csv'), index=False)
+
+        if devices_without_markers:
+            QMessageBox.information(self, "Dispositivi Senza Marker",
+                                    "Non ci sono marker per: " + ", ".join(devices_without_markers))
+
+        if clips:
+            # Le clip si tagliano in background: i CSV sono già pronti
+            task = BackgroundTask(extract_clips, self.video_path, clips, self.video_fps, with_progress=True)
+            self.start_export_task("Genera Clip Video per Passi", "Taglio delle clip dei passi...", task,
+                                   self.on_step_clips_ready)
+            return
 
         QMessageBox.information(self, "Operazione Completa", "I file CSV dei passi e dei mezzi passi sono stati generati con successo.")
 
+    def step_clip_ranges(self, device_folder, segments):
+        """
+        Clip di ogni passo e mezzo passo, con gli stessi nomi dei CSV: i tempi
+        dei marker passano per l'offset di sincronizzazione e diventano
+        intervalli di frame [primo, ultimo escluso).
+        """
+        steps_folder = os.path.join(device_folder, 'Clip_Passi')
+        half_steps_folder = os.path.join(device_folder, 'Clip_Mezzi_Passi')
+        os.makedirs(steps_folder, exist_ok=True)
+        os.makedirs(half_steps_folder, exist_ok=True)
+
+        def frame_range(t_start, t_end):
+            start = self.frame_at_data_time(t_start)
+            return start, max(self.frame_at_data_time(t_end), start + 1)
+
+        clips = []
+        for number, step_start, step_end, split in segments:
+            clips.append((os.path.join(steps_folder, f'Passo_{number}.mp4'), *frame_range(step_start, step_end)))
+            clips.append((os.path.join(half_steps_folder, f'Passo{number}.1.mp4'), *frame_range(step_start, split)))
+            clips.append((os.path.join(half_steps_folder, f'Passo{number}.2.mp4'), *frame_range(split, step_end)))
+        return clips
+
+    def on_step_clips_ready(self, result):
+        count, errors = result
+        if errors:
+            QMessageBox.warning(self, "Clip Non Generate", "Errori durante la scrittura:\n" + "\n".join(errors[:10]))
+        QMessageBox.information(self, "Operazione Completa",
+                                f"I file CSV dei passi e {count} clip video sono stati generati con successo.")
+
+    def export_frame_aligned_dataset(self):
+        if self.session is None or not hasattr(self, 'video_timestamps'):
+            QMessageBox.warning(self, "Nessun Dato", "Apri una cartella prima di esportare il dataset.")
+            return
+        if self.export_progress is not None:
+            QMessageBox.information(self, "Export in Corso", "Attendi la fine dell'export in corso.")
+            return
+        file_path = self.choose_dataset_path("Esporta Dataset Allineato ai Frame", 'Dataset_Frame.npz')
+        if file_path:
+            self.prepare_export_channels(lambda derived: self.write_frame_dataset(file_path, derived))
+
+    def write_frame_dataset(self, file_path, derived):
+        # Una riga per frame: tutti i canali ricampionati sul tempo del frame sincronizzato
+        data_times = self.video_timestamps - self.sync_offset
+        columns = {
+            'frame': np.arange(len(self.video_timestamps), dtype=np.int32),
+            'video_time': self.video_timestamps,
+            'data_time': data_times,
+        }
+        columns.update(self.resampler.aligned_columns(self.session, data_times, self.video_grid_key(),
+                                                      self.sync_state_key(), derived))
+        self.write_dataset(file_path, columns, f"{len(data_times)} frame")
+
+    def export_uniform_dataset(self):
+        if self.session is None:
+            QMessageBox.warning(self, "Nessun Dato", "Apri una cartella prima di esportare il dataset.")
+            return
+        if self.export_progress is not None:
+            QMessageBox.information(self, "Export in Corso", "Attendi la fine dell'export in corso.")
+            return
+        rate, ok = QInputDialog.getDouble(self, "Esporta Dataset a Frequenza Fissa", "Frequenza (Hz):",
+                                          100.0, 1.0, 10000.0, 1)
+        if not ok:
+            return
+        file_path = self.choose_dataset_path("Esporta Dataset a Frequenza Fissa", f'Dataset_{rate:g}Hz.npz')
+        if file_path:
+            self.prepare_export_channels(lambda derived: self.write_uniform_dataset(file_path, rate, derived))
+
+    def write_uniform_dataset(self, file_path, rate, derived):
+        # Una riga per punto della griglia uniforme, sull'intervallo coperto dai dispositivi
+        t_start = min(device.store.t_min for device in self.session)
+        t_end = max(device.store.t_max for device in self.session)
+        data_times = SensorResampler.uniform_grid(t_start, t_end, rate)
+        columns = {
+            'data_time': data_times,
+            'video_time': data_times + self.sync_offset,
+        }
+        columns.update(self.resampler.aligned_columns(self.session, data_times, ('uniform', t_start, t_end, rate),
+                                                      self.sync_state_key(), derived))
+        self.write_dataset(file_path, columns, f"{len(data_times)} campioni a {rate:g} Hz")
+
+    def choose_dataset_path(self, title, default_name):
+        default_path = os.path.join(self.folder_path, default_name)
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, title, default_path, "NumPy (*.npz);;Parquet (*.parquet)")
+        if file_path and not file_path.lower().endswith(('.npz', '.parquet')):
+            file_path += '.parquet' if 'parquet' in selected_filter else '.npz'
+        return file_path
+
+    def write_dataset(self, file_path, columns, summary):
+        try:
+            write_columnar(file_path, columns)
+        except ImportError:
+            QMessageBox.critical(self, "Errore", "Per il formato Parquet è necessario installare pyarrow.")
+            return
+        except Exception as e:
+            QMessageBox.critical(self, "Errore", f"Impossibile esportare il dataset: {e}")
+            return
+
+        QMessageBox.information(self, "Operazione Completa",
+                                f"Dataset esportato: {summary} in {os.path.basename(file_path)}.")
+
+    def export_annotated_video(self):
+        if self.session is None or not hasattr(self, 'video_timestamps'):
+            QMessageBox.warning(self, "Nessun Dato", "Apri una cartella prima di esportare il video.")
+            return
+        if self.export_progress is not None:
+            QMessageBox.information(self, "Export in Corso", "Attendi la fine dell'export in corso.")
+            return
+        if find_ffmpeg() is None:
+            QMessageBox.warning(self, "ffmpeg Mancante",
+                                "L'export del video richiede ffmpeg: installalo e aggiungilo al PATH.")
+            return
+
+        # Un pannello per ogni grafico visibile, con le stesse curve e gli stessi colori
+        lanes = []
+        for plot_widget, _, _, store in self.plot_widgets:
+            columns = [column for column in plot_widget.all_columns if column in plot_widget.selected_columns]
+            if not columns:
+                continue
+            colors = dict(zip(plot_widget.all_columns, plot_widget.colors))
+            region_color = None
+            if self.show_steps:
+                r, g, b, alpha = plot_widget.device.region_color
+                region_color = (b, g, r, alpha)
+            lanes.append(RenderLane(f"{plot_widget.device.short_label}: {', '.join(columns)}", store.time,
+                                    [(store.column(column), hex_to_bgr(colors[column])) for column in columns],
+                                    self.step_markers.get(plot_widget.role, []),
+                                    self.emiciclo_markers.get(plot_widget.role, []), region_color))
+        if not lanes:
+            QMessageBox.warning(self, "Nessun Grafico", "Seleziona almeno un grafico da includere nel video.")
+            return
+
+        default_path = os.path.join(self.folder_path, f'{self.ANNOTATED_VIDEO_NAME}.mp4')
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Esporta Video Annotato", default_path, "Video MP4 (*.mp4);;Video AVI (*.avi)")
+        if not file_path:
+            return
+        if not file_path.lower().endswith(('.mp4', '.avi')):
+            file_path += '.avi' if 'AVI' in selected_filter else '.mp4'
+        if os.path.normcase(os.path.dirname(os.path.abspath(file_path))) == os.path.normcase(
+                os.path.abspath(self.folder_path)):
+            # Salvato nella cartella della sessione: alla prossima apertura non è una telecamera
+            exported = self.config.setdefault('exported_videos', [])
+            if os.path.basename(file_path) not in exported:
+                exported.append(os.path.basename(file_path))
+                self.save_config()
+
+        spec = RenderSpec(self.video_path, self.video_timestamps - self.sync_offset, self.video_fps, lanes)
+        task = BackgroundTask(render_annotated_video, spec, file_path, with_progress=True)
+        self.start_export_task("Esporta Video Annotato", "Esportazione del video annotato...", task,
+                               lambda frames, path=file_path: QMessageBox.information(
+                                   self, "Operazione Completa",
+                                   f"Video esportato: {frames} frame in {os.path.basename(path)}."))
+
+    def start_export_task(self, title, label, task, on_ready):
+        # Export lunghi (video, clip): un lavoro alla volta con la sua barra di avanzamento
+        self.export_progress = QProgressDialog(label, None, 0, 100, self)
+        self.export_progress.setWindowTitle(title)
+        self.export_progress.setMinimumDuration(0)
+        self.export_progress.setValue(0)
+        task.signals.progress.connect(self.export_progress.setValue)
+        task.signals.finished.connect(lambda result: (self.close_export_progress(), on_ready(result)))
+        task.signals.failed.connect(self.on_export_failed)
+        self.start_background_task(task)
+
+    def close_export_progress(self):
+        if self.export_progress is not None:
+            self.export_progress.close()
+            self.export_progress = None
+
+    def on_export_failed(self, error):
+        self.close_export_progress()
+        QMessageBox.critical(self, "Errore", f"Impossibile completare l'export: {error}")
+
+    def device_export_frame(self, device):
+        # Colonne complete del file per i CSV dei passi; se il file non corrisponde
+        # più allo store caricato si esportano solo i canali dello store
+        try:
+            raw = read_export_frame(device.csv_filePath)
+        except Exception:
+            return None
+        return raw if len(raw) == len(device.store) else None
+
+    def export_segment(self, store, raw, derived, t_start, t_end, filename):
+        i0, i1 = store.index_range(t_start, t_end)
+        if i1 > i0:
+            store.to_dataframe(i0, i1, raw, derived).to_csv(filename, index=False)
+
+    def prepare_export_channels(self, on_ready):
+        """
+        Canali derivati da esportare: quelli dei gruppi selezionati per ogni
+        dispositivo. Quelli non ancora calcolati si calcolano in background,
+        poi on_ready(ruolo -> canali) scrive i file.
+        """
+        derived = {device.role: [] for device in self.session}
+        for checkbox in self.device_checkboxes:
+            if checkbox.isChecked():
+                names = derived[checkbox.device.role]
+                names += [column for column in checkbox.columns
+                          if column not in checkbox.device.store.column_index and column not in names]
+        jobs = []
+        for device in self.session:
+            missing = self.derived_pipeline.missing(device.store, derived[device.role])
+            if missing:
+                jobs.append((device.store, missing))
+        if not jobs:
+            on_ready(derived)
+            return
+
+        session = self.session
+        task = BackgroundTask(self.derived_pipeline.compute_all,
+                              [(store.snapshot(), names) for store, names in jobs], with_progress=True)
+        self.start_export_task("Canali Derivati", "Calcolo dei canali derivati da esportare...", task,
+                               lambda results: self.on_export_channels_ready(session, jobs, results, derived, on_ready))
+
+    def on_export_channels_ready(self, session, jobs, results, derived, on_ready):
+        for (store, _), result in zip(jobs, results):
+            self.derived_pipeline.attach(store, result)
+        # Se nel frattempo è stata aperta un'altra cartella l'esportazione non vale più
+        if session is self.session:
+            on_ready(derived)
+
     def eventFilter(self, source, event):
         if event.type() == event.Wheel and source is self.graphics_view.viewport():
             self.handle_zoom(event)
@@ -1635,20 +2534,16 @@ class BaseVideoPlayer(QMainWindow):
         self.graphics_view.translate(delta.x(), delta.y())
 
     def switch_csv_files(self):
-        # Scambia i dati del piede sinistro e destro
-        self.data_left, self.data_right = self.data_right, self.data_left
-        # Scambia i percorsi dei file CSV
-        if hasattr(self, 'csv_filePaths') and len(self.csv_filePaths) == 2:
-            self.csv_filePaths[0], self.csv_filePaths[1] = self.csv_filePaths[1], self.csv_filePaths[0]
-            # Aggiorna i nomi dei file nella configurazione
-            self.config['right_csv'] = os.path.basename(self.csv_filePaths[0])
-            self.config['left_csv'] = os.path.basename(self.csv_filePaths[1])
-        # Scambia i marker dei passi
-        self.step_markers_left, self.step_markers_right = self.step_markers_right, self.step_markers_left
-        # Scambia i marker degli emicicli
-        self.emiciclo_markers_left, self.emiciclo_markers_right = self.emiciclo_markers_right, self.emiciclo_markers_left
-        # Aggiorna i grafici
+        # Scambia i ruoli dei dispositivi del piede destro e sinistro
+        if self.session is None or not self.session.swap_roles('right', 'left'):
+            return
+        # Scambia i marker dei passi e degli emicicli, che seguono i dati
+        for markers in (self.step_markers, self.emiciclo_markers):
+            markers['left'], markers['right'] = markers.get('right', []), markers.get('left', [])
+        self.notify_markers_changed()
+        # Ricrea le checkbox (le etichette Dx/Sx restano) e aggiorna i grafici
+        self.build_device_controls()
         self.update_plot_widgets()
+        self.update_graphs_real()
         # Salva la configurazione aggiornata
         self.save_config()
-
@@ -0,0 +1,102 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox,
+                             QTableWidget, QTableWidgetItem, QPushButton, QHeaderView, QMessageBox)
+
+# Nomi leggibili dei namespace della cache
+NAMESPACE_LABELS = {
+    'filmstrip': "Miniature del video",
+    'timestamps': "Tempi dei frame",
+    'sensors': "Dati dei sensori",
+    'derived': "Canali derivati",
+}
+
+
+class CacheDialog(QDialog):
+    """
+    Occupazione della cache su disco per tipo di dato, limite di spazio e
+    pulsante per svuotarla; sotto, l'andamento della cache dei frame in memoria.
+    """
+
+    def __init__(self, player):
+        super().__init__(player)
+        self.player = player
+        self.cache = player.cache_manager
+        self.setWindowTitle("Cache")
+        self.resize(460, 380)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"Cartella: {self.cache.root}", self))
+
+        self.table = QTableWidget(0, 3, self)
+        self.table.setHorizontalHeaderLabels(["Contenuto", "File", "Dimensione (MB)"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.total_label = QLabel("", self)
+        layout.addWidget(self.total_label)
+
+        budget_layout = QHBoxLayout()
+        budget_layout.addWidget(QLabel("Spazio massimo (MB):", self))
+        self.budget_spin = QSpinBox(self)
+        self.budget_spin.setRange(64, 1024 * 1024)
+        self.budget_spin.setSingleStep(256)
+        self.budget_spin.setValue(int(self.cache.max_bytes // (1024 * 1024)))
+        self.budget_spin.editingFinished.connect(self.apply_budget)
+        budget_layout.addWidget(self.budget_spin)
+        budget_layout.addStretch()
+        layout.addLayout(budget_layout)
+
+        layout.addWidget(QLabel("<b>Frame in memoria</b>", self))
+        self.frame_cache_label = QLabel("", self)
+        layout.addWidget(self.frame_cache_label)
+
+        buttons_layout = QHBoxLayout()
+        clear_button = QPushButton("Svuota Cache", self)
+        clear_button.clicked.connect(self.clear_cache)
+        buttons_layout.addWidget(clear_button)
+        buttons_layout.addStretch()
+        close_button = QPushButton("Chiudi", self)
+        close_button.clicked.connect(self.accept)
+        buttons_layout.addWidget(close_button)
+        layout.addLayout(buttons_layout)
+
+        self.refresh()
+
+    def refresh(self):
+        stats = self.cache.stats()
+        self.table.setRowCount(len(stats))
+        for row, (namespace, (count, size)) in enumerate(sorted(stats.items())):
+            self.table.setItem(row, 0, QTableWidgetItem(NAMESPACE_LABELS.get(namespace, namespace)))
+            for column, value in ((1, str(count)), (2, f"{size / (1024 * 1024):.1f}")):
+                item = QTableWidgetItem(value)
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        total = sum(size for _, size in stats.values())
+        self.total_label.setText(f"Totale: {total / (1024 * 1024):.1f} MB su "
+                                 f"{self.cache.max_bytes / (1024 * 1024):.0f} MB")
+
+        frame_stats = self.player.frame_cache.stats()
+        raw, compressed = frame_stats['raw'], frame_stats['compressed']
+        self.frame_cache_label.setText(
+            f"Non compressi: {raw['frames']} frame, {raw['bytes'] / (1024 * 1024):.0f} MB, "
+            f"successi {100 * raw['hit_rate']:.0f}%\n"
+            f"JPEG: {compressed['frames']} frame, {compressed['bytes'] / (1024 * 1024):.0f} MB, "
+            f"successi {100 * compressed['hit_rate']:.0f}%, decodifica media {compressed['decode_ms']:.1f} ms, "
+            f"{compressed['promotions']} anticipati dal prefetch\n"
+            f"Frame da decodificare dal video: {100 * frame_stats['miss_rate']:.0f}%")
+
+    def apply_budget(self):
+        max_bytes = self.budget_spin.value() * 1024 * 1024
+        if max_bytes != self.cache.max_bytes:
+            self.player.set_cache_budget(max_bytes)
+            self.refresh()
+
+    def clear_cache(self):
+        reply = QMessageBox.question(self, "Svuota Cache",
+                                     "Eliminare tutti i file della cache? Verranno ricreati quando servono.",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.cache.clear()
+            self.refresh()
@@ -0,0 +1,151 @@
+import glob
+import hashlib
+import os
+import threading
+import time
+import numpy as np
+
+# Spazio su disco predefinito per tutta la cache dell'applicazione
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Byte letti dall'inizio e dalla fine di un file per la sua impronta
+FINGERPRINT_BYTES = 1024 * 1024
+# File temporanei più vecchi di così sono resti di scritture interrotte
+STALE_TEMP_SECONDS = 3600
+TEMP_MARKER = '.tmp'
+
+
+def file_fingerprint(path):
+    """
+    Impronta del contenuto di un file: dimensione più hash del primo e
+    dell'ultimo MB. Resta valida se il file viene spostato o rinominato e
+    cambia se viene sostituito, senza leggere tutto il video.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.md5(str(size).encode('utf-8'))
+    with open(path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if size > FINGERPRINT_BYTES:
+            f.seek(max(size - FINGERPRINT_BYTES, FINGERPRINT_BYTES))
+            digest.update(f.read(FINGERPRINT_BYTES))
+    return digest.hexdigest()
+
+
+class CacheManager:
+    """
+    Unico proprietario della cartella della cache su disco. Ogni artefatto
+    (miniature, tabelle dei tempi, ...) sta in un namespace ed è identificato
+    da una chiave di contenuto più la versione del formato. Quando si supera
+    max_bytes si eliminano i file usati meno di recente (data di modifica,
+    aggiornata a ogni lettura).
+    Più istanze del player possono usare la stessa cartella: le scritture
+    passano da un file temporaneo con nome univoco e os.replace, e i file
+    spariti o bloccati da un'altra istanza durante lo scarto vengono ignorati.
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def entry_path(self, namespace, key, version, suffix=''):
+        name = hashlib.md5(f"{key}|{version}".encode('utf-8')).hexdigest()
+        folder = os.path.join(self.root, namespace)
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, name + suffix)
+
+    def lookup(self, path):
+        # Percorso se la voce esiste (e la segna come usata ora), altrimenti None
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store(self, path, write):
+        """
+        Salva una voce: write(percorso_temporaneo) scrive il file, poi lo si
+        rende visibile in modo atomico. Il temporaneo ha lo stesso suffisso,
+        perché np.save/np.savez lo aggiungerebbero.
+        """
+        folder, name = os.path.split(path)
+        stem, suffix = os.path.splitext(name)
+        temp_path = os.path.join(folder, f"{stem}{TEMP_MARKER}{os.getpid()}_{threading.get_ident()}{suffix}")
+        try:
+            write(temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.enforce_budget()
+        return path
+
+    def store_array(self, path, array):
+        return self.store(path, lambda temp_path: np.save(temp_path, array))
+
+    def store_arrays(self, path, **arrays):
+        return self.store(path, lambda temp_path: np.savez_compressed(temp_path, **arrays))
+
+    def entries(self, namespace=None):
+        # (percorso, byte, ultimo uso) di tutte le voci complete
+        pattern = os.path.join(self.root, namespace or '*', '*')
+        result = []
+        for path in glob.glob(pattern):
+            if TEMP_MARKER in os.path.basename(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            result.append((path, stat.st_size, stat.st_mtime))
+        return result
+
+    def enforce_budget(self):
+        with self.lock:
+            self.remove_stale_temp_files()
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Già rimosso o in uso da un'altra istanza
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.enforce_budget()
+
+    def stats(self):
+        # {namespace: (numero di voci, byte)}
+        result = {}
+        for path, size, _ in self.entries():
+            namespace = os.path.basename(os.path.dirname(path))
+            count, total = result.get(namespace, (0, 0))
+            result[namespace] = (count + 1, total + size)
+        return result
+
+    def clear(self, namespace=None):
+        with self.lock:
+            for path, _, _ in self.entries(namespace):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+            self.remove_stale_temp_files(namespace)
+
+    def remove_stale_temp_files(self, namespace=None):
+        # Temporanei abbandonati da scritture interrotte (da chiamare con il lock):
+        # entries() non li conta, quindi senza questa pulizia sfuggirebbero al limite
+        now = time.time()
+        for path in glob.glob(os.path.join(self.root, namespace or '*', f'*{TEMP_MARKER}*')):
+            try:
+                if now - os.path.getmtime(path) > STALE_TEMP_SECONDS:
+                    os.remove(path)
+            except OSError:
+                continue
@@ -0,0 +1,154 @@
+import os
+import threading
+import cv2
+import numpy as np
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QLabel, QMenu, QInputDialog, QSizePolicy
+
+# Frame saltati con grab() (senza conversione) prima di ricorrere a un seek
+MAX_GRAB_SKIP = 8
+
+
+class CameraWorker(QThread):
+    """
+    Decoder di una telecamera secondaria, con un proprio VideoCapture e un
+    proprio thread (OpenCV rilascia il GIL, quindi più telecamere usano più
+    core). Vale solo l'ultima richiesta: se la decodifica è più lenta della
+    riproduzione i frame intermedi si saltano invece di rallentare le altre
+    telecamere. Il frame viene già convertito e ridotto alla dimensione di
+    visualizzazione, così al thread della GUI resta solo da mostrarlo.
+    """
+
+    frame_ready = pyqtSignal(int, QImage)
+
+    def __init__(self, video_path, timestamps):
+        super().__init__()
+        self.video_path = video_path
+        self.timestamps = timestamps
+        self.condition = threading.Condition()
+        self.requested_time = None
+        self.display_size = None
+        self.stopping = False
+
+    # -- Chiamate dal thread della GUI -------------------------------------
+    def request(self, video_time):
+        with self.condition:
+            self.requested_time = video_time
+            self.condition.notify()
+
+    def set_timestamps(self, timestamps):
+        with self.condition:
+            self.timestamps = timestamps
+
+    def set_display_size(self, width, height):
+        with self.condition:
+            self.display_size = (width, height)
+
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.wait()
+
+    # -- Thread di decodifica -----------------------------------------------
+    def run(self):
+        cap = cv2.VideoCapture(self.video_path)
+        next_frame = 0
+        shown = None
+        shown_size = None
+        # Ultimo frame decodificato: se cambia solo la dimensione del riquadro si riusa
+        decoded = None
+        try:
+            while True:
+                with self.condition:
+                    while self.requested_time is None and not self.stopping:
+                        self.condition.wait()
+                    if self.stopping:
+                        return
+                    video_time, self.requested_time = self.requested_time, None
+                    timestamps = self.timestamps
+                    display_size = self.display_size
+                if not len(timestamps):
+                    continue
+                index = int(np.searchsorted(timestamps, video_time, side='right')) - 1
+                index = max(0, min(index, len(timestamps) - 1))
+                if index == shown:
+                    if display_size == shown_size:
+                        continue
+                    frame = decoded
+                else:
+                    skip = index - next_frame if next_frame is not None else -1
+                    if 0 <= skip <= MAX_GRAB_SKIP:
+                        for _ in range(skip):
+                            cap.grab()
+                    else:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+                    ret, frame = cap.read()
+                    if not ret:
+                        next_frame = None
+                        continue
+                    next_frame = index + 1
+                    decoded = frame
+                shown, shown_size = index, display_size
+
+                if display_size is not None:
+                    scale = min(display_size[0] / frame.shape[1], display_size[1] / frame.shape[0])
+                    if 0 < scale < 1:
+                        frame = cv2.resize(frame, (max(int(frame.shape[1] * scale), 1),
+                                                   max(int(frame.shape[0] * scale), 1)),
+                                           interpolation=cv2.INTER_AREA)
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                h, w, ch = frame.shape
+                image = QImage(frame.data, w, h, ch * w, QImage.Format_RGB888).copy()
+                self.frame_ready.emit(index, image)
+        finally:
+            cap.release()
+
+
+class CameraView(QLabel):
+    """
+    Riquadro di una telecamera secondaria nella griglia video. Segue il tempo
+    del video principale più il proprio offset di sincronizzazione (secondi,
+    positivo se questa telecamera è partita prima), impostabile dal menu
+    contestuale.
+    """
+
+    def __init__(self, player, video_path, timestamps, offset=0.0):
+        super().__init__(player.video_widget)
+        self.player = player
+        self.video_path = video_path
+        self.file_name = os.path.basename(video_path)
+        self.offset = offset
+        self.setAlignment(Qt.AlignCenter)
+        self.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.setStyleSheet("background-color: black;")
+        self.setToolTip(self.file_name)
+
+        self.worker = CameraWorker(video_path, timestamps)
+        self.worker.frame_ready.connect(self.show_frame)
+        self.worker.start()
+
+    def request(self, video_time):
+        self.worker.request(video_time + self.offset)
+
+    def show_frame(self, index, image):
+        self.setPixmap(QPixmap.fromImage(image))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.worker.set_display_size(self.width(), self.height())
+        self.player.request_camera_frames()
+
+    def contextMenuEvent(self, event):
+        menu = QMenu(self)
+        offset_action = menu.addAction("Offset di Sincronizzazione...")
+        if menu.exec_(event.globalPos()) == offset_action:
+            offset, ok = QInputDialog.getDouble(self, self.file_name, "Offset rispetto al video principale (s):",
+                                                self.offset, -3600.0, 3600.0, 3)
+            if ok:
+                self.player.set_camera_offset(self, offset)
+
+    def close_camera(self):
+        self.worker.stop()
+        self.deleteLater()
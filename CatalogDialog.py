@@ -0,0 +1,127 @@
+import os
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QProgressBar,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog)
+from BackgroundTask import BackgroundTask
+from SessionCatalog import SessionCatalog, scan_catalog
+from SensorSession import ROLE_LABELS
+
+
+class CatalogDialog(QDialog):
+    """
+    Catalogo delle sessioni sotto una cartella radice: ricerca per cartella,
+    dispositivo, numero di serie o data e apertura con doppio clic. I dati
+    arrivano dall'indice SQLite; "Aggiorna" rilegge in background solo i file
+    cambiati dall'ultima scansione.
+    """
+
+    def __init__(self, player):
+        super().__init__(player)
+        self.player = player
+        self.db_path = os.path.join(player.app_data_dir, 'catalog.sqlite')
+        self.catalog = SessionCatalog(self.db_path)
+        self.root = player.load_app_setting('catalog_root', '')
+        self.scanning = False
+        self.setWindowTitle("Catalogo Sessioni")
+        self.resize(820, 520)
+
+        layout = QVBoxLayout(self)
+        root_layout = QHBoxLayout()
+        self.root_label = QLabel("", self)
+        root_layout.addWidget(self.root_label, 1)
+        root_button = QPushButton("Cartella Radice...", self)
+        root_button.clicked.connect(self.choose_root)
+        root_layout.addWidget(root_button)
+        self.scan_button = QPushButton("Aggiorna", self)
+        self.scan_button.clicked.connect(self.start_scan)
+        root_layout.addWidget(self.scan_button)
+        layout.addLayout(root_layout)
+
+        self.search_edit = QLineEdit(self)
+        self.search_edit.setPlaceholderText("Cerca per cartella, dispositivo, numero di serie o data...")
+        self.search_edit.textChanged.connect(self.refresh)
+        layout.addWidget(self.search_edit)
+
+        self.table = QTableWidget(0, 5, self)
+        self.table.setHorizontalHeaderLabels(["Cartella", "Inizio", "Dispositivi", "Video", "Durata (s)"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.cellDoubleClicked.connect(self.open_session)
+        layout.addWidget(self.table)
+
+        status_layout = QHBoxLayout()
+        self.status_label = QLabel("", self)
+        status_layout.addWidget(self.status_label, 1)
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.hide()
+        status_layout.addWidget(self.progress_bar)
+        layout.addLayout(status_layout)
+
+        self.update_root_label()
+        self.refresh()
+        if self.root:
+            self.start_scan()
+
+    def update_root_label(self):
+        self.root_label.setText(f"Radice: {self.root or 'nessuna cartella scelta'}")
+
+    def choose_root(self):
+        folder_path = QFileDialog.getExistingDirectory(self, "Cartella Radice delle Sessioni", self.root)
+        if folder_path:
+            self.root = folder_path
+            self.player.save_app_setting('catalog_root', folder_path)
+            self.update_root_label()
+            self.refresh()
+            self.start_scan()
+
+    def start_scan(self):
+        if not self.root or self.scanning:
+            return
+        self.scanning = True
+        self.scan_button.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        task = BackgroundTask(scan_catalog, self.db_path, self.root, with_progress=True)
+        task.signals.progress.connect(self.progress_bar.setValue)
+        task.signals.finished.connect(self.on_scan_finished)
+        task.signals.failed.connect(self.on_scan_failed)
+        self.player.start_background_task(task)
+
+    def on_scan_finished(self, result):
+        self.finish_scan()
+        read, removed = result
+        self.refresh()
+        self.status_label.setText(f"{self.table.rowCount()} sessioni - {read} file letti, {removed} rimossi")
+
+    def on_scan_failed(self, error):
+        self.finish_scan()
+        self.status_label.setText(f"Errore durante la scansione: {error}")
+
+    def finish_scan(self):
+        self.scanning = False
+        self.scan_button.setEnabled(True)
+        self.progress_bar.hide()
+
+    def refresh(self):
+        sessions = self.catalog.sessions(self.root, self.search_edit.text().strip()) if self.root else []
+        self.table.setRowCount(len(sessions))
+        for row, session in enumerate(sessions):
+            folder = os.path.relpath(session['folder'], self.root)
+            duration = f"{session['duration']:.1f}" if session['duration'] is not None else ""
+            devices = ', '.join(ROLE_LABELS.get(name, (name, name))[0]
+                                for name in session['devices'].split(', ') if name)
+            values = [folder, session['start'], devices, str(session['videos']), duration]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column >= 3:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                item.setData(Qt.UserRole, session['folder'])
+                self.table.setItem(row, column, item)
+        self.status_label.setText(f"{len(sessions)} sessioni")
+
+    def open_session(self, row, column):
+        folder_path = self.table.item(row, 0).data(Qt.UserRole)
+        self.accept()
+        self.player.open_folder(folder_path)
@@ -0,0 +1,230 @@
+import numpy as np
+from Orientation import estimate_orientation, ORIENTATION_OUTPUTS
+
+
+class DerivedChannel:
+    """
+    Descrizione dichiarativa di un canale derivato: nome, tipo di kernel,
+    canali sorgente (grezzi o a loro volta derivati) e parametri.
+    Le sorgenti opzionali vengono usate solo se presenti nel file.
+    """
+
+    def __init__(self, name, kind, sources, optional=(), **params):
+        self.name = name
+        self.kind = kind
+        self.sources = list(sources)
+        self.optional = list(optional)
+        self.params = params
+
+    @property
+    def params_key(self):
+        return (self.kind, tuple(self.sources), tuple(self.optional), tuple(sorted(self.params.items())))
+
+    @property
+    def shared_key(self):
+        # Canali con più uscite (es. orientamento): stesso calcolo, uscita diversa
+        params = tuple(sorted((k, v) for k, v in self.params.items() if k != 'output'))
+        return (self.kind, tuple(self.sources), tuple(self.optional), params)
+
+
+DERIVED_CHANNELS = {spec.name: spec for spec in [
+    DerivedChannel('A_mod', 'magnitude', ['Ax', 'Ay', 'Az']),
+    DerivedChannel('G_mod', 'magnitude', ['Gx', 'Gy', 'Gz']),
+    DerivedChannel('S_tot', 'sum', ['S0', 'S1', 'S2']),
+    DerivedChannel('S0_lp', 'lowpass', ['S0'], cutoff=5.0),
+    DerivedChannel('S1_lp', 'lowpass', ['S1'], cutoff=5.0),
+    DerivedChannel('S2_lp', 'lowpass', ['S2'], cutoff=5.0),
+    DerivedChannel('S_tot_lp', 'lowpass', ['S_tot'], cutoff=5.0),
+    # Sull'accelerazione togliamo la media (gravità) prima dell'RMS
+    DerivedChannel('A_rms', 'rms', ['A_mod'], window=0.5, center=True),
+    DerivedChannel('G_rms', 'rms', ['G_mod'], window=0.5, center=False),
+] + [
+    # Orientamento stimato con il filtro complementare; il magnetometro corregge lo yaw se presente
+    DerivedChannel(name, 'orientation', ['Ax', 'Ay', 'Az', 'Gx', 'Gy', 'Gz'],
+                   optional=['Mx', 'My', 'Mz'], output=name)
+    for name in ORIENTATION_OUTPUTS
+]}
+
+# Kernel costosi i cui risultati si salvano nella cache su disco (namespace 'derived')
+PERSISTENT_KINDS = {'orientation'}
+# Versione dei risultati salvati: cambiarla quando cambiano i kernel
+DERIVED_CACHE_VERSION = 1
+
+# Gruppi selezionabili nei pannelli, come i gruppi Ax/Ay/Az dei canali grezzi
+DERIVED_GROUPS = [
+    ("Moduli", ["A_mod", "G_mod"]),
+    ("Pressione Totale", ["S_tot", "S_tot_lp"]),
+    ("Pressione Filtrata", ["S0_lp", "S1_lp", "S2_lp"]),
+    ("RMS Mobile", ["A_rms", "G_rms"]),
+    ("Orientamento", ["Roll", "Pitch", "Yaw"]),
+    ("Quaternione", ["Qw", "Qx", "Qy", "Qz"]),
+]
+
+
+def can_derive(store, name, channels=DERIVED_CHANNELS):
+    # Vero se il canale esiste già o se tutte le sue sorgenti sono disponibili
+    if store.has_column(name):
+        return True
+    spec = channels.get(name)
+    return spec is not None and all(can_derive(store, source, channels) for source in spec.sources)
+
+
+# -----------------------------
+# KERNEL VETTORIALI
+# -----------------------------
+def magnitude(rows):
+    total = np.zeros_like(rows[0], dtype=np.float32)
+    for row in rows:
+        total += np.square(row, dtype=np.float32)
+    return np.sqrt(total)
+
+
+def channel_sum(rows):
+    total = np.zeros_like(rows[0], dtype=np.float32)
+    for row in rows:
+        total += row
+    return total
+
+
+def fft_lowpass(time, values, cutoff, rate):
+    """
+    Passa-basso a fase zero nel dominio della frequenza. I campioni Sensoria non
+    sono equispaziati, quindi si passa da una griglia uniforme alla frequenza
+    nominale (rate) e si torna ai tempi originali.
+    """
+    if len(values) < 8:
+        return values.astype(np.float32)
+    grid = time[0] + np.arange(int((time[-1] - time[0]) * rate) + 1) / rate
+    uniform = np.interp(grid, time, values)
+
+    # Riflessione ai bordi (1 s) per limitare gli artefatti della FFT
+    pad = min(len(uniform) - 1, int(rate))
+    padded = np.pad(uniform, pad, mode='reflect')
+    spectrum = np.fft.rfft(padded)
+    freqs = np.fft.rfftfreq(len(padded), 1.0 / rate)
+
+    # Transizione a coseno rialzato tra cutoff e 1.25 * cutoff
+    ramp = np.clip((1.25 * cutoff - freqs) / (0.25 * cutoff), 0.0, 1.0)
+    spectrum *= 0.5 - 0.5 * np.cos(np.pi * ramp)
+    filtered = np.fft.irfft(spectrum, len(padded))[pad:pad + len(uniform)]
+    return np.interp(time, grid, filtered).astype(np.float32)
+
+
+def moving_rms(time, values, window, center=False):
+    """
+    RMS su una finestra di 'window' secondi centrata su ogni campione, in O(n)
+    con le somme cumulative. La finestra è in tempo, quindi regge il jitter.
+    """
+    values = values.astype(np.float64)
+    if center and len(values):
+        values = values - values.mean()
+    lo = np.searchsorted(time, time - window / 2, side='left')
+    hi = np.searchsorted(time, time + window / 2, side='right')
+    csum = np.concatenate(([0.0], np.cumsum(np.square(values))))
+    count = np.maximum(hi - lo, 1)
+    return np.sqrt((csum[hi] - csum[lo]) / count).astype(np.float32)
+
+
+def orientation(time, rows, optional_rows):
+    mag = optional_rows if len(optional_rows) == 3 else None
+    return estimate_orientation(time, rows[0:3], rows[3:6], mag)
+
+
+def apply_kernel(spec, time, rows, optional_rows=(), rate=None):
+    # I kernel con più uscite restituiscono un dizionario nome -> valori
+    if spec.kind == 'orientation':
+        return orientation(time, rows, optional_rows)
+    if spec.kind == 'magnitude':
+        return magnitude(rows)
+    if spec.kind == 'sum':
+        return channel_sum(rows)
+    if spec.kind == 'lowpass':
+        return fft_lowpass(time, rows[0], rate=rate, **spec.params)
+    if spec.kind == 'rms':
+        return moving_rms(time, rows[0], **spec.params)
+    raise ValueError(f"Tipo di canale derivato sconosciuto: {spec.kind}")
+
+
+class DerivedPipeline:
+    """
+    Calcola i canali derivati risolvendo le dipendenze e memorizza i risultati
+    per (sorgente dei dati, canale, parametri), così riaprire la stessa cartella
+    non ricalcola nulla. I kernel costosi (PERSISTENT_KINDS) vengono salvati
+    anche nella cache su disco, accanto ai dati convertiti dei sensori.
+    compute() non modifica lo store e può girare in un worker, a cui va passata
+    una copia (store.snapshot()); attach() va chiamato nel thread della GUI.
+    """
+
+    def __init__(self, channels=None, cache_manager=None):
+        self.channels = channels or DERIVED_CHANNELS
+        self.cache = {}
+        self.cache_manager = cache_manager
+
+    def cache_key(self, store, name):
+        return (store.source_key, name, self.channels[name].params_key)
+
+    def can_compute(self, store, name):
+        return can_derive(store, name, self.channels)
+
+    def missing(self, store, names):
+        return [name for name in names if not store.has_column(name)]
+
+    def compute(self, store, names):
+        results = {}
+        shared = {}
+
+        def resolve(name):
+            if name in results:
+                return results[name]
+            if store.has_column(name):
+                return store.column(name)
+            key = self.cache_key(store, name)
+            if key in self.cache:
+                results[name] = self.cache[key]
+                return results[name]
+            spec = self.channels[name]
+            if spec.shared_key not in shared:
+                rows = [resolve(source) for source in spec.sources]
+                optional_rows = [resolve(source) for source in spec.optional if can_derive(store, source, self.channels)]
+                shared[spec.shared_key] = self.run_kernel(store, spec, rows, optional_rows)
+            output = shared[spec.shared_key]
+            results[name] = output[spec.params['output']] if isinstance(output, dict) else output
+            return results[name]
+
+        for name in names:
+            resolve(name)
+        return results
+
+    def run_kernel(self, store, spec, rows, optional_rows):
+        if spec.kind not in PERSISTENT_KINDS or self.cache_manager is None or store.fingerprint is None:
+            return apply_kernel(spec, store.time, rows, optional_rows, store.sampling_rate())
+        path = self.cache_manager.entry_path('derived', f"{store.fingerprint}|{spec.shared_key}",
+                                             DERIVED_CACHE_VERSION, '.npz')
+        if self.cache_manager.lookup(path) is not None:
+            try:
+                with np.load(path) as arrays:
+                    return {name: arrays[name] for name in arrays.files}
+            except (OSError, ValueError):
+                pass
+        output = apply_kernel(spec, store.time, rows, optional_rows, store.sampling_rate())
+        self.cache_manager.store_arrays(path, **output)
+        return output
+
+    def compute_all(self, jobs, progress=None):
+        # Per le esportazioni in background: jobs = [(store.snapshot(), canali)]
+        results = []
+        for done, (store, names) in enumerate(jobs, start=1):
+            results.append(self.compute(store, names))
+            if progress is not None:
+                progress(int(100 * done / len(jobs)))
+        return results
+
+    def attach(self, store, results):
+        for name, values in results.items():
+            self.cache[self.cache_key(store, name)] = values
+            store.add_derived(name, values)
+
+    def retain(self, stores):
+        # Tiene in memoria solo i risultati dei file ancora aperti
+        source_keys = {store.source_key for store in stores}
+        self.cache = {key: value for key, value in self.cache.items() if key[0] in source_keys}
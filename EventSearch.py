@@ -0,0 +1,48 @@
+import numpy as np
+
+# Condizioni disponibili: nome mostrato -> (confronto, solo fronte)
+EVENT_CONDITIONS = {
+    "Sopra soglia": ('above', False),
+    "Sotto soglia": ('below', False),
+    "Fronte di salita": ('above', True),
+    "Fronte di discesa": ('below', True),
+}
+
+
+def condition_runs(mask):
+    # Indici [inizio, fine) dei tratti consecutivi in cui mask è vera
+    change = np.diff(mask.astype(np.int8), prepend=0, append=0)
+    return np.flatnonzero(change == 1), np.flatnonzero(change == -1)
+
+
+def find_intervals(time, values, threshold, condition="Sopra soglia", min_duration=0.0):
+    """
+    Intervalli (inizi, fini) in secondi in cui il canale soddisfa la condizione
+    per almeno min_duration secondi, senza cicli sui campioni. Per i fronti
+    l'evento è l'istante dell'attraversamento (inizio = fine), tenuto solo se
+    il tratto che segue dura almeno min_duration.
+    """
+    comparison, edge_only = EVENT_CONDITIONS[condition]
+    values = np.asarray(values)
+    mask = values > threshold if comparison == 'above' else values < threshold
+    starts, ends = condition_runs(mask)
+    if not len(starts):
+        return np.zeros(0), np.zeros(0)
+
+    start_times = time[starts]
+    end_times = time[ends - 1]
+    keep = (end_times - start_times) >= min_duration
+    if edge_only:
+        # Un tratto già attivo al primo campione non è un attraversamento
+        keep &= starts > 0
+        return start_times[keep], start_times[keep]
+    return start_times[keep], end_times[keep]
+
+
+def adjacent_event(starts, current_time, direction, tolerance=1e-6):
+    # Indice dell'evento successivo (direction=1) o precedente (-1), None se non c'è
+    if direction > 0:
+        index = np.searchsorted(starts, current_time + tolerance, side='left')
+        return int(index) if index < len(starts) else None
+    index = np.searchsorted(starts, current_time - tolerance, side='left') - 1
+    return int(index) if index >= 0 else None
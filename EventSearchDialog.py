@@ -0,0 +1,143 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QComboBox, QLabel,
+                             QDoubleSpinBox, QSpinBox, QPushButton, QListWidget, QListWidgetItem)
+from BackgroundTask import BackgroundTask
+from DerivedChannels import DERIVED_CHANNELS
+from EventSearch import EVENT_CONDITIONS, find_intervals
+
+
+class EventSearchDialog(QDialog):
+    """
+    Ricerca di eventi su un canale (soglia, durata minima, fronti). Gli
+    intervalli trovati vengono evidenziati nei grafici e si scorrono con
+    N (successivo) e P (precedente) o facendo doppio clic nell'elenco.
+    """
+
+    def __init__(self, player):
+        super().__init__(player)
+        self.player = player
+        self.setWindowTitle("Cerca Eventi")
+        self.resize(380, 480)
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.device_selector = QComboBox(self)
+        self.device_selector.currentIndexChanged.connect(self.update_channels)
+        form.addRow("Dispositivo:", self.device_selector)
+        self.channel_selector = QComboBox(self)
+        form.addRow("Canale:", self.channel_selector)
+        self.condition_selector = QComboBox(self)
+        self.condition_selector.addItems(list(EVENT_CONDITIONS))
+        form.addRow("Condizione:", self.condition_selector)
+        self.threshold_input = QDoubleSpinBox(self)
+        self.threshold_input.setRange(-1e6, 1e6)
+        self.threshold_input.setDecimals(3)
+        form.addRow("Soglia:", self.threshold_input)
+        self.duration_input = QSpinBox(self)
+        self.duration_input.setRange(0, 600000)
+        self.duration_input.setSuffix(" ms")
+        form.addRow("Durata minima:", self.duration_input)
+        layout.addLayout(form)
+
+        buttons_layout = QHBoxLayout()
+        self.search_button = QPushButton("Cerca", self)
+        self.search_button.clicked.connect(self.search)
+        buttons_layout.addWidget(self.search_button)
+        clear_button = QPushButton("Cancella", self)
+        clear_button.clicked.connect(self.clear)
+        buttons_layout.addWidget(clear_button)
+        layout.addLayout(buttons_layout)
+
+        self.summary_label = QLabel("", self)
+        layout.addWidget(self.summary_label)
+        self.results_list = QListWidget(self)
+        self.results_list.itemDoubleClicked.connect(
+            lambda item: self.player.jump_to_event_index(item.data(Qt.UserRole)))
+        layout.addWidget(self.results_list)
+
+        navigation_layout = QHBoxLayout()
+        previous_button = QPushButton("Precedente (P)", self)
+        previous_button.clicked.connect(lambda: self.player.jump_to_event(-1))
+        navigation_layout.addWidget(previous_button)
+        next_button = QPushButton("Successivo (N)", self)
+        next_button.clicked.connect(lambda: self.player.jump_to_event(1))
+        navigation_layout.addWidget(next_button)
+        layout.addLayout(navigation_layout)
+
+        self.update_devices()
+
+    def update_devices(self):
+        current = self.device_selector.currentData()
+        self.device_selector.blockSignals(True)
+        self.device_selector.clear()
+        for device in self.player.session or []:
+            self.device_selector.addItem(device.label, device.role)
+        self.device_selector.setCurrentIndex(max(self.device_selector.findData(current), 0))
+        self.device_selector.blockSignals(False)
+        self.update_channels()
+
+    def update_channels(self):
+        role = self.device_selector.currentData()
+        current = self.channel_selector.currentText()
+        self.channel_selector.clear()
+        if role is None:
+            return
+        # Canali del file e canali derivati calcolabili (vengono calcolati alla ricerca)
+        pipeline = self.player.derived_pipeline
+        store = self.player.session.device(role).store
+        columns = list(store.column_names)
+        columns += [name for name in DERIVED_CHANNELS if name not in columns and pipeline.can_compute(store, name)]
+        self.channel_selector.addItems(columns)
+        index = self.channel_selector.findText(current)
+        self.channel_selector.setCurrentIndex(max(index, 0))
+
+    def search(self):
+        role = self.device_selector.currentData()
+        column = self.channel_selector.currentText()
+        if role is None or not column:
+            return
+        store = self.player.session.device(role).store
+        if store.has_column(column):
+            self.show_results(role, store, column)
+            return
+
+        # Il canale derivato si calcola in background; la ricerca parte quando è pronto
+        self.search_button.setEnabled(False)
+        self.summary_label.setText(f"Calcolo di {column}...")
+        task = BackgroundTask(self.player.derived_pipeline.compute, store.snapshot(), [column])
+        task.signals.finished.connect(
+            lambda results, role=role, store=store, column=column: self.on_channel_ready(role, store, column, results))
+        task.signals.failed.connect(self.on_channel_failed)
+        self.player.start_background_task(task)
+
+    def on_channel_ready(self, role, store, column, results):
+        self.search_button.setEnabled(True)
+        self.player.derived_pipeline.attach(store, results)
+        # Nel frattempo può essere stata aperta un'altra cartella
+        session = self.player.session
+        if session is None or not any(device.store is store for device in session):
+            self.summary_label.setText("")
+            return
+        self.show_results(role, store, column)
+
+    def on_channel_failed(self, error):
+        self.search_button.setEnabled(True)
+        self.summary_label.setText(f"Impossibile calcolare il canale: {error}")
+
+    def show_results(self, role, store, column):
+        starts, ends = find_intervals(store.time, store.column(column), self.threshold_input.value(),
+                                      self.condition_selector.currentText(), self.duration_input.value() / 1000.0)
+        self.player.set_event_intervals(role, starts, ends)
+
+        self.results_list.clear()
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            text = f"{i + 1}. {start:.3f} s" if start == end else f"{i + 1}. {start:.3f} - {end:.3f} s ({end - start:.3f} s)"
+            item = QListWidgetItem(text)
+            item.setData(Qt.UserRole, i)
+            self.results_list.addItem(item)
+        self.summary_label.setText(f"{len(starts)} eventi su {column}")
+
+    def clear(self):
+        self.results_list.clear()
+        self.summary_label.setText("")
+        self.player.set_event_intervals(None, [], [])
@@ -0,0 +1,256 @@
+import cv2
+import numpy as np
+from PyQt5.QtCore import Qt, QPoint, QRectF
+from PyQt5.QtGui import QColor, QImage, QPainter, QPen, QPixmap
+from PyQt5.QtWidgets import QLabel, QWidget
+from BackgroundTask import BackgroundTask
+
+# Altezza delle miniature e loro numero massimo per video
+THUMB_HEIGHT = 48
+THUMB_COUNT = 256
+# Fattore di ingrandimento dell'anteprima al passaggio del mouse
+PREVIEW_SCALE = 3
+# Versione del formato su disco: cambiarla invalida le cache esistenti
+CACHE_VERSION = 1
+
+
+def thumbnail_order(count):
+    """
+    Ordine di decodifica dal grossolano al fine: prima gli estremi e la metà,
+    poi i quarti, gli ottavi... così la striscia è subito completa, anche se
+    con poche miniature, e si infittisce man mano.
+    """
+    order = [0, count - 1] if count > 1 else [0]
+    seen = set(order)
+    step = 1
+    while step * 2 < count:
+        step *= 2
+    while step >= 1:
+        for slot in range(0, count, step):
+            if slot not in seen:
+                seen.add(slot)
+                order.append(slot)
+        step //= 2
+    return order
+
+
+def load_thumbnails(cache_path):
+    try:
+        with np.load(cache_path) as data:
+            return data['frames'], data['thumbs']
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def decode_thumbnails(video_path, frames, thumbs, cancelled, cache=None, cache_path=None, progress=None):
+    """
+    Eseguita nel worker, con un VideoCapture proprio: decodifica i frame della
+    striscia nell'ordine di thumbnail_order e li rimpicciolisce direttamente
+    nell'array condiviso. progress riceve lo slot appena pronto. Alla fine la
+    striscia completa viene salvata (compressa) nella cache su disco.
+    """
+    cap = cv2.VideoCapture(video_path)
+    height, width = thumbs.shape[1:3]
+    next_frame = None
+    try:
+        for slot in thumbnail_order(len(frames)):
+            if cancelled():
+                return None
+            index = int(frames[slot])
+            if next_frame != index:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ret, frame = cap.read()
+            next_frame = index + 1 if ret else None
+            if not ret:
+                continue
+            thumbs[slot] = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            if progress is not None:
+                progress(slot)
+    finally:
+        cap.release()
+
+    if cache is not None:
+        cache.store_arrays(cache_path, frames=frames, thumbs=thumbs)
+    return thumbs
+
+
+class FilmstripWidget(QWidget):
+    """
+    Striscia di miniature del video sopra i controlli. Le miniature arrivano
+    una alla volta dal worker e la striscia si ridisegna con quelle già pronte;
+    quante se ne mostrano dipende dalla larghezza del widget. Il passaggio del
+    mouse mostra la miniatura ingrandita senza usare il decoder del player, un
+    clic (o un trascinamento) sposta il video tramite il SeekCoordinator.
+    """
+
+    def __init__(self, player):
+        super().__init__(player)
+        self.player = player
+        self.total_frames = 0
+        self.frames = np.zeros(0, dtype=np.int64)
+        self.thumbs = None
+        self.loaded = np.zeros(0, dtype=bool)
+        self.images = {}
+        self.current_frame = 0
+        self.hover_x = None
+        self.cancel_flag = None
+
+        self.setFixedHeight(THUMB_HEIGHT + 8)
+        self.setMouseTracking(True)
+        self.preview = QLabel(None, Qt.ToolTip)
+        self.preview.setStyleSheet("border: 1px solid #FFD700;")
+
+    def load_video(self, video_path, video_key, total_frames, frame_width, frame_height):
+        self.stop_loading()
+        self.total_frames = total_frames
+        self.images = {}
+        count = max(min(THUMB_COUNT, total_frames), 0)
+        self.frames = np.round(np.linspace(0, max(total_frames - 1, 0), count)).astype(np.int64)
+        width = max(int(round(THUMB_HEIGHT * frame_width / max(frame_height, 1))), 1)
+        self.loaded = np.zeros(count, dtype=bool)
+        if not count:
+            self.thumbs = None
+            self.update()
+            return
+
+        cache = self.player.cache_manager
+        cache_path = cache.entry_path('filmstrip', f"{video_key}|{count}|{THUMB_HEIGHT}", CACHE_VERSION, '.npz')
+        cached = load_thumbnails(cache_path) if cache.lookup(cache_path) else None
+        if cached is not None and np.array_equal(cached[0], self.frames):
+            self.thumbs = cached[1]
+            self.loaded[:] = True
+            self.update()
+            return
+
+        self.thumbs = np.zeros((count, THUMB_HEIGHT, width, 3), dtype=np.uint8)
+        cancel_flag = [False]
+        self.cancel_flag = cancel_flag
+        task = BackgroundTask(decode_thumbnails, video_path, self.frames, self.thumbs,
+                              lambda: cancel_flag[0], cache, cache_path, with_progress=True)
+        # Gli slot ricevono l'array di partenza: i segnali di un video precedente vengono ignorati
+        task.signals.progress.connect(lambda slot, thumbs=self.thumbs: self.on_thumbnail_ready(thumbs, slot))
+        self.player.start_background_task(task)
+        self.update()
+
+    def stop_loading(self):
+        if self.cancel_flag is not None:
+            self.cancel_flag[0] = True
+            self.cancel_flag = None
+
+    def on_thumbnail_ready(self, thumbs, slot):
+        if thumbs is not self.thumbs:
+            return
+        self.loaded[slot] = True
+        self.update()
+
+    def set_current_frame(self, index):
+        if index != self.current_frame:
+            self.current_frame = index
+            self.update()
+
+    # -- Ricerca delle miniature -------------------------------------------
+    def nearest_slot(self, index):
+        # Miniatura già pronta più vicina al frame indicato, o None
+        slots = np.flatnonzero(self.loaded)
+        if not len(slots):
+            return None
+        available = self.frames[slots]
+        position = int(np.searchsorted(available, index))
+        candidates = [p for p in (position - 1, position) if 0 <= p < len(slots)]
+        best = min(candidates, key=lambda p: abs(int(available[p]) - index))
+        return int(slots[best])
+
+    def thumbnail_image(self, slot):
+        image = self.images.get(slot)
+        if image is None:
+            rgb = np.ascontiguousarray(self.thumbs[slot][:, :, ::-1])
+            h, w = rgb.shape[:2]
+            image = QImage(rgb.data, w, h, 3 * w, QImage.Format_RGB888).copy()
+            self.images[slot] = image
+        return image
+
+    def proxy_frame(self, index, frame_width, frame_height):
+        """
+        Anteprima per il SeekCoordinator: la miniatura più vicina riportata alla
+        dimensione del video, se non dista più di due intervalli della striscia.
+        """
+        slot = self.nearest_slot(index)
+        if slot is None:
+            return None
+        spacing = self.total_frames / max(len(self.frames), 1)
+        if abs(int(self.frames[slot]) - index) > 2 * spacing:
+            return None
+        return cv2.resize(self.thumbs[slot], (frame_width, frame_height), interpolation=cv2.INTER_LINEAR)
+
+    def frame_at(self, x):
+        if self.total_frames <= 0:
+            return 0
+        return int(np.clip(x / max(self.width(), 1) * self.total_frames, 0, self.total_frames - 1))
+
+    def x_at(self, index):
+        return index / max(self.total_frames, 1) * self.width()
+
+    # -- Disegno -------------------------------------------------------------
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor('#1E1E1E'))
+        if self.thumbs is not None and self.total_frames > 0:
+            thumb_width = self.thumbs.shape[2]
+            # Tante caselle quante ne stanno intere nella larghezza attuale
+            tiles = max(1, min(self.width() // thumb_width, len(self.frames)))
+            tile_width = self.width() / tiles
+            top = (self.height() - THUMB_HEIGHT) / 2
+            for tile in range(tiles):
+                slot = self.nearest_slot(int((tile + 0.5) / tiles * self.total_frames))
+                if slot is None:
+                    break
+                x = tile * tile_width + (tile_width - thumb_width) / 2
+                painter.drawImage(QRectF(x, top, thumb_width, THUMB_HEIGHT), self.thumbnail_image(slot))
+
+            if self.hover_x is not None:
+                painter.setPen(QPen(QColor(255, 255, 255, 160), 1))
+                painter.drawLine(int(self.hover_x), 0, int(self.hover_x), self.height())
+            playhead_x = int(self.x_at(self.current_frame))
+            painter.setPen(QPen(QColor('#FFD700'), 2))
+            painter.drawLine(playhead_x, 0, playhead_x, self.height())
+        painter.end()
+
+    # -- Mouse ---------------------------------------------------------------
+    def mouseMoveEvent(self, event):
+        x = event.pos().x()
+        self.hover_x = x
+        index = self.frame_at(x)
+        if event.buttons() & Qt.LeftButton:
+            self.player.seek_to_frame(index)
+        self.show_preview(index, event.globalPos())
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self.total_frames > 0:
+            self.player.seek_to_frame(self.frame_at(event.pos().x()))
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and self.total_frames > 0:
+            self.player.finish_seek()
+
+    def leaveEvent(self, event):
+        self.hover_x = None
+        self.preview.hide()
+        self.update()
+
+    def show_preview(self, index, global_pos):
+        slot = self.nearest_slot(index)
+        if slot is None:
+            self.preview.hide()
+            return
+        image = self.thumbnail_image(slot)
+        pixmap = QPixmap.fromImage(image.scaled(image.width() * PREVIEW_SCALE, image.height() * PREVIEW_SCALE,
+                                                Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        painter = QPainter(pixmap)
+        painter.setPen(QColor('#FFD700'))
+        painter.drawText(pixmap.rect().adjusted(4, 0, 0, -4), Qt.AlignBottom | Qt.AlignLeft, f"Frame {index}")
+        painter.end()
+        self.preview.setPixmap(pixmap)
+        self.preview.adjustSize()
+        self.preview.move(global_pos + QPoint(-pixmap.width() // 2, -pixmap.height() - 16))
+        self.preview.show()
@@ -0,0 +1,176 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+import cv2
+
+# Qualità JPEG del livello compresso: alta, le differenze non si vedono a schermo
+JPEG_QUALITY = 95
+# Frame in attesa di compressione: oltre questo limite i frame scartati si perdono
+ENCODE_QUEUE_SIZE = 64
+
+
+class FrameCache:
+    """
+    Frame video già decodificati (BGR, come restituiti da OpenCV) per indice,
+    su due livelli:
+    - raw: i frame visti o preparati di recente, pronti all'uso, con scarto LRU
+      oltre max_bytes;
+    - compresso: i frame scartati dal livello raw vengono compressi in JPEG da
+      un thread dedicato e tenuti fino a compressed_max_bytes. Un frame trovato
+      qui viene decodificato (pochi ms, molto meno di un seek) e torna raw.
+    Così restano scorrevoli minuti di video invece di pochi secondi.
+    È condivisa con il thread di prefetch, quindi ogni accesso avviene sotto lock.
+    """
+
+    def __init__(self, max_bytes=128 * 1024 * 1024, compressed_max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.compressed_max_bytes = compressed_max_bytes
+        self.nbytes = 0
+        self.compressed_nbytes = 0
+        self.frames = OrderedDict()
+        self.compressed = OrderedDict()
+        self.lock = threading.Lock()
+        # La generazione cambia a ogni clear(): le compressioni in corso per il video precedente si scartano
+        self.generation = 0
+        self.reset_stats()
+
+        self.encode_queue = queue.Queue(maxsize=ENCODE_QUEUE_SIZE)
+        self.encoder = threading.Thread(target=self.encode_loop, daemon=True)
+        self.encoder.start()
+
+    def reset_stats(self):
+        self.raw_hits = 0
+        self.compressed_hits = 0
+        self.misses = 0
+        self.decode_seconds = 0.0
+        self.promotions = 0
+
+    def __contains__(self, index):
+        with self.lock:
+            return index in self.frames or index in self.compressed
+
+    def has_raw(self, index):
+        with self.lock:
+            return index in self.frames
+
+    def get(self, index):
+        with self.lock:
+            frame = self.frames.get(index)
+            if frame is not None:
+                self.frames.move_to_end(index)
+                self.raw_hits += 1
+                return frame
+            if index not in self.compressed:
+                self.misses += 1
+                return None
+        started = time.perf_counter()
+        frame = self.decompress(index)
+        with self.lock:
+            if frame is None:
+                self.misses += 1
+            else:
+                self.compressed_hits += 1
+                self.decode_seconds += time.perf_counter() - started
+        return frame
+
+    def promote(self, index):
+        """
+        Per il thread di prefetch: riporta raw un frame del livello compresso,
+        così la GUI lo trova già decodificato. None se non è in cache.
+        """
+        frame = self.decompress(index)
+        if frame is not None:
+            with self.lock:
+                self.promotions += 1
+        return frame
+
+    def decompress(self, index):
+        with self.lock:
+            data = self.compressed.get(index)
+            if data is None:
+                return None
+            self.compressed.move_to_end(index)
+            generation = self.generation
+        frame = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if frame is not None:
+            with self.lock:
+                if generation == self.generation:
+                    self.insert_raw(index, frame)
+        return frame
+
+    def put(self, index, frame, generation=None):
+        # generation: quella letta quando si è scelto il frame (thread di prefetch);
+        # se nel frattempo la cache è stata svuotata il frame è di un altro video
+        with self.lock:
+            if generation is None or generation == self.generation:
+                self.insert_raw(index, frame)
+
+    def insert_raw(self, index, frame):
+        # Da chiamare con il lock: i frame scartati scendono al livello compresso
+        if index in self.frames:
+            self.nbytes -= self.frames.pop(index).nbytes
+        self.frames[index] = frame
+        self.nbytes += frame.nbytes
+        while self.nbytes > self.max_bytes and len(self.frames) > 1:
+            evicted_index, evicted = self.frames.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            if evicted_index not in self.compressed:
+                try:
+                    self.encode_queue.put_nowait((self.generation, evicted_index, evicted))
+                except queue.Full:
+                    pass
+
+    def encode_loop(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+        while True:
+            generation, index, frame = self.encode_queue.get()
+            ret, data = cv2.imencode('.jpg', frame, params)
+            if not ret:
+                continue
+            with self.lock:
+                if generation != self.generation or index in self.compressed:
+                    continue
+                self.compressed[index] = data
+                self.compressed_nbytes += data.nbytes
+                while self.compressed_nbytes > self.compressed_max_bytes and len(self.compressed) > 1:
+                    _, evicted = self.compressed.popitem(last=False)
+                    self.compressed_nbytes -= evicted.nbytes
+
+    def nearest(self, index, max_distance):
+        # (indice, frame) del frame in cache più vicino a index, None se troppo lontano
+        with self.lock:
+            best = min(self.frames, key=lambda cached: abs(cached - index), default=None)
+            if best is not None and abs(best - index) <= max_distance:
+                return best, self.frames[best]
+            best = min(self.compressed, key=lambda cached: abs(cached - index), default=None)
+            if best is None or abs(best - index) > max_distance:
+                return None
+        frame = self.decompress(best)
+        return (best, frame) if frame is not None else None
+
+    def stats(self):
+        """
+        Statistiche per livello: voci, memoria, percentuale di successi sulle
+        richieste e, per il livello compresso, tempo medio di decodifica.
+        """
+        with self.lock:
+            requests = max(self.raw_hits + self.compressed_hits + self.misses, 1)
+            return {
+                'raw': {'frames': len(self.frames), 'bytes': self.nbytes,
+                        'hit_rate': self.raw_hits / requests},
+                'compressed': {'frames': len(self.compressed), 'bytes': self.compressed_nbytes,
+                               'hit_rate': self.compressed_hits / requests,
+                               'decode_ms': 1000.0 * self.decode_seconds / max(self.compressed_hits, 1),
+                               'promotions': self.promotions},
+                'miss_rate': self.misses / requests,
+            }
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.compressed.clear()
+            self.nbytes = 0
+            self.compressed_nbytes = 0
+            self.generation += 1
+            self.reset_stats()
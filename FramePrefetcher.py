@@ -0,0 +1,150 @@
+import threading
+import time
+import cv2
+from PyQt5.QtCore import QThread
+
+# Priorità dei bersagli: valori più bassi vengono serviti prima
+PRIORITY_PLAYHEAD = 0
+PRIORITY_JUMP = 1
+PRIORITY_HOVER = 2
+PRIORITY_MARKERS = 3
+
+
+class FramePrefetcher(QThread):
+    """
+    Decodifica in background, con un proprio VideoCapture, i frame che
+    probabilmente serviranno (davanti al cursore di riproduzione, attorno a
+    salti, mouse e marker) e li mette nella FrameCache del player. I frame già
+    nel livello compresso vengono solo decompressi, senza usare il decoder.
+    - Cede il passo: si ferma finché il thread della GUI ha letto un frame da
+      meno di yield_seconds.
+    - CPU: dopo ogni frame dorme in proporzione al tempo di decodifica, così
+      usa al massimo cpu_budget di un core.
+    - Memoria: per ogni insieme di bersagli decodifica al più memory_budget byte,
+      per non svuotare la cache dei frame appena visti.
+    """
+
+    def __init__(self, frame_cache, cpu_budget=0.5, memory_budget=None, yield_seconds=0.15):
+        super().__init__()
+        self.frame_cache = frame_cache
+        self.cpu_budget = cpu_budget
+        self.memory_budget = memory_budget or frame_cache.max_bytes // 2
+        self.yield_seconds = yield_seconds
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.video_path = None
+        # Generazione della cache per il video corrente: i frame del video
+        # precedente ancora in decodifica vengono scartati dalla cache
+        self.generation = frame_cache.generation
+        self.reopen = False
+        self.targets = {}
+        self.queue = []
+        self.queue_position = 0
+        self.decoded_bytes = 0
+        self.last_foreground = 0.0
+        self.total_frames = 0
+
+    # -- Chiamate dal thread della GUI -------------------------------------
+    def set_video(self, video_path, total_frames):
+        with self.condition:
+            self.video_path = video_path
+            self.total_frames = total_frames
+            self.generation = self.frame_cache.generation
+            self.reopen = True
+            self.targets = {}
+            self.rebuild_queue()
+            self.condition.notify()
+
+    def notify_foreground(self):
+        # Il player sta leggendo un frame: il prefetch aspetta
+        self.last_foreground = time.monotonic()
+
+    def set_target(self, name, priority, frames):
+        """
+        Sostituisce un gruppo di bersagli (es. 'hover', 'markers') con l'elenco
+        ordinato di frame indicato: vale sempre l'ultima richiesta.
+        """
+        with self.condition:
+            # Anche se il gruppo non cambia si riparte dall'inizio della coda:
+            # i frame nel frattempo scartati dalla cache vengono ridecodificati
+            self.targets[name] = (priority, [f for f in frames if 0 <= f < self.total_frames])
+            self.rebuild_queue()
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.wait()
+
+    # -- Thread di prefetch ------------------------------------------------
+    def rebuild_queue(self):
+        seen = set()
+        self.queue = []
+        for _, frames in sorted(self.targets.values(), key=lambda target: target[0]):
+            for index in frames:
+                if index not in seen:
+                    seen.add(index)
+                    self.queue.append(index)
+        self.queue_position = 0
+        self.decoded_bytes = 0
+
+    def next_index(self):
+        while self.queue_position < len(self.queue) and self.decoded_bytes < self.memory_budget:
+            index = self.queue[self.queue_position]
+            self.queue_position += 1
+            if not self.frame_cache.has_raw(index):
+                return index
+        return None
+
+    def run(self):
+        cap = None
+        next_frame = None
+        while True:
+            with self.condition:
+                if self.stopping:
+                    break
+                if self.reopen:
+                    if cap is not None:
+                        cap.release()
+                    cap = cv2.VideoCapture(self.video_path) if self.video_path else None
+                    next_frame = 0
+                    self.reopen = False
+                index = self.next_index() if cap is not None else None
+                generation = self.generation
+                if index is None:
+                    self.condition.wait()
+                    continue
+
+            # Già nel livello compresso: basta decomprimerlo, il decoder video non serve
+            frame = self.frame_cache.promote(index)
+            if frame is not None:
+                with self.condition:
+                    self.decoded_bytes += frame.nbytes
+                continue
+
+            idle = time.monotonic() - self.last_foreground
+            if idle < self.yield_seconds:
+                # Rimettiamo il frame in coda e lasciamo lavorare il decoder della GUI
+                with self.condition:
+                    self.queue_position = max(self.queue_position - 1, 0)
+                time.sleep(self.yield_seconds - idle)
+                continue
+
+            started = time.perf_counter()
+            if next_frame != index:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            ret, frame = cap.read()
+            if not ret:
+                next_frame = None
+                continue
+            next_frame = index + 1
+            self.frame_cache.put(index, frame, generation)
+            with self.condition:
+                self.decoded_bytes += frame.nbytes
+
+            elapsed = time.perf_counter() - started
+            time.sleep(elapsed * (1.0 - self.cpu_budget) / self.cpu_budget)
+
+        if cap is not None:
+            cap.release()
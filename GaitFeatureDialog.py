@@ -0,0 +1,123 @@
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLabel,
+                             QTabWidget, QTableView, QPushButton, QFileDialog, QMessageBox)
+
+
+class DataFrameModel(QAbstractTableModel):
+    """
+    Modello in sola lettura su un DataFrame: le celle vengono formattate solo
+    quando sono visibili, quindi anche 10^5 righe si aprono subito.
+    """
+
+    def __init__(self, frame=None, parent=None):
+        super().__init__(parent)
+        self.set_frame(frame)
+
+    def set_frame(self, frame):
+        self.beginResetModel()
+        self.frame = frame
+        self.columns = [] if frame is None else list(frame.columns)
+        self.arrays = [] if frame is None else [frame[column].values for column in self.columns]
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if self.frame is None else len(self.frame)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        value = self.arrays[index.column()][index.row()]
+        if isinstance(value, (float, np.floating)):
+            return "" if np.isnan(value) else f"{value:.3f}"
+        return str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section]
+        return str(section + 1)
+
+
+class GaitFeatureDialog(QDialog):
+    """
+    Finestra non modale con le caratteristiche per passo e per mezzo passo e
+    con la simmetria destra/sinistra. Il player la aggiorna quando cambiano i marker.
+    """
+
+    def __init__(self, player):
+        super().__init__(player)
+        self.player = player
+        self.setWindowTitle("Caratteristiche dei Passi")
+        self.resize(900, 500)
+
+        layout = QVBoxLayout(self)
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(QLabel("Dispositivo:"))
+        self.device_selector = QComboBox(self)
+        self.device_selector.currentIndexChanged.connect(self.refresh)
+        top_layout.addWidget(self.device_selector)
+        top_layout.addStretch()
+        self.summary_label = QLabel("", self)
+        top_layout.addWidget(self.summary_label)
+        layout.addLayout(top_layout)
+
+        self.tabs = QTabWidget(self)
+        self.steps_model = DataFrameModel(parent=self)
+        self.half_steps_model = DataFrameModel(parent=self)
+        self.symmetry_model = DataFrameModel(parent=self)
+        self.models = [self.steps_model, self.half_steps_model, self.symmetry_model]
+        for title, model in zip(("Passi", "Mezzi Passi", "Simmetria Dx/Sx"), self.models):
+            view = QTableView(self)
+            view.setModel(model)
+            view.verticalHeader().setDefaultSectionSize(20)
+            self.tabs.addTab(view, title)
+        layout.addWidget(self.tabs)
+
+        export_button = QPushButton("Esporta CSV", self)
+        export_button.clicked.connect(self.export_csv)
+        layout.addWidget(export_button, alignment=Qt.AlignRight)
+
+        self.update_devices()
+
+    def update_devices(self):
+        current = self.device_selector.currentData()
+        self.device_selector.blockSignals(True)
+        self.device_selector.clear()
+        for device in self.player.session or []:
+            self.device_selector.addItem(device.label, device.role)
+        index = self.device_selector.findData(current)
+        self.device_selector.setCurrentIndex(max(index, 0))
+        self.device_selector.blockSignals(False)
+        self.refresh()
+
+    def refresh(self):
+        # La simmetria riguarda entrambi i piedi: non dipende dal dispositivo scelto
+        self.symmetry_model.set_frame(self.player.gait_symmetry())
+        role = self.device_selector.currentData()
+        if role is None:
+            self.steps_model.set_frame(None)
+            self.half_steps_model.set_frame(None)
+            return
+        steps, half_steps = self.player.gait_features(role)
+        self.steps_model.set_frame(steps)
+        self.half_steps_model.set_frame(half_steps)
+        if len(steps):
+            self.summary_label.setText(f"{len(steps)} passi, durata media {np.nanmean(steps['Durata (s)']):.3f} s")
+        else:
+            self.summary_label.setText("Nessun marker per questo dispositivo")
+
+    def export_csv(self):
+        frame = self.models[self.tabs.currentIndex()].frame
+        if frame is None:
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Esporta Caratteristiche", "", "CSV (*.csv)")
+        if file_path:
+            try:
+                frame.to_csv(file_path, index=False)
+            except Exception as e:
+                QMessageBox.critical(self, "Errore", f"Impossibile salvare il file: {e}")
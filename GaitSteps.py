@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+
+
+def step_boundaries(step_markers, t_end):
+    """
+    Inizio e fine di ogni passo a partire dai marker di un piede.
+    Come nella visualizzazione, il primo passo parte da 0 e l'ultimo arriva
+    fino alla fine dei dati.
+    """
+    markers = np.sort(np.asarray(step_markers, dtype=np.float64))
+    if len(markers) == 0:
+        return markers, markers
+    if markers[0] > 0:
+        markers = np.concatenate(([0.0], markers))
+    if markers[-1] < t_end:
+        markers = np.concatenate((markers, [t_end]))
+    return markers[:-1], markers[1:]
+
+
+def step_splits(starts, ends, emiciclo_markers):
+    """
+    Punto di separazione dei mezzi passi: il primo marker emiciclo strettamente
+    interno al passo, altrimenti il punto medio. Restituisce anche la maschera
+    dei passi che hanno un marker emiciclo.
+    """
+    emicicli = np.sort(np.asarray(emiciclo_markers, dtype=np.float64))
+    idx = np.searchsorted(emicicli, starts, side='right')
+    candidate = emicicli[np.minimum(idx, len(emicicli) - 1)] if len(emicicli) else np.full(len(starts), np.inf)
+    has_emiciclo = (idx < len(emicicli)) & (candidate < ends)
+    splits = np.where(has_emiciclo, candidate, (starts + ends) / 2)
+    return splits, has_emiciclo
+
+
+def step_segments(step_markers, emiciclo_markers, t_end):
+    # Lista di (numero passo, inizio, fine, separazione dei mezzi passi)
+    starts, ends = step_boundaries(step_markers, t_end)
+    splits, _ = step_splits(starts, ends, emiciclo_markers)
+    return [(i + 1, float(s), float(e), float(m))
+            for i, (s, e, m) in enumerate(zip(starts, ends, splits))]
+
+
+# Canali per cui si calcolano picco e media (pressione) e ampiezza (giroscopio)
+PRESSURE_CHANNELS = ["S0", "S1", "S2"]
+GYRO_CHANNELS = ["Gx", "Gy", "Gz"]
+
+
+def segment_reductions(values, bounds, end):
+    """
+    Somma, massimo e minimo di values su ogni segmento [bounds[k], bounds[k+1])
+    (l'ultimo fino a 'end') con un solo reduceat per riduzione. I segmenti vuoti
+    restituiscono NaN.
+    """
+    lengths = np.diff(np.append(bounds, end))
+    empty = lengths <= 0
+    values = values[:end]
+    starts = np.minimum(bounds, max(len(values) - 1, 0))
+    if len(values) == 0:
+        nan = np.full(len(bounds), np.nan)
+        return nan, nan, nan, lengths
+    sums = np.add.reduceat(values, starts, dtype=np.float64)
+    maxima = np.maximum.reduceat(values, starts).astype(np.float64)
+    minima = np.minimum.reduceat(values, starts).astype(np.float64)
+    for array in (sums, maxima, minima):
+        array[empty] = np.nan
+    return sums, maxima, minima, lengths
+
+
+def gait_feature_tables(store, step_markers, emiciclo_markers):
+    """
+    Tabelle delle caratteristiche per passo e per mezzo passo di un dispositivo.
+    Le riduzioni si fanno una sola volta sui mezzi passi (confini inizio,
+    separazione, inizio successivo...) e i valori dei passi interi si ottengono
+    combinando le due metà.
+    """
+    starts, ends = step_boundaries(step_markers, store.t_max)
+    splits, has_emiciclo = step_splits(starts, ends, emiciclo_markers)
+    n_steps = len(starts)
+
+    # Confini dei mezzi passi alternati: inizio_0, sep_0, inizio_1, sep_1, ...
+    half_times = np.column_stack((starts, splits)).ravel()
+    half_bounds = np.searchsorted(store.time, half_times, side='left')
+    end = int(np.searchsorted(store.time, ends[-1], side='right')) if n_steps else 0
+    # I passi sono contigui: l'ultimo confine è la fine dell'ultimo passo
+    half_ends = np.append(half_times[1:], ends[-1:]) if n_steps else half_times
+
+    durations = ends - starts
+    steps = {
+        'Passo': np.arange(1, n_steps + 1),
+        'Inizio (s)': starts,
+        'Fine (s)': ends,
+        'Durata (s)': durations,
+        'Cadenza (cicli/min)': np.divide(60.0, durations, out=np.full(n_steps, np.nan), where=durations > 0),
+        'Appoggio (s)': np.where(has_emiciclo, splits - starts, np.nan),
+        'Oscillazione (s)': np.where(has_emiciclo, ends - splits, np.nan),
+    }
+    steps['Appoggio (%)'] = np.divide(100.0 * steps['Appoggio (s)'], durations,
+                                      out=np.full(n_steps, np.nan), where=durations > 0)
+    halves = {
+        'Passo': np.repeat(np.arange(1, n_steps + 1), 2),
+        'Metà': np.tile([1, 2], n_steps),
+        'Inizio (s)': half_times,
+        'Fine (s)': half_ends,
+        'Durata (s)': half_ends - half_times,
+    }
+
+    for column in PRESSURE_CHANNELS + GYRO_CHANNELS:
+        if not store.has_column(column):
+            continue
+        sums, maxima, minima, counts = segment_reductions(store.column(column), half_bounds, end)
+        # Passo intero = unione delle due metà
+        step_sums = np.nansum(sums.reshape(-1, 2), axis=1)
+        step_counts = counts.reshape(-1, 2).sum(axis=1)
+        step_max = np.fmax(maxima[0::2], maxima[1::2])
+        step_min = np.fmin(minima[0::2], minima[1::2])
+        if column in PRESSURE_CHANNELS:
+            steps[f'{column} picco'] = step_max
+            steps[f'{column} media'] = np.divide(step_sums, step_counts, out=np.full(n_steps, np.nan),
+                                                 where=step_counts > 0)
+            halves[f'{column} picco'] = maxima
+            halves[f'{column} media'] = np.divide(sums, counts, out=np.full(len(sums), np.nan),
+                                                  where=counts > 0)
+        else:
+            steps[f'{column} ampiezza'] = step_max - step_min
+            halves[f'{column} ampiezza'] = maxima - minima
+
+    return pd.DataFrame(steps), pd.DataFrame(halves)
+
+
+def normalize_steps(time, values, starts, ends, points=101):
+    """
+    Ricampiona ogni passo su una griglia fissa 0-100% del ciclo con un'unica
+    chiamata a np.interp. Restituisce una matrice (n_passi x points).
+    """
+    percent = np.linspace(0.0, 1.0, points)
+    grid = starts[:, np.newaxis] + percent[np.newaxis, :] * (ends - starts)[:, np.newaxis]
+    return np.interp(grid.ravel(), time, values).reshape(len(starts), points).astype(np.float32)
+
+
+def symmetry_index(right, left):
+    # Indice di simmetria (%): 0 = simmetrico, positivo se il destro è maggiore
+    total = right + left
+    return np.divide(200.0 * (right - left), total, out=np.full(len(total), np.nan), where=total > 0)
+
+
+def strike_cycles(step_markers, emiciclo_markers):
+    """
+    Contatti di un piede, con fine del ciclo (contatto successivo, NaN per
+    l'ultimo) e distacco (primo marker emiciclo interno al ciclo, altrimenti NaN).
+    """
+    strikes = np.unique(np.asarray(step_markers, dtype=np.float64))
+    ends = np.append(strikes[1:], np.nan)
+    splits, has_emiciclo = step_splits(strikes, np.where(np.isnan(ends), np.inf, ends), emiciclo_markers)
+    return strikes, ends, np.where(has_emiciclo, splits, np.nan)
+
+
+def gait_symmetry_table(right_markers, left_markers, right_emicicli, left_emicicli):
+    """
+    Abbina ogni contatto destro al contatto sinistro precedente e a quello
+    successivo (as-of join con searchsorted) e calcola per ogni ciclo destro
+    tempi del passo, doppio appoggio e indici di simmetria. Una riga per
+    contatto destro; i valori non definiti (piede senza contatto prima o dopo,
+    marker emiciclo mancanti) sono NaN.
+    """
+    r_strike, r_end, r_toe_off = strike_cycles(right_markers, right_emicicli)
+    l_strike, l_end, l_toe_off = strike_cycles(left_markers, left_emicicli)
+    n = len(r_strike)
+
+    def take(values, index):
+        valid = (index >= 0) & (index < len(values))
+        out = np.full(n, np.nan)
+        out[valid] = values[index[valid]]
+        return out
+
+    next_index = np.searchsorted(l_strike, r_strike, side='left')
+    prev_index = next_index - 1
+    left_prev = take(l_strike, prev_index)
+    left_next = take(l_strike, next_index)
+    nearest = np.where(np.isnan(left_next) | (r_strike - left_prev <= left_next - r_strike), left_prev, left_next)
+
+    # Tempo del passo: dal contatto dell'altro piede al proprio
+    step_right = r_strike - left_prev
+    step_left = left_next - r_strike
+    stride_right = r_end - r_strike
+    stride_left = take(l_end, next_index) - left_next
+    stance_right = r_toe_off - r_strike
+    stance_left = take(l_toe_off, next_index) - left_next
+
+    # Doppio appoggio: dal contatto destro al distacco sinistro e dal contatto
+    # sinistro al distacco destro (zero se il distacco avviene prima)
+    initial_support = np.clip(take(l_toe_off, prev_index) - r_strike, 0.0, None)
+    terminal_support = np.clip(r_toe_off - left_next, 0.0, None)
+    double_support = initial_support + terminal_support
+
+    return pd.DataFrame({
+        'Passo Dx': np.arange(1, n + 1),
+        'Contatto Dx (s)': r_strike,
+        'Contatto Sx Precedente (s)': left_prev,
+        'Contatto Sx Successivo (s)': left_next,
+        'Contatto Sx Più Vicino (s)': nearest,
+        'Tempo Passo Dx (s)': step_right,
+        'Tempo Passo Sx (s)': step_left,
+        'Asimmetria Tempo Passo (s)': step_right - step_left,
+        'Doppio Appoggio Iniziale (s)': initial_support,
+        'Doppio Appoggio Terminale (s)': terminal_support,
+        'Doppio Appoggio (s)': double_support,
+        'Doppio Appoggio (%)': np.divide(100.0 * double_support, stride_right, out=np.full(n, np.nan),
+                                         where=stride_right > 0),
+        'SI Tempo Passo (%)': symmetry_index(step_right, step_left),
+        'SI Durata Ciclo (%)': symmetry_index(stride_right, stride_left),
+        'SI Appoggio (%)': symmetry_index(stance_right, stance_left),
+    })
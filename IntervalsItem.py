@@ -0,0 +1,41 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QRectF
+
+
+class IntervalsItem(pg.GraphicsObject):
+    """
+    Tutti gli intervalli evidenziati in un solo item: a ogni disegno si
+    tracciano solo quelli visibili, a tutta altezza. Gli eventi istantanei
+    hanno larghezza minima di due pixel.
+    """
+
+    def __init__(self, starts, ends, color=(255, 215, 0, 70)):
+        super().__init__()
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        self.brush = pg.mkBrush(color)
+        self.setZValue(-20)
+
+    def viewRangeChanged(self):
+        self.prepareGeometryChange()
+        self.update()
+
+    def boundingRect(self):
+        view = self.viewRect()
+        if view is None or not len(self.starts):
+            return QRectF()
+        width = self.ends[-1] - self.starts[0] + 2 * (self.pixelWidth() or 0.0)
+        return QRectF(self.starts[0], view.top(), width, view.height())
+
+    def paint(self, painter, *args):
+        view = self.viewRect()
+        if view is None or not len(self.starts):
+            return
+        first = np.searchsorted(self.ends, view.left(), side='left')
+        last = np.searchsorted(self.starts, view.right(), side='right')
+        min_width = 2 * (self.pixelWidth() or 0.0)
+        painter.setPen(pg.mkPen(None))
+        painter.setBrush(self.brush)
+        painter.drawRects([QRectF(s, view.top(), max(e - s, min_width), view.height())
+                           for s, e in zip(self.starts[first:last], self.ends[first:last])])
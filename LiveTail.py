@@ -0,0 +1,195 @@
+import io
+import os
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+from SensorStore import SENSORIA_HEADER_ROWS, SENSOR_CHANNELS, sensoria_nanoseconds
+from SensorSession import read_sensoria_header
+
+# Byte letti al massimo a ogni aggiornamento: un file già lungo si recupera in più passi
+MAX_READ_BYTES = 4 * 1024 * 1024
+# Capacità iniziale dei buffer circolari (campioni); raddoppia fino al massimo
+INITIAL_CAPACITY = 4096
+
+
+class LiveRing:
+    """
+    Ultimi max_samples campioni di un dispositivo in acquisizione, su un buffer
+    circolare preallocato che cresce per raddoppi fino a max_samples e poi
+    sovrascrive i più vecchi: la memoria resta costante anche per ore.
+    Ogni campione è scritto in due posizioni (i e i + capacità), così i
+    campioni presenti sono sempre contigui e si leggono come viste, senza copie.
+    """
+
+    def __init__(self, columns, max_samples, initial_capacity=INITIAL_CAPACITY):
+        self.columns = list(columns)
+        self.column_index = {name: i for i, name in enumerate(self.columns)}
+        self.max_samples = max_samples
+        self.allocate(min(initial_capacity, max_samples))
+        # Campioni ricevuti dall'inizio, anche quelli ormai scartati
+        self.total = 0
+
+    def allocate(self, capacity):
+        self.capacity = capacity
+        self.time_buffer = np.empty(2 * capacity, dtype=np.float64)
+        self.data_buffer = np.empty((len(self.columns), 2 * capacity), dtype=np.float32)
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def time(self):
+        return self.time_buffer[self.start:self.start + self.count]
+
+    def column(self, name):
+        return self.data_buffer[self.column_index[name], self.start:self.start + self.count]
+
+    def grow(self, capacity):
+        time_values, data = self.time.copy(), self.data_buffer[:, self.start:self.start + self.count].copy()
+        self.allocate(capacity)
+        self.write(time_values, data)
+
+    def append(self, time_values, data):
+        n = len(time_values)
+        if not n:
+            return
+        self.total += n
+        if self.count + n > self.capacity and self.capacity < self.max_samples:
+            self.grow(min(max(2 * self.capacity, self.count + n), self.max_samples))
+        if n > self.capacity:
+            time_values, data = time_values[-self.capacity:], data[:, -self.capacity:]
+        self.write(time_values, data)
+
+    def write(self, time_values, data):
+        n = len(time_values)
+        positions = (self.start + self.count + np.arange(n)) % self.capacity
+        for offset in (0, self.capacity):
+            self.time_buffer[positions + offset] = time_values
+            self.data_buffer[:, positions + offset] = data
+        self.count += n
+        if self.count > self.capacity:
+            self.start = (self.start + self.count - self.capacity) % self.capacity
+            self.count = self.capacity
+
+
+class CsvTail:
+    """
+    Lettura incrementale di un file Sensoria che l'app sta ancora scrivendo.
+    Si aspetta che l'intestazione sia completa, poi a ogni read_new() si
+    analizzano solo i byte aggiunti dopo l'ultima lettura; una riga scritta a
+    metà resta per la lettura successiva. Se il file viene accorciato o
+    sostituito si riparte dall'inizio.
+    """
+
+    def __init__(self, csv_filePath, columns=None):
+        self.csv_filePath = csv_filePath
+        self.wanted = list(columns or SENSOR_CHANNELS)
+        self.header = {}
+        self.columns = []
+        self.names = None
+        self.offset = None
+
+    def read_header(self):
+        with open(self.csv_filePath, 'rb') as f:
+            lines = []
+            for _ in range(SENSORIA_HEADER_ROWS + 1):
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    return False
+                lines.append(line)
+            offset = f.tell()
+        self.names = lines[-1].decode('utf-8', errors='replace').strip().split(',')
+        if 'Timestamp' not in self.names:
+            return False
+        self.header = read_sensoria_header(self.csv_filePath)
+        # Alcuni dispositivi non hanno tutti i canali (es. IMU senza pressione)
+        self.columns = [column for column in self.wanted if column in self.names]
+        self.offset = offset
+        return True
+
+    def read_new(self):
+        """
+        Righe complete aggiunte dall'ultima chiamata: (tempi in secondi dalla
+        mezzanotte, matrice float32 canali x campioni), None se non c'è niente.
+        """
+        try:
+            if self.offset is not None and os.path.getsize(self.csv_filePath) < self.offset:
+                self.offset = None
+            if self.offset is None and not self.read_header():
+                return None
+            with open(self.csv_filePath, 'rb') as f:
+                f.seek(self.offset)
+                chunk = f.read(MAX_READ_BYTES)
+        except OSError:
+            return None
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return None
+        chunk = chunk[:end + 1]
+        self.offset += len(chunk)
+
+        wanted = set(self.columns) | {'Timestamp'}
+        raw = pd.read_csv(io.BytesIO(chunk), header=None, names=self.names,
+                          usecols=lambda name: name in wanted)
+        valid, nanoseconds = sensoria_nanoseconds(raw['Timestamp'])
+        if not len(nanoseconds):
+            return None
+        data = np.empty((len(self.columns), len(nanoseconds)), dtype=np.float32)
+        for i, column in enumerate(self.columns):
+            data[i] = pd.to_numeric(raw[column], errors='coerce').values[valid]
+        return nanoseconds / 1e9, data
+
+
+class CsvReplayWriter(threading.Thread):
+    """
+    Sostituto dell'app Sensoria per le prove: riscrive un file registrato in
+    target_path al ritmo dei suoi Timestamp (moltiplicato per speed), prima
+    l'intestazione e poi le righe a piccoli blocchi, come durante un'acquisizione.
+    """
+
+    def __init__(self, source_path, target_path, speed=1.0, interval=0.05):
+        super().__init__(daemon=True)
+        self.source_path = source_path
+        self.target_path = target_path
+        self.speed = speed
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        with open(self.source_path, 'rb') as f:
+            lines = f.readlines()
+        header, rows = lines[:SENSORIA_HEADER_ROWS + 1], lines[SENSORIA_HEADER_ROWS + 1:]
+        column = header[-1].decode('utf-8', errors='replace').strip().split(',').index('Timestamp')
+        timestamps = pd.Series([row.split(b',')[column].decode('ascii', errors='replace') for row in rows])
+        valid, nanoseconds = sensoria_nanoseconds(timestamps)
+        # Le righe senza tempo valido escono insieme alla precedente
+        offsets = np.zeros(len(rows))
+        if len(nanoseconds):
+            offsets[valid] = (nanoseconds - nanoseconds[0]) / 1e9
+            offsets = np.maximum.accumulate(offsets)
+
+        with open(self.target_path, 'wb') as out:
+            out.writelines(header)
+            out.flush()
+            started = time.monotonic()
+            written = 0
+            while written < len(rows) and not self.stop_event.wait(self.interval):
+                elapsed = (time.monotonic() - started) * self.speed
+                stop = int(np.searchsorted(offsets, elapsed, side='right'))
+                out.writelines(rows[written:stop])
+                out.flush()
+                written = stop
+
+
+if __name__ == "__main__":
+    # python LiveTail.py data/destro.csv cartella_live/destro.csv [velocità]
+    writer = CsvReplayWriter(sys.argv[1], sys.argv[2], float(sys.argv[3]) if len(sys.argv) > 3 else 1.0)
+    writer.start()
+    writer.join()
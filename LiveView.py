@@ -0,0 +1,136 @@
+import os
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLabel
+from LiveTail import CsvTail, LiveRing
+from SensorSession import LOCATION_ROLES, ROLE_LABELS, ROLE_COLORS, EXTRA_COLORS, CHANNEL_GROUPS
+
+# Aggiornamenti al secondo di grafici e lettura dei file
+LIVE_REFRESH_HZ = 20
+# Secondi mostrati nei grafici e secondi tenuti in memoria per dispositivo
+LIVE_WINDOW_SECONDS = 10.0
+LIVE_HISTORY_SECONDS = 120.0
+# Frequenza usata per dimensionare i buffer se l'intestazione non la indica
+DEFAULT_SAMPLING_HZ = 100.0
+
+
+class LiveView(QDialog):
+    """
+    Acquisizione in corso: segue i file CSV di una cartella mentre l'app
+    Sensoria li scrive e mostra gli ultimi secondi di ogni dispositivo.
+    A ogni aggiornamento si leggono solo i byte nuovi, i campioni finiscono in
+    buffer circolari di dimensione fissa e le curve ricevono viste sui buffer:
+    grafici e memoria non crescono con la durata della registrazione.
+    """
+
+    def __init__(self, player, folder_path):
+        super().__init__(player)
+        self.player = player
+        self.folder_path = folder_path
+        self.setWindowTitle(f"Acquisizione Live - {os.path.basename(folder_path)}")
+        self.resize(900, 600)
+        # Percorso -> (CsvTail, LiveRing o None finché l'intestazione non è completa)
+        self.tails = {}
+        self.panels = {}
+        # Zero dell'asse dei tempi: il primo campione arrivato, in secondi dalla mezzanotte
+        self.origin = None
+
+        layout = QVBoxLayout(self)
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(QLabel("Canali:"))
+        self.group_selector = QComboBox(self)
+        for name, columns in CHANNEL_GROUPS:
+            self.group_selector.addItem(f"{name} ({', '.join(columns)})", columns)
+        self.group_selector.currentIndexChanged.connect(self.update_curves)
+        top_layout.addWidget(self.group_selector)
+        top_layout.addStretch()
+        self.status_label = QLabel("In attesa dei file CSV...", self)
+        top_layout.addWidget(self.status_label)
+        layout.addLayout(top_layout)
+
+        self.plots_layout = QVBoxLayout()
+        layout.addLayout(self.plots_layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        for file in sorted(os.listdir(self.folder_path)):
+            path = os.path.join(self.folder_path, file)
+            if file.lower().endswith('.csv') and path not in self.tails:
+                self.tails[path] = (CsvTail(path), None)
+
+        for path, (tail, ring) in self.tails.items():
+            result = tail.read_new()
+            if result is None:
+                continue
+            time_values, data = result
+            if ring is None:
+                ring = self.create_device(path, tail)
+            if self.origin is None:
+                self.origin = float(time_values[0])
+            ring.append(time_values - self.origin, data)
+
+        latest = max((ring.time[-1] for _, ring in self.tails.values() if ring is not None and len(ring)),
+                     default=None)
+        if latest is None:
+            return
+        for path, (plot_widget, curves) in self.panels.items():
+            ring = self.tails[path][1]
+            i0 = int(np.searchsorted(ring.time, latest - LIVE_WINDOW_SECONDS))
+            time_values = ring.time[i0:]
+            for column, curve in curves:
+                curve.setData(time_values, ring.column(column)[i0:])
+            plot_widget.setXRange(latest - LIVE_WINDOW_SECONDS, latest, padding=0)
+        self.status_label.setText(" | ".join(
+            f"{self.panels[path][0].device_label}: {ring.total} campioni"
+            for path, (_, ring) in self.tails.items() if ring is not None))
+
+    def create_device(self, path, tail):
+        # Un grafico per file, creato una volta sola quando l'intestazione è completa
+        try:
+            rate = float(tail.header.get('SamplingFrequency', DEFAULT_SAMPLING_HZ))
+        except ValueError:
+            rate = DEFAULT_SAMPLING_HZ
+        ring = LiveRing(tail.columns, int(LIVE_HISTORY_SECONDS * rate))
+        self.tails[path] = (tail, ring)
+
+        role = LOCATION_ROLES.get(tail.header.get('Location', ''))
+        name = tail.header.get('DeviceName', os.path.basename(path))
+        plot_widget = pg.PlotWidget()
+        plot_widget.device_label = ROLE_LABELS.get(role, (name, name))[0]
+        plot_widget.colors = ROLE_COLORS.get(role, EXTRA_COLORS[len(self.panels) % len(EXTRA_COLORS)])
+        plot_widget.setTitle(plot_widget.device_label)
+        plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        plot_widget.setLabel('bottom', 'Tempo (s)')
+        plot_widget.enableAutoRange(axis='y')
+        plot_widget.setAutoVisible(y=True)
+        self.plots_layout.addWidget(plot_widget)
+        self.panels[path] = (plot_widget, [])
+        self.update_curves()
+        return ring
+
+    def update_curves(self):
+        columns = self.group_selector.currentData()
+        for path, (plot_widget, curves) in self.panels.items():
+            for _, curve in curves:
+                plot_widget.removeItem(curve)
+            ring = self.tails[path][1]
+            curves = []
+            for i, column in enumerate(columns):
+                if column in ring.columns:
+                    pen = pg.mkPen(color=plot_widget.colors[i % len(plot_widget.colors)], width=2)
+                    curves.append((column, plot_widget.plot(pen=pen, connect='finite')))
+            self.panels[path] = (plot_widget, curves)
+
+    def showEvent(self, event):
+        # Anche al ripristino dopo la riduzione a icona: i byte arrivati nel
+        # frattempo si leggono al primo aggiornamento
+        super().showEvent(event)
+        self.timer.start(int(1000 / LIVE_REFRESH_HZ))
+
+    def hideEvent(self, event):
+        # Finestra chiusa o ridotta a icona: si smette di leggere i file
+        self.timer.stop()
+        super().hideEvent(event)
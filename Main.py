@@ -1,8 +1,11 @@
 import sys
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from BaseVideoPlayer import BaseVideoPlayer
 
 if __name__ == "__main__":
+    # Necessario per i processi dell'export video nell'eseguibile PyInstaller
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
 
     try:
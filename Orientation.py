@@ -0,0 +1,101 @@
+import numpy as np
+
+# Costante di tempo del filtro complementare (secondi): il peso del giroscopio
+# per ogni campione è tau / (tau + dt), quindi non dipende dal jitter dei tempi
+TIME_CONSTANT = 1.0
+# Campioni per blocco nella soluzione a blocchi della ricorsione
+SCAN_BLOCK = 256
+
+ORIENTATION_OUTPUTS = ['Roll', 'Pitch', 'Yaw', 'Qw', 'Qx', 'Qy', 'Qz']
+
+
+def first_order_scan(inputs, weights, initial, block=SCAN_BLOCK):
+    """
+    Soluzione di y[k] = weights[k] * y[k-1] + inputs[k] senza ciclo per
+    campione: dentro ogni blocco, con P[k] il prodotto dei pesi fino a k,
+    y[k] = P[k] * (y0 + sum_j inputs[j] / P[j]), con una cumprod e una cumsum;
+    lo stato passa da un blocco al successivo. I blocchi limitano 1 / P[k],
+    quindi il calcolo resta stabile.
+    """
+    output = np.empty(len(inputs), dtype=np.float64)
+    weights = np.broadcast_to(np.asarray(weights, dtype=np.float64), np.shape(inputs))
+    state = initial
+    for start in range(0, len(inputs), block):
+        chunk = inputs[start:start + block]
+        p = np.cumprod(weights[start:start + block])
+        values = p * (state + np.cumsum(chunk / p))
+        output[start:start + len(chunk)] = values
+        state = values[-1]
+    return output
+
+
+def complementary_filter(rates, measured, dt, tau):
+    """
+    Filtro complementare su un angolo: integra la velocità angolare e lo
+    corregge lentamente verso l'angolo misurato (accelerometro o magnetometro).
+    Il peso di ogni campione viene dal suo intervallo dt, così campioni
+    ravvicinati o distanti pesano per il tempo che coprono.
+    Gli angoli sono srotolati per non saltare a ±180°.
+    """
+    measured = np.unwrap(measured)
+    weight = tau / (tau + dt)
+    inputs = weight * rates * dt + (1.0 - weight) * measured
+    # Si parte dall'angolo misurato, così y[0] = measured[0]
+    return first_order_scan(inputs, weight, measured[0])
+
+
+def euler_to_quaternion(roll, pitch, yaw):
+    # Convenzione ZYX (yaw, pitch, roll), angoli in radianti
+    cr, sr = np.cos(roll / 2), np.sin(roll / 2)
+    cp, sp = np.cos(pitch / 2), np.sin(pitch / 2)
+    cy, sy = np.cos(yaw / 2), np.sin(yaw / 2)
+    return (cr * cp * cy + sr * sp * sy,
+            sr * cp * cy - cr * sp * sy,
+            cr * sp * cy + sr * cp * sy,
+            cr * cp * sy - sr * sp * cy)
+
+
+def estimate_orientation(time, acc, gyro, mag=None, tau=TIME_CONSTANT):
+    """
+    Orientamento di un dispositivo per tutta la sessione con un filtro
+    complementare. acc in g, gyro in °/s, mag (opzionale) in qualsiasi unità:
+    senza magnetometro lo yaw è solo l'integrale del giroscopio.
+    Restituisce un dizionario con Roll, Pitch, Yaw (gradi) e il quaternione
+    Qw, Qx, Qy, Qz, tutti float32.
+    """
+    ax, ay, az = (np.asarray(row, dtype=np.float64) for row in acc)
+    p, q, r = (np.radians(np.asarray(row, dtype=np.float64)) for row in gyro)
+    dt = np.diff(time, prepend=time[0]) if len(time) else np.zeros(0)
+
+    # Angoli dall'accelerometro (gravità)
+    roll_acc = np.arctan2(ay, az)
+    pitch_acc = np.arctan2(-ax, np.sqrt(ay * ay + az * az))
+
+    # Velocità angolari del corpo -> derivate degli angoli di Eulero, usando
+    # gli angoli dell'accelerometro per la trasformazione (tutto vettoriale)
+    sin_roll, cos_roll = np.sin(roll_acc), np.cos(roll_acc)
+    cos_pitch = np.clip(np.cos(pitch_acc), 1e-3, None)
+    tan_pitch = np.tan(pitch_acc)
+    roll_rate = p + (sin_roll * q + cos_roll * r) * tan_pitch
+    pitch_rate = cos_roll * q - sin_roll * r
+    yaw_rate = (sin_roll * q + cos_roll * r) / cos_pitch
+
+    roll = complementary_filter(roll_rate, roll_acc, dt, tau)
+    pitch = complementary_filter(pitch_rate, pitch_acc, dt, tau)
+
+    if mag is not None:
+        mx, my, mz = (np.asarray(row, dtype=np.float64) for row in mag)
+        # Bussola compensata in inclinazione con gli angoli già filtrati
+        sin_r, cos_r = np.sin(roll), np.cos(roll)
+        sin_p, cos_p = np.sin(pitch), np.cos(pitch)
+        x_h = mx * cos_p + my * sin_p * sin_r + mz * sin_p * cos_r
+        y_h = my * cos_r - mz * sin_r
+        yaw = complementary_filter(yaw_rate, np.arctan2(-y_h, x_h), dt, tau)
+    else:
+        yaw = np.cumsum(yaw_rate * dt)
+
+    # Angoli riportati in (-180°, 180°]
+    roll, pitch, yaw = (np.angle(np.exp(1j * angle)) for angle in (roll, pitch, yaw))
+    qw, qx, qy, qz = euler_to_quaternion(roll, pitch, yaw)
+    values = [np.degrees(roll), np.degrees(pitch), np.degrees(yaw), qw, qx, qy, qz]
+    return {name: value.astype(np.float32) for name, value in zip(ORIENTATION_OUTPUTS, values)}
@@ -0,0 +1,51 @@
+import time
+import numpy as np
+
+
+class PlaybackClock:
+    """
+    Orologio della riproduzione: la posizione dipende dal tempo reale trascorso,
+    non dal numero di tick del timer. A velocità alte o con tick in ritardo si
+    saltano frame invece di rallentare. L'orologio avanza nel tempo del video e
+    il frame si trova nella tabella dei tempi, quindi vale anche per i video a
+    frame rate variabile. rate è in secondi di video al secondo, negativo
+    all'indietro.
+    """
+
+    def __init__(self):
+        self.start_frame = 0
+        self.start_time = 0.0
+        self.rate = 0.0
+        self.timestamps = np.zeros(1)
+
+    def start(self, frame, timestamps, speed, direction=1):
+        self.start_frame = frame
+        self.timestamps = timestamps
+        self.start_time = time.monotonic()
+        self.rate = speed * (1 if direction >= 0 else -1)
+
+    def video_time(self):
+        # Tempo del video ora, continuo (non arrotondato al frame)
+        if not len(self.timestamps):
+            return 0.0
+        return self.timestamps[self.start_frame] + (time.monotonic() - self.start_time) * self.rate
+
+    def frame(self):
+        """
+        Frame da mostrare ora: -1 prima dell'inizio (indietro) e
+        len(timestamps) dopo la fine dell'ultimo frame.
+        """
+        timestamps = self.timestamps
+        if not len(timestamps):
+            return self.start_frame
+        video_time = self.video_time()
+        index = int(np.searchsorted(timestamps, video_time, side='right')) - 1
+        if index == len(timestamps) - 1 and len(timestamps) > 1:
+            last_duration = timestamps[-1] - timestamps[-2]
+            if video_time >= timestamps[-1] + last_duration:
+                return len(timestamps)
+        return index
+
+    @property
+    def direction(self):
+        return 1 if self.rate >= 0 else -1
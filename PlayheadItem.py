@@ -0,0 +1,101 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QPointF, QRectF
+from PyQt5.QtGui import QPixmapCache
+from PyQt5.QtWidgets import QGraphicsItem
+
+# Limite predefinito di Qt per la cache dei pixmap (KB): non si scende mai sotto
+DEFAULT_PIXMAP_CACHE_KB = 10 * 1024
+
+
+def cache_static_items(plot_widget, exclude=()):
+    """
+    Il contenuto fisso di un grafico (curve, griglia, marker, regioni) viene
+    disegnato una volta in un pixmap per item e poi solo copiato. Qt rigenera
+    il pixmap quando l'item cambia (dati, marker) o cambia il range della vista.
+    """
+    items = list(plot_widget.getPlotItem().items)
+    items += [plot_widget.getAxis(name) for name in ('left', 'bottom')]
+    cached = []
+    while items:
+        item = items.pop()
+        if item in exclude:
+            continue
+        item.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+        cached.append(item)
+        items.extend(item.childItems())
+    fit_pixmap_cache(plot_widget, cached)
+
+
+def fit_pixmap_cache(plot_widget, items):
+    """
+    La cache dei pixmap di Qt è globale: il limite si ricalcola dalla somma
+    delle aree in pixel degli item in cache di tutti i grafici aperti, così
+    i pixmap di un grafico non scartano quelli degli altri.
+    """
+    visible = QRectF(plot_widget.rect())
+    ratio = plot_widget.devicePixelRatioF()
+    pixels = 0.0
+    for item in items:
+        rect = plot_widget.mapFromScene(item.sceneBoundingRect()).boundingRect()
+        area = visible.intersected(QRectF(rect))
+        pixels += area.width() * area.height()
+    plot_widget.pixmap_bytes = pixels * ratio * ratio * 4
+    # Tutti i grafici della finestra (quello nuovo può non esservi ancora inserito),
+    # con un margine per gli arrotondamenti e per i pixmap di altri widget
+    plots = set(plot_widget.window().findChildren(pg.PlotWidget)) | {plot_widget}
+    needed_kb = int(1.25 * sum(getattr(plot, 'pixmap_bytes', 0) for plot in plots) / 1024)
+    QPixmapCache.setCacheLimit(max(DEFAULT_PIXMAP_CACHE_KB, needed_kb))
+
+
+class PlayheadItem(pg.GraphicsObject):
+    """
+    Cursore di riproduzione di un grafico: linea verticale e un punto per ogni
+    curva in un solo item leggero. Va aggiunto con ignoreBounds=True: spostarlo
+    non ricalcola l'autorange e ridisegna solo la striscia tra la vecchia e la
+    nuova posizione, mentre il resto del grafico arriva dai pixmap in cache.
+    """
+
+    def __init__(self, colors, radius=5):
+        super().__init__()
+        self.radius = radius
+        self.brushes = [pg.mkBrush(color) for color in colors]
+        self.line_pen = pg.mkPen(color=(255, 215, 0, 160), width=1)
+        self.point_pen = pg.mkPen(color=(0, 0, 0, 160), width=1)
+        self.x = None
+        self.ys = np.zeros(0)
+        self.setZValue(50)
+
+    def set_position(self, x, ys):
+        self.prepareGeometryChange()
+        self.x = float(x)
+        self.ys = np.asarray(ys, dtype=np.float64)
+        self.update()
+
+    def viewRangeChanged(self):
+        self.prepareGeometryChange()
+        self.update()
+
+    def boundingRect(self):
+        view = self.viewRect()
+        if view is None or self.x is None:
+            return QRectF()
+        half = (self.radius + 2) * (self.pixelWidth() or 0.0)
+        return QRectF(self.x - half, view.top(), 2 * half, view.height())
+
+    def paint(self, painter, *args):
+        view = self.viewRect()
+        if view is None or self.x is None:
+            return
+        painter.setPen(self.line_pen)
+        painter.drawLine(QPointF(self.x, view.top()), QPointF(self.x, view.bottom()))
+
+        # I punti in pixel, così restano tondi qualunque sia la scala degli assi
+        transform = painter.transform()
+        painter.resetTransform()
+        painter.setPen(self.point_pen)
+        for y, brush in zip(self.ys, self.brushes):
+            if np.isfinite(y):
+                painter.setBrush(brush)
+                painter.drawEllipse(transform.map(QPointF(self.x, y)), self.radius, self.radius)
+        painter.setTransform(transform)
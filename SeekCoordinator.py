@@ -0,0 +1,71 @@
+from PyQt5.QtCore import QObject, QTimer
+
+
+class SeekCoordinator(QObject):
+    """
+    Coordina gli spostamenti rapidi (slider, trascinamento sui grafici): ogni
+    richiesta sostituisce quella in attesa. Se il frame è già in cache, o il
+    decoder è appena prima di esso, viene mostrato subito; altrimenti si mostra
+    il frame in cache più vicino (o quello del proxy) e si decodifica il frame
+    esatto solo quando l'input si ferma per settle_ms. Così a cursore lento si
+    vede ogni frame, a cursore veloce si decodifica solo l'ultimo bersaglio.
+    """
+
+    def __init__(self, player, settle_ms=80, max_approx_distance=None, sequential_window=4):
+        super().__init__(player)
+        self.player = player
+        self.target = None
+        self.max_approx_distance = max_approx_distance
+        self.sequential_window = sequential_window
+        # Fonte alternativa di anteprime (es. filmstrip), funzione indice -> frame o None
+        self.proxy_lookup = None
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(settle_ms)
+        self.settle_timer.timeout.connect(self.refine)
+
+    def request(self, index):
+        player = self.player
+        self.target = index
+        player.current_frame = index
+
+        frame = player.frame_cache.get(index)
+        ahead = index - (player.cap_next_frame if player.cap_next_frame is not None else -10 ** 9)
+        if frame is None and 0 <= ahead <= self.sequential_window:
+            # Pochi frame avanti al decoder: decodificare in sequenza costa poco
+            frame = player.read_frame(index)
+        if frame is not None:
+            self.target = None
+            player.show_seek_frame(index, frame)
+        else:
+            approximate = self.approximate_frame(index)
+            if approximate is not None:
+                player.show_seek_frame(index, approximate)
+            else:
+                player.show_seek_position(index)
+        self.settle_timer.start()
+
+    def approximate_frame(self, index):
+        max_distance = self.max_approx_distance
+        if max_distance is None:
+            max_distance = max(int(self.player.video_fps), 1)
+        nearest = self.player.frame_cache.nearest(index, max_distance)
+        if nearest is not None:
+            return nearest[1]
+        if self.proxy_lookup is not None:
+            return self.proxy_lookup(index)
+        return None
+
+    def refine(self):
+        # L'input si è fermato: si decodifica solo l'ultimo bersaglio (se non già mostrato)
+        if self.target is not None:
+            index, self.target = self.target, None
+            frame = self.player.read_frame(index)
+            if frame is not None:
+                self.player.show_seek_frame(index, frame)
+        self.player.on_seek_settled()
+
+    def flush(self):
+        # Porta subito al frame esatto della richiesta in attesa (es. rilascio dello slider)
+        self.settle_timer.stop()
+        self.refine()
@@ -0,0 +1,167 @@
+import os
+import numpy as np
+import pandas as pd
+from SensorStore import SensorStore, SENSORIA_HEADER_ROWS, SENSOR_CHANNELS, sensoria_nanoseconds
+from CacheManager import file_fingerprint
+
+# Versione del formato su disco: cambiarla invalida i file già convertiti
+CACHE_VERSION = 1
+# Righe del CSV lette alla volta durante la conversione
+READ_CHUNK_ROWS = 100000
+# Campioni copiati alla volta dai file temporanei al file finale
+COPY_BLOCK_SAMPLES = 1 << 20
+
+
+def write_layout(path, small, large):
+    """
+    File binario con più array NumPy uno dopo l'altro, ciascuno nel formato
+    .npy: prima gli array piccoli (scritti subito), poi lo spazio per quelli
+    grandi, restituiti come memmap da riempire. Senza copie in memoria.
+    """
+    offsets = []
+    with open(path, 'wb') as f:
+        for array in small:
+            np.lib.format.write_array(f, array)
+        for dtype, shape in large:
+            np.lib.format.write_array_header_1_0(f, {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                                                     'fortran_order': False, 'shape': shape})
+            offsets.append(f.tell())
+            f.seek(f.tell() + int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        f.truncate()
+    return [np.memmap(path, dtype=dtype, mode='r+', offset=offset, shape=shape)
+            for (dtype, shape), offset in zip(large, offsets)]
+
+
+def read_layout(path, small_count, large_count):
+    # Array piccoli letti, array grandi mappati (copy-on-write: il file resta intatto)
+    with open(path, 'rb') as f:
+        small = [np.lib.format.read_array(f) for _ in range(small_count)]
+        large = []
+        for _ in range(large_count):
+            np.lib.format.read_magic(f)
+            shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+            large.append((dtype, shape, f.tell()))
+            f.seek(f.tell() + int(np.prod(shape)) * dtype.itemsize)
+    return small, [np.memmap(path, dtype=dtype, mode='c', offset=offset, shape=shape)
+                   for dtype, shape, offset in large]
+
+
+def write_store(path, time, data, gap_mask, columns, origin):
+    time_map, data_map, gap_map = write_layout(
+        path, [np.array(columns), np.array([origin])],
+        [(np.float64, (len(time),)), (np.float32, (len(columns), len(time))), (np.bool_, (len(time),))])
+    time_map[:], data_map[:], gap_map[:] = time, data, gap_mask
+    for array in (time_map, data_map, gap_map):
+        array.flush()
+
+
+def convert_csv(csv_filePath, path, columns=None):
+    """
+    Converte un file Sensoria nel formato binario colonnare leggendolo a
+    blocchi di righe: ogni canale finisce prima in un file temporaneo e poi
+    nella sua riga del file finale, quindi la memoria usata non dipende dalla
+    lunghezza della registrazione. I file con tempi fuori ordine (rari) si
+    convertono caricandoli interi, come SensorStore.from_csv.
+    """
+    wanted = set(columns or SENSOR_CHANNELS) | {'Timestamp'}
+    reader = pd.read_csv(csv_filePath, skiprows=SENSORIA_HEADER_ROWS,
+                         usecols=lambda name: name in wanted, chunksize=READ_CHUNK_ROWS)
+    side_paths = []
+    side_files = []
+    count = 0
+    ordered = True
+    first_ns = last_ns = None
+    try:
+        for raw in reader:
+            if not side_files:
+                columns = [column for column in (columns or SENSOR_CHANNELS) if column in raw.columns]
+                side_paths = [f"{path}.{i}" for i in range(len(columns) + 1)]
+                side_files = [open(side_path, 'wb') for side_path in side_paths]
+            valid, nanoseconds = sensoria_nanoseconds(raw['Timestamp'])
+            if not len(nanoseconds):
+                continue
+            if first_ns is None:
+                first_ns = nanoseconds[0]
+            if (last_ns is not None and nanoseconds[0] < last_ns) or np.any(np.diff(nanoseconds) < 0):
+                ordered = False
+            last_ns = nanoseconds[-1]
+            nanoseconds.tofile(side_files[0])
+            for i, column in enumerate(columns):
+                raw[column].values[valid].astype(np.float32).tofile(side_files[i + 1])
+            count += len(nanoseconds)
+        for side_file in side_files:
+            side_file.close()
+
+        if not ordered or not count:
+            store = SensorStore.from_csv(csv_filePath, columns)
+            write_store(path, store.time, store.data, store.gap_mask, store.columns, store.origin)
+            return
+
+        time_map, data_map, gap_map = write_layout(
+            path, [np.array(columns), np.array([first_ns / 1e9])],
+            [(np.float64, (count,)), (np.float32, (len(columns), count)), (np.bool_, (count,))])
+        with open(side_paths[0], 'rb') as f:
+            for start in range(0, count, COPY_BLOCK_SAMPLES):
+                nanoseconds = np.fromfile(f, dtype=np.int64, count=COPY_BLOCK_SAMPLES)
+                time_map[start:start + len(nanoseconds)] = (nanoseconds - first_ns) / 1e9
+        for i, side_path in enumerate(side_paths[1:]):
+            with open(side_path, 'rb') as f:
+                for start in range(0, count, COPY_BLOCK_SAMPLES):
+                    values = np.fromfile(f, dtype=np.float32, count=COPY_BLOCK_SAMPLES)
+                    data_map[i, start:start + len(values)] = values
+
+        # Buchi riempiti canale per canale direttamente sul file mappato
+        store = SensorStore(time_map, data_map, columns)
+        store.fill_gaps()
+        gap_map[:] = store.gap_mask
+        for array in (time_map, data_map, gap_map):
+            array.flush()
+        del store, time_map, data_map, gap_map
+    finally:
+        for side_file in side_files:
+            side_file.close()
+        for side_path in side_paths:
+            if os.path.exists(side_path):
+                os.remove(side_path)
+
+
+def load_sensor_store(csv_filePath, cache=None, columns=None):
+    """
+    SensorStore di un file Sensoria. Con la cache il file viene convertito una
+    volta sola; le aperture successive mappano il file binario in memoria e
+    leggono dal disco solo le parti usate (finestre dei grafici, cursore,
+    esportazioni), lasciando al sistema operativo la gestione delle pagine
+    caricate. Il tempo di apertura non dipende dalla durata della registrazione.
+    """
+    if cache is None:
+        return SensorStore.from_csv(csv_filePath, columns)
+    fingerprint = file_fingerprint(csv_filePath)
+    key = f"{fingerprint}|{','.join(columns or SENSOR_CHANNELS)}"
+    path = cache.entry_path('sensors', key, CACHE_VERSION, '.bin')
+    if cache.lookup(path) is None:
+        cache.store(path, lambda temp_path: convert_csv(csv_filePath, temp_path, columns))
+    (columns, origin), (time, data, gap_mask) = read_layout(path, 2, 3)
+    store = SensorStore(time, data, columns.tolist(), gap_mask, origin=float(origin[0]))
+    stat = os.stat(csv_filePath)
+    store.source_key = (os.path.abspath(csv_filePath), stat.st_mtime_ns, stat.st_size)
+    store.fingerprint = fingerprint
+    return store
+
+
+def shift_store_origin(store, origin, cache=None):
+    """
+    Come store.shift_origin, ma per gli store mappati dalla cache: sommare
+    l'offset a un memmap copy-on-write copierebbe in memoria tutta la colonna
+    dei tempi a ogni apertura. I tempi già spostati si salvano invece in una
+    voce a parte, con l'origine della sessione nella chiave, e si mappano.
+    """
+    if origin == store.origin:
+        return
+    if cache is None or store.fingerprint is None:
+        store.shift_origin(origin)
+        return
+    path = cache.entry_path('sensors', f"{store.fingerprint}|time|{origin!r}", CACHE_VERSION, '.npy')
+    if cache.lookup(path) is None:
+        cache.store_array(path, store.time + (store.origin - origin))
+    store.time = np.load(path, mmap_mode='c')
+    store.origin = float(origin)
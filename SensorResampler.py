@@ -0,0 +1,100 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def interpolate_rows(time, data, grid):
+    """
+    Interpolazione lineare di tutti i canali (righe di data) sui tempi della griglia,
+    in un'unica operazione vettoriale. Restituisce (valori float32, maschera validi):
+    i punti fuori dall'intervallo dei dati sono NaN.
+    """
+    n = len(time)
+    grid = np.asarray(grid, dtype=np.float64)
+    if n < 2:
+        values = np.full((data.shape[0], len(grid)), np.nan, dtype=np.float32)
+        return values, np.zeros(len(grid), dtype=bool)
+
+    left = np.clip(np.searchsorted(time, grid, side='right') - 1, 0, n - 2)
+    t0 = time[left]
+    dt = time[left + 1] - t0
+    weight = np.divide(grid - t0, dt, out=np.zeros_like(grid), where=dt > 0)
+    weight = np.clip(weight, 0.0, 1.0).astype(np.float32)
+
+    values = data[:, left]
+    values += (data[:, left + 1] - values) * weight
+    inside = (grid >= time[0]) & (grid <= time[-1])
+    values[:, ~inside] = np.nan
+    return values, inside
+
+
+class SensorResampler:
+    """
+    Porta i dati dei dispositivi su una griglia di tempi comune (uniforme oppure
+    i tempi dei frame video) con cache LRU per (dispositivo, griglia, stato sync).
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+
+    def invalidate(self):
+        # Da chiamare quando cambia la sincronizzazione o la sessione
+        self.cache.clear()
+
+    @staticmethod
+    def uniform_grid(t_start, t_end, rate):
+        step = 1.0 / rate
+        return t_start + np.arange(int(np.floor((t_end - t_start) * rate)) + 1) * step
+
+    def resample(self, device, grid, grid_key, sync_key, derived=()):
+        """
+        Restituisce (valori, validi) del dispositivo sulla griglia: prima i
+        canali grezzi, poi i derivati indicati (già calcolati). grid_key e
+        sync_key identificano la griglia e lo stato della sincronizzazione: se
+        non cambiano, il risultato viene preso dalla cache.
+        """
+        store = device.store
+        key = (device.file_name, id(store), tuple(derived), grid_key, sync_key)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        data = store.data
+        if derived:
+            data = np.vstack([data] + [store.column(name)[np.newaxis] for name in derived])
+        values, inside = interpolate_rows(store.time, data, grid)
+        # Un punto che cade in un buco (o su un campione interpolato) non è valido
+        if len(store) >= 2:
+            right = np.clip(np.searchsorted(store.time, grid, side='right'), 0, len(store) - 1)
+            inside &= ~store.gap_mask[right]
+
+        result = (values, inside)
+        self.cache[key] = result
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+        return result
+
+    def aligned_columns(self, session, grid, grid_key, sync_key, derived=None):
+        # Dizionario colonna -> array, una riga per punto della griglia.
+        # derived: ruolo -> canali derivati da includere
+        derived = derived or {}
+        columns = {}
+        for device in session:
+            names = derived.get(device.role, [])
+            values, valid = self.resample(device, grid, grid_key, sync_key, names)
+            for i, name in enumerate(device.store.columns + names):
+                columns[f"{device.role}_{name}"] = values[i]
+            columns[f"{device.role}_valid"] = valid
+        return columns
+
+
+def write_columnar(file_path, columns):
+    """
+    Scrive un dizionario di colonne in formato colonnare:
+    Parquet (richiede pyarrow) oppure .npz di NumPy, un array per colonna.
+    """
+    if file_path.lower().endswith('.parquet'):
+        pd.DataFrame(columns, copy=False).to_parquet(file_path, index=False)
+    else:
+        np.savez(file_path, **columns)
@@ -0,0 +1,263 @@
+import os
+import numpy as np
+from SensorStore import SENSORIA_HEADER_ROWS
+from SensorCache import load_sensor_store, shift_store_origin
+from DerivedChannels import DERIVED_GROUPS, can_derive
+
+# Campo Location dell'intestazione Sensoria -> ruolo del dispositivo
+LOCATION_ROLES = {
+    '0x0000': 'right',
+    '0x0001': 'left',
+}
+
+# Etichette (estesa, abbreviata) dei ruoli noti
+ROLE_LABELS = {
+    'right': ("Piede Destro", "Dx"),
+    'left': ("Piede Sinistro", "Sx"),
+}
+
+# Cartelle di esportazione dei ruoli noti
+ROLE_FOLDERS = {
+    'right': 'Piede_Destro',
+    'left': 'Piede_Sinistro',
+}
+
+# Colori delle curve: i primi due ruoli mantengono i colori storici
+ROLE_COLORS = {
+    'right': ["#FF0000", "#00FF00", "#0000FF", "#8B4513"],
+    'left': ["#FFA500", "#800080", "#008080", "#FF1493"],
+}
+EXTRA_COLORS = [
+    ["#FF00FF", "#FFFF00", "#00FFFF", "#708090"],
+    ["#A52A2A", "#7FFF00", "#1E90FF", "#DAA520"],
+    ["#FF69B4", "#ADFF2F", "#4682B4", "#800000"],
+]
+
+# Colore delle regioni dei passi: rosso a destra, blu a sinistra
+ROLE_REGION_COLORS = {
+    'right': (255, 0, 0, 50),
+    'left': (0, 0, 255, 50),
+}
+
+# Gruppi di canali selezionabili per ogni dispositivo
+CHANNEL_GROUPS = [
+    ("Accelerazioni", ["Ax", "Ay", "Az"]),
+    ("Giroscopio", ["Gx", "Gy", "Gz"]),
+    ("Pressione", ["S0", "S1", "S2"]),
+    ("Magnetometro", ["Mx", "My", "Mz"]),
+]
+
+
+def read_sensoria_header(csv_filePath):
+    """
+    Legge solo le righe di intestazione di un file Sensoria ("Chiave: valore").
+    Restituisce un dizionario vuoto se il file non è un file Sensoria.
+    """
+    header = {}
+    try:
+        with open(csv_filePath, 'r', encoding='utf-8', errors='replace') as f:
+            for _ in range(SENSORIA_HEADER_ROWS):
+                line = f.readline()
+                if not line:
+                    break
+                key, sep, value = line.partition(':')
+                if sep:
+                    header[key.strip()] = value.strip()
+    except OSError:
+        return {}
+    if 'SensoriaRawDataFormat' not in header:
+        return {}
+    return header
+
+
+def header_sampling_rate(header):
+    # SamplingFrequency dell'intestazione in Hz, None se assente o non valida
+    try:
+        rate = float(header.get('SamplingFrequency', ''))
+    except ValueError:
+        return None
+    return rate if rate > 0 else None
+
+
+class SensorDevice:
+    def __init__(self, csv_filePath, header, store, role):
+        self.csv_filePath = csv_filePath
+        self.file_name = os.path.basename(csv_filePath)
+        self.header = header
+        self.store = store
+        store.nominal_rate = header_sampling_rate(header)
+        self.role = role
+        self.index = 0
+        self.colors = ROLE_COLORS.get(role, EXTRA_COLORS[0])
+        # Secondi tra lo zero comune della sessione e il primo campione del dispositivo
+        self.clock_offset = 0.0
+
+    @property
+    def device_name(self):
+        return self.header.get('DeviceName', self.file_name)
+
+    @property
+    def serial_number(self):
+        return self.header.get('SerialNumber', '')
+
+    @property
+    def location(self):
+        return self.header.get('Location', '')
+
+    @property
+    def label(self):
+        return ROLE_LABELS.get(self.role, (self.device_name, self.device_name))[0]
+
+    @property
+    def short_label(self):
+        return ROLE_LABELS.get(self.role, (self.device_name, self.device_name))[1]
+
+    @property
+    def region_color(self):
+        if self.role in ROLE_REGION_COLORS:
+            return ROLE_REGION_COLORS[self.role]
+        color = self.colors[0].lstrip('#')
+        return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4)) + (50,)
+
+    @property
+    def export_folder(self):
+        return ROLE_FOLDERS.get(self.role, f"Dispositivo_{self.device_name}")
+
+    def groups(self):
+        # Solo i gruppi i cui canali sono presenti nel file o si possono derivare
+        return [(name, columns) for name, columns in CHANNEL_GROUPS + DERIVED_GROUPS
+                if all(can_derive(self.store, column) for column in columns)]
+
+    def group_label(self, group_name, columns):
+        return f"{group_name} {self.short_label} ({', '.join(columns)})"
+
+
+class SensorSession:
+    """
+    Insieme dei dispositivi di una sessione, tutti riportati sullo stesso orologio.
+    Il tempo zero è il primo campione del dispositivo partito per primo.
+    """
+
+    def __init__(self, devices, cache=None):
+        self.devices = devices
+        # Cambia a ogni riassegnazione dei ruoli, per invalidare le tabelle derivate
+        self.version = 0
+        self.origin = min((d.store.origin for d in devices), default=0.0)
+        for d in devices:
+            d.clock_offset = d.store.origin - self.origin
+            shift_store_origin(d.store, self.origin, cache)
+        self.reindex()
+
+    @classmethod
+    def from_files(cls, csv_filePaths, role_overrides=None, cache=None):
+        role_overrides = role_overrides or {}
+        entries = []
+        for path in sorted(csv_filePaths):
+            header = read_sensoria_header(path)
+            if header:
+                entries.append((path, header))
+
+        roles = assign_roles(entries, role_overrides)
+        devices = [SensorDevice(path, header, load_sensor_store(path, cache), role)
+                   for (path, header), role in zip(entries, roles)]
+        return cls(devices, cache)
+
+    def reindex(self):
+        # Ordine stabile: prima i piedi, poi gli altri dispositivi per nome file
+        order = {'right': 0, 'left': 1}
+        self.devices.sort(key=lambda d: (order.get(d.role, 2), d.role, d.file_name))
+        extra = 0
+        for i, device in enumerate(self.devices):
+            device.index = i
+            if device.role in ROLE_COLORS:
+                device.colors = ROLE_COLORS[device.role]
+            else:
+                device.colors = EXTRA_COLORS[extra % len(EXTRA_COLORS)]
+                extra += 1
+        self.by_role = {d.role: d for d in self.devices}
+        self.version += 1
+
+    def __len__(self):
+        return len(self.devices)
+
+    def __iter__(self):
+        return iter(self.devices)
+
+    @property
+    def roles(self):
+        return [d.role for d in self.devices]
+
+    def device(self, role):
+        return self.by_role.get(role)
+
+    def role_map(self):
+        return {d.file_name: d.role for d in self.devices}
+
+    def apply_roles(self, role_overrides):
+        # role_overrides: nome file -> ruolo (es. letto dalla configurazione)
+        changed = False
+        for device in self.devices:
+            role = role_overrides.get(device.file_name)
+            if role and role != device.role:
+                device.role = role
+                changed = True
+        if changed:
+            self.reindex()
+        return changed
+
+    def swap_roles(self, role_a, role_b):
+        device_a, device_b = self.device(role_a), self.device(role_b)
+        if device_a is None or device_b is None:
+            return False
+        device_a.role, device_b.role = role_b, role_a
+        self.reindex()
+        return True
+
+    def build_lookup(self, times):
+        """
+        Tabella (n_dispositivi x len(times)) con l'indice del campione di ogni
+        dispositivo corrispondente a ciascun tempo. Il costo è lineare nel
+        numero di dispositivi; la riga di un dispositivo è lookup[device.index].
+        """
+        times = np.asarray(times, dtype=np.float64)
+        lookup = np.empty((len(self.devices), len(times)), dtype=np.int32)
+        for device in self.devices:
+            lookup[device.index] = device.store.index_at(times)
+        return lookup
+
+
+def assign_roles(entries, role_overrides):
+    """
+    Assegna un ruolo a ogni file in modo deterministico:
+    1. ruolo salvato per quel file (role_overrides: nome file -> ruolo)
+    2. campo Location dell'intestazione
+    3. se nessun file è un piede, i primi due diventano destro e sinistro
+    4. 'imu1', 'imu2', ... in ordine di nome file
+    """
+    roles = [None] * len(entries)
+    used = set()
+    for i, (path, header) in enumerate(entries):
+        role = role_overrides.get(os.path.basename(path))
+        if role and role not in used:
+            roles[i] = role
+            used.add(role)
+    for i, (path, header) in enumerate(entries):
+        if roles[i] is None:
+            role = LOCATION_ROLES.get(header.get('Location', '').lower())
+            if role and role not in used:
+                roles[i] = role
+                used.add(role)
+    # Cartelle senza Location riconoscibile: come in passato i primi due file sono i piedi
+    if not used & {'right', 'left'}:
+        free = [i for i in range(len(entries)) if roles[i] is None]
+        for i, role in zip(free, ['right', 'left']):
+            roles[i] = role
+            used.add(role)
+    counter = 1
+    for i in range(len(entries)):
+        if roles[i] is None:
+            while f'imu{counter}' in used:
+                counter += 1
+            roles[i] = f'imu{counter}'
+            used.add(roles[i])
+    return roles
@@ -0,0 +1,248 @@
+import os
+import copy
+import numpy as np
+import pandas as pd
+
+# Righe di intestazione dei file Sensoria prima della riga con i nomi delle colonne
+SENSORIA_HEADER_ROWS = 18
+
+# Canali effettivamente usati dal player (tutte le altre colonne del file vengono scartate)
+SENSOR_CHANNELS = ["S0", "S1", "S2", "Ax", "Ay", "Az", "Gx", "Gy", "Gz", "Mx", "My", "Mz"]
+
+# Un campione è considerato "dopo un buco" se dista dal precedente più di N periodi nominali
+GAP_FACTOR = 3.0
+
+# Campioni elaborati alla volta nel calcolo della panoramica (multiplo di ogni gruppo)
+OVERVIEW_BLOCK_SAMPLES = 1 << 18
+
+
+def sensoria_nanoseconds(timestamps):
+    """
+    Converte la colonna Timestamp ('HH:MM:SS.fff') in nanosecondi dalla
+    mezzanotte, interi per non accumulare errori di arrotondamento.
+    Restituisce (maschera delle righe valide, nanosecondi delle righe valide).
+    """
+    timestamps = pd.to_datetime(timestamps, format='%H:%M:%S.%f', errors='coerce')
+    valid = timestamps.notna().values
+    timestamps = timestamps[valid]
+    return valid, (timestamps - timestamps.dt.normalize()).values.astype(np.int64)
+
+
+def read_export_frame(csv_filePath):
+    """
+    Tutte le colonne di un file Sensoria (Tick, HRM, S3-S7, CS*, RSSI...) con
+    le righe nello stesso ordine dello store: lo store tiene solo i canali usati
+    dal player, i CSV dei passi invece riportano il file completo. Legge il
+    file intero, quindi si usa solo per le esportazioni.
+    """
+    raw = pd.read_csv(csv_filePath, skiprows=SENSORIA_HEADER_ROWS)
+    valid, nanoseconds = sensoria_nanoseconds(raw['Timestamp'])
+    raw = raw[valid].iloc[np.argsort(nanoseconds, kind='stable')].reset_index(drop=True)
+    numeric = raw.select_dtypes(include='number').columns
+    raw[numeric] = raw[numeric].interpolate(method='linear')
+    return raw
+
+
+def lod_envelope(time, values, bucket):
+    """
+    Panoramica min/max di una colonna: per ogni gruppo di bucket campioni il
+    minimo e il massimo, entrambi al tempo del primo campione del gruppo, così
+    i picchi restano visibili. Si procede a blocchi, quindi su un file mappato
+    in memoria si legge la colonna una volta sola senza caricarla tutta.
+    """
+    n = len(time)
+    count = -(-n // bucket)
+    envelope = np.empty(2 * count, dtype=values.dtype)
+    block = max(OVERVIEW_BLOCK_SAMPLES // bucket, 1) * bucket
+    for start in range(0, n, block):
+        chunk = np.asarray(values[start:start + block])
+        groups = -(-len(chunk) // bucket)
+        if len(chunk) < groups * bucket:
+            chunk = np.concatenate((chunk, np.repeat(chunk[-1:], groups * bucket - len(chunk))))
+        chunk = chunk.reshape(groups, bucket)
+        first = 2 * (start // bucket)
+        envelope[first:first + 2 * groups:2] = chunk.min(axis=1)
+        envelope[first + 1:first + 2 * groups:2] = chunk.max(axis=1)
+    return np.repeat(time[::bucket], 2), envelope
+
+
+class SensorStore:
+    """
+    Archivio colonnare dei dati di un sensore.
+
+    - time: float64, tempi in secondi ordinati in modo crescente
+    - data: matrice float32 (n_canali x n_campioni), ogni canale è una riga contigua
+    - gap_mask: bool, True per i campioni interpolati o che seguono un buco temporale
+    - derived: canali derivati calcolati su richiesta, stessi tempi dei canali grezzi
+
+    Tutti gli accessi per intervallo di tempo restituiscono viste (nessuna copia).
+    """
+
+    def __init__(self, time, data, columns, gap_mask=None, origin=0.0):
+        # origin: secondi dalla mezzanotte del primo campione (orologio del dispositivo)
+        self.origin = float(origin)
+        self.time = np.ascontiguousarray(time, dtype=np.float64)
+        self.data = np.ascontiguousarray(data, dtype=np.float32)
+        self.columns = list(columns)
+        self.column_index = {name: i for i, name in enumerate(self.columns)}
+        if gap_mask is None:
+            gap_mask = np.zeros(len(self.time), dtype=bool)
+        self.gap_mask = np.ascontiguousarray(gap_mask, dtype=bool)
+        self.derived = {}
+        # Panoramiche min/max per (colonna, campioni per gruppo)
+        self.lod = {}
+        # Identifica il file di origine (percorso, data di modifica, dimensione) per le cache
+        self.source_key = None
+        # Impronta del contenuto del file (solo se caricato tramite la cache su disco)
+        self.fingerprint = None
+        # Frequenza di campionamento dichiarata nell'intestazione del file, se nota
+        self.nominal_rate = None
+
+    @classmethod
+    def from_csv(cls, csv_filePath, columns=None):
+        wanted = set(columns or SENSOR_CHANNELS) | {'Timestamp'}
+        # Leggiamo solo le colonne che servono; il parser float32 di pandas sbaglia
+        # l'ultima cifra, quindi convertiamo noi una colonna alla volta
+        raw = pd.read_csv(csv_filePath, skiprows=SENSORIA_HEADER_ROWS,
+                          usecols=lambda name: name in wanted)
+        # Alcuni dispositivi non hanno tutti i canali (es. IMU senza pressione)
+        columns = [column for column in (columns or SENSOR_CHANNELS) if column in raw.columns]
+
+        valid, nanoseconds = sensoria_nanoseconds(raw['Timestamp'])
+        data = np.empty((len(columns), len(nanoseconds)), dtype=np.float32)
+        for i, column in enumerate(columns):
+            data[i] = raw[column].values[valid]
+        del raw
+
+        order = np.argsort(nanoseconds, kind='stable')
+        if np.any(order != np.arange(len(order))):
+            nanoseconds = nanoseconds[order]
+            data = data[:, order]
+
+        origin = nanoseconds[0] if len(nanoseconds) else 0
+        store = cls((nanoseconds - origin) / 1e9, data, columns, origin=origin / 1e9)
+        store.fill_gaps()
+        stat = os.stat(csv_filePath)
+        store.source_key = (os.path.abspath(csv_filePath), stat.st_mtime_ns, stat.st_size)
+        return store
+
+    def fill_gaps(self):
+        # Interpolazione lineare canale per canale solo dove ci sono NaN
+        gap_mask = np.zeros(len(self.time), dtype=bool)
+        for row in self.data:
+            missing = np.isnan(row)
+            if not missing.any():
+                continue
+            gap_mask |= missing
+            valid = ~missing
+            if valid.any():
+                row[missing] = np.interp(self.time[missing], self.time[valid], row[valid])
+            else:
+                row[missing] = 0.0
+
+        # Segnaliamo anche i campioni che arrivano dopo un buco temporale
+        if len(self.time) > 2:
+            dt = np.diff(self.time)
+            period = np.median(dt)
+            if period > 0:
+                gap_mask[1:] |= dt > GAP_FACTOR * period
+        self.gap_mask = gap_mask
+
+    def shift_origin(self, origin):
+        # Riporta i tempi su un orologio con lo zero in 'origin' (secondi dalla mezzanotte)
+        self.time += self.origin - origin
+        self.origin = float(origin)
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def nbytes(self):
+        derived = sum(values.nbytes for values in self.derived.values())
+        return self.time.nbytes + self.data.nbytes + self.gap_mask.nbytes + derived
+
+    @property
+    def column_names(self):
+        return self.columns + list(self.derived)
+
+    def sampling_rate(self):
+        # Frequenza nominale; altrimenti quella media. La mediana degli intervalli
+        # non va bene: i tempi Sensoria arrivano a gruppi, con molti intervalli nulli
+        if self.nominal_rate:
+            return self.nominal_rate
+        span = self.t_max - self.t_min
+        return (len(self.time) - 1) / span if len(self.time) > 1 and span > 0 else 1.0
+
+    @property
+    def t_min(self):
+        return float(self.time[0]) if len(self.time) else 0.0
+
+    @property
+    def t_max(self):
+        return float(self.time[-1]) if len(self.time) else 0.0
+
+    def column(self, name):
+        if name in self.column_index:
+            return self.data[self.column_index[name]]
+        return self.derived[name]
+
+    def overview(self, name, max_points):
+        """
+        (tempi, valori) per disegnare una colonna intera: i campioni stessi
+        (viste) se non sono più di max_points, altrimenti la panoramica min/max
+        con al più max_points punti, calcolata una volta sola.
+        """
+        if len(self.time) <= max_points:
+            return self.time, self.column(name)
+        bucket = -(-2 * len(self.time) // max_points)
+        key = (name, bucket)
+        if key not in self.lod:
+            self.lod[key] = lod_envelope(self.time, self.column(name), bucket)
+        return self.lod[key]
+
+    def has_column(self, name):
+        return name in self.column_index or name in self.derived
+
+    def add_derived(self, name, values):
+        self.derived[name] = np.ascontiguousarray(values, dtype=np.float32)
+
+    def snapshot(self):
+        # Per i worker: stessi array, ma un elenco dei derivati che il thread
+        # della GUI non modifica più
+        snapshot = copy.copy(self)
+        snapshot.derived = dict(self.derived)
+        return snapshot
+
+    def index_at(self, t):
+        # Primo campione con tempo >= t, limitato ai bordi
+        idx = np.searchsorted(self.time, t)
+        return np.clip(idx, 0, max(len(self.time) - 1, 0))
+
+    def index_range(self, t_start=None, t_end=None):
+        # Indici [i0, i1) dei campioni con t_start <= t <= t_end
+        i0 = 0 if t_start is None else int(np.searchsorted(self.time, t_start, side='left'))
+        i1 = len(self.time) if t_end is None else int(np.searchsorted(self.time, t_end, side='right'))
+        return i0, max(i0, i1)
+
+    def slice(self, t_start=None, t_end=None, columns=None):
+        """
+        Restituisce (time, data) come viste sull'intervallo richiesto.
+        Se columns è indicato, data è una lista di viste nell'ordine richiesto.
+        """
+        i0, i1 = self.index_range(t_start, t_end)
+        if columns is None:
+            return self.time[i0:i1], self.data[:, i0:i1]
+        return self.time[i0:i1], [self.column(name)[i0:i1] for name in columns]
+
+    def to_dataframe(self, i0=0, i1=None, raw=None, derived=()):
+        # Usato solo per l'esportazione CSV: passando dalla rappresentazione più corta
+        # del float32 evitiamo valori come -13.440001 nel file.
+        # raw (read_export_frame) aggiunge le altre colonne del file nel loro ordine,
+        # derived sono i canali derivati da scrivere (già calcolati)
+        i1 = len(self.time) if i1 is None else i1
+        frame = {} if raw is None else {name: raw[name].values[i0:i1] for name in raw.columns}
+        frame['Timestamp'] = self.time[i0:i1]
+        for name in self.columns + list(derived):
+            frame[name] = self.column(name)[i0:i1].astype(str).astype(np.float64)
+        frame['VideoTime'] = self.time[i0:i1]
+        return pd.DataFrame(frame)
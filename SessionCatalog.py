@@ -0,0 +1,170 @@
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from SensorSession import read_sensoria_header, LOCATION_ROLES
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov')
+# Cartelle scritte dal player dentro una sessione (CSV e clip dei passi): non
+# contengono sessioni e possono avere migliaia di clip, quindi non si visitano
+EXPORT_FOLDERS = {'Passi'}
+# Letture di intestazioni e metadati in parallelo: lavoro di I/O, i thread bastano
+SCAN_WORKERS = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    device_name TEXT,
+    serial_number TEXT,
+    location TEXT,
+    role TEXT,
+    start TEXT,
+    sampling_hz REAL,
+    fps REAL,
+    frames INTEGER,
+    width INTEGER,
+    height INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_folder ON files(folder);
+"""
+
+
+def read_csv_metadata(path):
+    # Solo le righe di intestazione: il file non viene letto oltre
+    header = read_sensoria_header(path)
+    if not header:
+        return None
+    try:
+        sampling_hz = float(header.get('SamplingFrequency', ''))
+    except ValueError:
+        sampling_hz = None
+    location = header.get('Location', '')
+    return {'device_name': header.get('DeviceName'), 'serial_number': header.get('SerialNumber'),
+            'location': location, 'role': LOCATION_ROLES.get(location), 'start': header.get('Start'),
+            'sampling_hz': sampling_hz}
+
+
+def read_video_metadata(path):
+    # Metadati del contenitore, senza decodificare frame
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            return None
+        return {'fps': cap.get(cv2.CAP_PROP_FPS), 'frames': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+                'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), 'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}
+    finally:
+        cap.release()
+
+
+class SessionCatalog:
+    """
+    Indice SQLite delle sessioni sotto una cartella radice: per ogni file CSV
+    Sensoria i campi dell'intestazione, per ogni video i metadati del
+    contenitore. Le scansioni successive rileggono solo i file nuovi o con
+    data di modifica diversa, quindi sfogliare e cercare è immediato anche
+    con migliaia di sessioni.
+    Ogni thread deve usare la propria istanza (connessione SQLite).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def scan(self, root, progress=None):
+        """
+        Aggiorna l'indice per la cartella root e le sue sottocartelle.
+        Restituisce (file letti, file rimossi dall'indice).
+        """
+        root = os.path.abspath(root)
+        found = {}
+        for folder, subfolders, files in os.walk(root):
+            subfolders[:] = [name for name in subfolders if name not in EXPORT_FOLDERS]
+            for file in files:
+                lower = file.lower()
+                if lower.endswith('.csv') or lower.endswith(VIDEO_EXTENSIONS):
+                    path = os.path.join(folder, file)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    found[path] = (folder, 'csv' if lower.endswith('.csv') else 'video',
+                                   stat.st_mtime_ns, stat.st_size)
+
+        prefix = os.path.join(root, '')
+        known = {path: (mtime_ns, size) for path, mtime_ns, size in self.connection.execute(
+            "SELECT path, mtime_ns, size FROM files WHERE path LIKE ? ESCAPE '\\'",
+            (escape_like(prefix) + '%',))}
+        removed = [path for path in known if path not in found]
+        changed = [path for path, entry in found.items() if known.get(path) != entry[2:]]
+
+        def read(path):
+            reader = read_csv_metadata if found[path][1] == 'csv' else read_video_metadata
+            return path, reader(path)
+
+        rows = []
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+            for done, (path, metadata) in enumerate(executor.map(read, changed), start=1):
+                folder, kind, mtime_ns, size = found[path]
+                metadata = metadata or {}
+                rows.append((path, folder, kind, mtime_ns, size, metadata.get('device_name'),
+                             metadata.get('serial_number'), metadata.get('location'), metadata.get('role'),
+                             metadata.get('start'), metadata.get('sampling_hz'), metadata.get('fps'),
+                             metadata.get('frames'), metadata.get('width'), metadata.get('height')))
+                if progress is not None:
+                    progress(int(100 * done / len(changed)))
+
+        with self.connection:
+            self.connection.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+            self.connection.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                        rows)
+        return len(changed), len(removed)
+
+    def sessions(self, root, text=''):
+        """
+        Cartelle sotto root con almeno un video e un CSV Sensoria, come dizionari
+        (folder, start, devices, videos, duration). text filtra per percorso,
+        nome o numero di serie del dispositivo e data di inizio.
+        """
+        prefix = escape_like(os.path.join(os.path.abspath(root), '')) + '%'
+        query = """
+            SELECT folder,
+                   MIN(CASE WHEN kind = 'csv' THEN start END),
+                   GROUP_CONCAT(CASE WHEN kind = 'csv' THEN COALESCE(role, device_name) END, ', '),
+                   SUM(kind = 'video'),
+                   MAX(CASE WHEN kind = 'video' AND fps > 0 THEN frames / fps END)
+            FROM files
+            WHERE path LIKE ? ESCAPE '\\' AND (kind = 'video' OR device_name IS NOT NULL)
+            GROUP BY folder
+            HAVING SUM(kind = 'video') > 0 AND SUM(kind = 'csv') > 0
+        """
+        parameters = [prefix]
+        if text:
+            query += """ AND (folder LIKE ? ESCAPE '\\' OR SUM(device_name LIKE ? ESCAPE '\\') > 0
+                         OR SUM(serial_number LIKE ? ESCAPE '\\') > 0 OR SUM(start LIKE ? ESCAPE '\\') > 0)"""
+            pattern = '%' + escape_like(text) + '%'
+            parameters += [pattern] * 4
+        query += " ORDER BY 2 DESC, folder"
+        return [{'folder': folder, 'start': start or '', 'devices': devices or '', 'videos': videos,
+                 'duration': duration}
+                for folder, start, devices, videos, duration in self.connection.execute(query, parameters)]
+
+
+def escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def scan_catalog(db_path, root, progress=None):
+    # Per BackgroundTask: connessione propria del thread di lavoro
+    catalog = SessionCatalog(db_path)
+    try:
+        return catalog.scan(root, progress)
+    finally:
+        catalog.close()
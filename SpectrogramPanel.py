@@ -0,0 +1,138 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QTimer, QRectF
+from PyQt5.QtWidgets import QAction
+from BackgroundTask import BackgroundTask
+from SpectrogramTiles import SpectrogramLayout, compute_tiles
+
+# Dinamica mostrata sotto il massimo osservato
+DB_RANGE = 60.0
+# Tile per lavoro in background
+TILES_PER_TASK = 4
+
+
+class SpectrogramPanel(pg.PlotWidget):
+    """
+    Spettrogramma di un canale. I tile della risoluzione adatta allo zoom
+    vengono presi dalla cache condivisa del player; quelli mancanti sono
+    calcolati nel thread pool e, nell'attesa, si mostrano quelli più grossolani.
+    """
+
+    def __init__(self, player, device, column):
+        super().__init__()
+        self.player = player
+        self.device = device
+        self.store = device.store
+        self.column = column
+        self.layout_info = SpectrogramLayout(self.store.time, self.store.sampling_rate())
+        self.images = {}
+        self.pending = set()
+        self.max_db = None
+        self.closed = False
+
+        self.colormap = pg.colormap.get('viridis')
+        self.showGrid(x=True, y=True, alpha=0.3)
+        self.setLabel('left', f"{column} {device.short_label} (Hz)")
+        self.setLabel('bottom', 'Tempo (s)')
+        self.setXRange(self.store.t_min, self.store.t_max, padding=0)
+        self.setYRange(0, self.layout_info.freqs[-1], padding=0)
+
+        self.playhead = pg.InfiniteLine(angle=90, movable=False, pen=pg.mkPen('#FFD700', width=2))
+        self.playhead.setZValue(10)
+        self.addItem(self.playhead)
+
+        close_action = QAction("Chiudi Spettrogramma", self)
+        close_action.triggered.connect(lambda: self.player.close_spectrogram(self))
+        self.getViewBox().menu.addAction(close_action)
+
+        # Pan e zoom generano molti eventi: si aggiorna quando l'utente si ferma
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(40)
+        self.refresh_timer.timeout.connect(self.refresh_tiles)
+        self.getViewBox().sigXRangeChanged.connect(lambda *_: self.refresh_timer.start())
+        self.refresh_timer.start()
+
+    def cache_key(self, level, index):
+        return (self.store.source_key, self.column, level, index)
+
+    def set_playhead(self, time):
+        self.playhead.setValue(time)
+
+    def refresh_tiles(self):
+        if self.closed:
+            return
+        layout = self.layout_info
+        t0, t1 = self.getViewBox().viewRange()[0]
+        level = layout.level_for(t1 - t0, self.width())
+        cache = self.player.spectrogram_tiles
+
+        wanted = {}
+        missing = []
+        for index in layout.tiles_in_range(level, t0, t1):
+            tile = cache.get(self.cache_key(level, index))
+            if tile is not None:
+                wanted[(level, index)] = tile
+                continue
+            missing.append((level, index))
+            # Intanto il tile più fine già pronto ai livelli superiori
+            for coarse in range(level + 1, level + 4):
+                parent = (coarse, index >> (coarse - level))
+                tile = cache.get(self.cache_key(*parent))
+                if tile is not None:
+                    wanted[parent] = tile
+                    break
+
+        for key in [key for key in self.images if key not in wanted]:
+            self.removeItem(self.images.pop(key))
+        for key, tile in wanted.items():
+            if key not in self.images:
+                self.add_image(key, tile)
+
+        missing = [key for key in missing if key not in self.pending]
+        for i in range(0, len(missing), TILES_PER_TASK):
+            self.request_tiles(missing[i:i + TILES_PER_TASK])
+
+    def add_image(self, key, tile):
+        self.update_levels(tile)
+        image = pg.ImageItem(tile, axisOrder='col-major')
+        image.setColorMap(self.colormap)
+        image.setLevels(self.levels())
+        image.setRect(QRectF(*self.layout_info.tile_rect(*key)))
+        # I livelli più fini stanno sopra quelli grossolani
+        image.setZValue(-key[0])
+        self.addItem(image)
+        self.images[key] = image
+
+    def levels(self):
+        top = self.max_db if self.max_db is not None else 0.0
+        return top - DB_RANGE, top
+
+    def update_levels(self, tile):
+        # La scala dei colori segue il massimo visto finora, uguale per tutti i tile
+        finite = tile[np.isfinite(tile)]
+        if not len(finite) or (self.max_db is not None and finite.max() <= self.max_db):
+            return
+        self.max_db = float(finite.max())
+        for image in self.images.values():
+            image.setLevels(self.levels())
+
+    def request_tiles(self, requests):
+        self.pending.update(requests)
+        task = BackgroundTask(compute_tiles, self.store.time, self.store.column(self.column),
+                              self.layout_info, requests)
+        task.signals.finished.connect(self.on_tiles_ready)
+        task.signals.failed.connect(lambda error, requests=requests: self.pending.difference_update(requests))
+        self.player.start_background_task(task)
+
+    def on_tiles_ready(self, tiles):
+        self.pending.difference_update(tiles)
+        for (level, index), tile in tiles.items():
+            self.player.spectrogram_tiles.put(self.cache_key(level, index), tile)
+        if not self.closed:
+            self.refresh_tiles()
+
+    def close_panel(self):
+        self.closed = True
+        self.refresh_timer.stop()
+        self.deleteLater()
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+import numpy as np
+
+# Campioni per finestra FFT e passo tra colonne al livello 0 (massima risoluzione)
+WINDOW_SIZE = 64
+BASE_HOP = 4
+# Colonne (finestre) per tile: ogni livello raddoppia il passo e quindi la durata del tile
+TILE_COLUMNS = 256
+MAX_LEVEL = 12
+
+
+class SpectrogramLayout:
+    """
+    Geometria dei tile di un canale: griglia uniforme alla frequenza nominale
+    del dispositivo (rate, dall'intestazione; senza, la frequenza media), con
+    origine nel primo campione. Il tile (livello, indice) copre TILE_COLUMNS
+    finestre distanziate di BASE_HOP * 2**livello campioni.
+    """
+
+    def __init__(self, time, rate=None):
+        self.t_start = float(time[0]) if len(time) else 0.0
+        self.t_end = float(time[-1]) if len(time) else 0.0
+        span = self.t_end - self.t_start
+        if not rate:
+            rate = (len(time) - 1) / span if len(time) > 1 and span > 0 else 1.0
+        self.rate = float(rate)
+        self.freqs = np.fft.rfftfreq(WINDOW_SIZE, 1.0 / self.rate)
+
+    def hop(self, level):
+        # Passo tra colonne in secondi
+        return BASE_HOP * (2 ** level) / self.rate
+
+    def tile_duration(self, level):
+        return TILE_COLUMNS * self.hop(level)
+
+    def level_for(self, span, pixels):
+        # Livello più fine con al massimo ~2 colonne per pixel visibile
+        columns_needed = span * self.rate / BASE_HOP
+        level = int(np.ceil(np.log2(max(columns_needed / max(2 * pixels, 1), 1.0))))
+        return min(level, MAX_LEVEL)
+
+    def tiles_in_range(self, level, t0, t1):
+        duration = self.tile_duration(level)
+        last = int((self.t_end - self.t_start) // duration)
+        first = max(int((t0 - self.t_start) // duration), 0)
+        stop = min(int((t1 - self.t_start) // duration), last)
+        return range(first, stop + 1)
+
+    def tile_rect(self, level, index):
+        # (x, y, larghezza, altezza) dell'immagine del tile in coordinate tempo/frequenza
+        hop = self.hop(level)
+        df = self.freqs[1] - self.freqs[0] if len(self.freqs) > 1 else 1.0
+        x = self.t_start + index * self.tile_duration(level) - hop / 2
+        return x, -df / 2, self.tile_duration(level), self.freqs[-1] + df
+
+
+def compute_tile(time, values, layout, level, index):
+    """
+    STFT di un tile: le finestre vengono prese direttamente sulla griglia
+    uniforme (una sola interpolazione per tutto il tile), senza media, con
+    finestra di Hann. Restituisce l'ampiezza in dB, float32 (colonne x frequenze);
+    le colonne fuori dai dati sono NaN.
+    """
+    hop = layout.hop(level)
+    centers = layout.t_start + (index * TILE_COLUMNS + np.arange(TILE_COLUMNS)) * hop
+    offsets = (np.arange(WINDOW_SIZE) - WINDOW_SIZE / 2) / layout.rate
+    frames = np.interp((centers[:, np.newaxis] + offsets[np.newaxis, :]).ravel(), time, values)
+    frames = frames.reshape(TILE_COLUMNS, WINDOW_SIZE)
+    frames -= frames.mean(axis=1, keepdims=True)
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(WINDOW_SIZE), axis=1))
+    tile = (20.0 * np.log10(spectrum + 1e-6)).astype(np.float32)
+    tile[(centers < layout.t_start) | (centers > layout.t_end)] = np.nan
+    return tile
+
+
+def compute_tiles(time, values, layout, requests):
+    # Eseguita nel worker: un blocco di tile per volta, restituiti in un dizionario
+    return {(level, index): compute_tile(time, values, layout, level, index) for level, index in requests}
+
+
+class SpectrogramTileCache:
+    """
+    Tile già calcolati, condivisi da tutti i pannelli, con scarto LRU quando si
+    supera il limite di memoria. Chiave: (sorgente dei dati, canale, livello, indice).
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.tiles = OrderedDict()
+
+    def get(self, key):
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+        return tile
+
+    def put(self, key, tile):
+        if key in self.tiles:
+            self.nbytes -= self.tiles.pop(key).nbytes
+        self.tiles[key] = tile
+        self.nbytes += tile.nbytes
+        while self.nbytes > self.max_bytes and len(self.tiles) > 1:
+            _, evicted = self.tiles.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def retain(self, stores):
+        # Come per i canali derivati: solo i file ancora aperti
+        source_keys = {store.source_key for store in stores}
+        for key in [key for key in self.tiles if key[0] not in source_keys]:
+            self.nbytes -= self.tiles.pop(key).nbytes
@@ -0,0 +1,120 @@
+import heapq
+import os
+import queue
+import threading
+import cv2
+
+# Oltre questa distanza tra due clip conviene un seek invece di scorrere i frame
+SEEK_GAP_FRAMES = 300
+# Frame in attesa per ogni writer: limita la memoria se la codifica è più lenta
+WRITER_QUEUE_SIZE = 32
+
+
+class ClipWriterPool:
+    """
+    Thread che scrivono le clip in parallelo. Ogni clip è assegnata sempre allo
+    stesso thread, quindi i suoi frame restano in ordine; cv2.VideoWriter
+    rilascia il GIL durante la codifica, così i thread lavorano davvero insieme.
+    """
+
+    def __init__(self, fps, workers):
+        self.fps = fps
+        self.queues = [queue.Queue(maxsize=WRITER_QUEUE_SIZE) for _ in range(workers)]
+        self.errors = []
+        self.threads = [threading.Thread(target=self.run, args=(q,), daemon=True) for q in self.queues]
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, clip_id, path, frame):
+        # frame None chiude la clip
+        self.queues[clip_id % len(self.queues)].put((clip_id, path, frame))
+
+    def run(self, jobs):
+        writers = {}
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            clip_id, path, frame = job
+            try:
+                if frame is None:
+                    writer = writers.pop(clip_id, None)
+                    if writer is not None:
+                        writer.release()
+                    continue
+                writer = writers.get(clip_id)
+                if writer is None:
+                    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), self.fps,
+                                             (frame.shape[1], frame.shape[0]))
+                    writers[clip_id] = writer
+                writer.write(frame)
+            except Exception as e:
+                self.errors.append(f"{os.path.basename(path)}: {e}")
+        for writer in writers.values():
+            writer.release()
+
+    def close(self):
+        for jobs in self.queues:
+            jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+
+
+def extract_clips(video_path, clips, fps, workers=None, progress=None):
+    """
+    Taglia le clip [(percorso, primo frame, ultimo frame escluso), ...] con una
+    sola passata di decodifica: i frame vengono letti in ordine e consegnati a
+    tutte le clip che li contengono (passi e mezzi passi si sovrappongono),
+    quindi ogni GOP viene decodificato una volta sola. Tra clip lontane si fa
+    un seek, tra clip vicine si scorrono i frame con grab().
+    Restituisce (clip scritte, errori).
+    """
+    clips = sorted((start, stop, path) for path, start, stop in clips if stop > start)
+    if not clips:
+        return 0, []
+    workers = workers or min(os.cpu_count() or 1, 8)
+    pool = ClipWriterPool(fps, workers)
+    cap = cv2.VideoCapture(video_path)
+
+    active = []  # heap di (ultimo frame escluso, id clip, percorso)
+    next_clip = 0
+    position = None
+    total = sum(stop - start for start, stop, _ in clips)
+    done = 0
+    reported = -1
+    try:
+        while next_clip < len(clips) or active:
+            if not active:
+                # Nessuna clip aperta: si va all'inizio della prossima
+                start = clips[next_clip][0]
+                if position is None or start < position or start - position > SEEK_GAP_FRAMES:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+                    position = start
+                while position < start:
+                    cap.grab()
+                    position += 1
+            while next_clip < len(clips) and clips[next_clip][0] <= position:
+                start, stop, path = clips[next_clip]
+                heapq.heappush(active, (stop, next_clip, path))
+                next_clip += 1
+
+            ret, frame = cap.read()
+            if not ret:
+                break
+            for _, clip_id, path in active:
+                pool.put(clip_id, path, frame)
+                done += 1
+            position += 1
+            while active and active[0][0] <= position:
+                _, clip_id, path = heapq.heappop(active)
+                pool.put(clip_id, path, None)
+
+            if progress is not None and done * 100 // total != reported:
+                reported = done * 100 // total
+                progress(reported)
+    finally:
+        cap.release()
+        for _, clip_id, path in active:
+            pool.put(clip_id, path, None)
+        pool.close()
+    return next_clip, pool.errors
@@ -0,0 +1,138 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLabel
+from GaitSteps import normalize_steps
+
+# Punti della griglia normalizzata (0, 1, ..., 100 % del ciclo)
+ENSEMBLE_POINTS = 101
+
+
+class StepEnsembleCache:
+    """
+    Passi normalizzati di un canale, uno per coppia (inizio, fine). Quando si
+    aggiunge o toglie un marker si ricalcolano solo i passi nuovi.
+    """
+
+    def __init__(self):
+        self.key = None
+        self.rows = {}
+
+    def matrix(self, store, channel, starts, ends):
+        key = (id(store), channel)
+        if key != self.key:
+            self.key = key
+            self.rows = {}
+
+        pairs = list(zip(starts.tolist(), ends.tolist()))
+        new = [pair for pair in pairs if pair not in self.rows]
+        if new:
+            new_starts, new_ends = np.array(new).T
+            normalized = normalize_steps(store.time, store.column(channel), new_starts, new_ends,
+                                         ENSEMBLE_POINTS)
+            self.rows.update(zip(new, normalized))
+        # Passi rimossi: non servono più
+        if len(self.rows) > len(pairs):
+            current = set(pairs)
+            self.rows = {pair: row for pair, row in self.rows.items() if pair in current}
+        if not pairs:
+            return np.empty((0, ENSEMBLE_POINTS), dtype=np.float32)
+        return np.stack([self.rows[pair] for pair in pairs])
+
+
+class StepEnsembleView(QDialog):
+    """
+    Tutti i passi di un dispositivo sovrapposti sul ciclo normalizzato, disegnati
+    come un unico tracciato, con media ± deviazione standard.
+    """
+
+    def __init__(self, player):
+        super().__init__(player)
+        self.player = player
+        self.cache = StepEnsembleCache()
+        self.setWindowTitle("Sovrapposizione Passi Normalizzati")
+        self.resize(800, 500)
+
+        layout = QVBoxLayout(self)
+        top_layout = QHBoxLayout()
+        top_layout.addWidget(QLabel("Dispositivo:"))
+        self.device_selector = QComboBox(self)
+        self.device_selector.currentIndexChanged.connect(self.update_channels)
+        top_layout.addWidget(self.device_selector)
+        top_layout.addWidget(QLabel("Canale:"))
+        self.channel_selector = QComboBox(self)
+        self.channel_selector.currentIndexChanged.connect(self.refresh)
+        top_layout.addWidget(self.channel_selector)
+        top_layout.addStretch()
+        self.summary_label = QLabel("", self)
+        top_layout.addWidget(self.summary_label)
+        layout.addLayout(top_layout)
+
+        self.plot_widget = pg.PlotWidget()
+        self.plot_widget.showGrid(x=True, y=True, alpha=0.3)
+        self.plot_widget.setLabel('bottom', 'Ciclo del passo (%)')
+        layout.addWidget(self.plot_widget)
+
+        # Un solo item per tutti i passi, più le curve di media e banda
+        self.steps_curve = pg.PlotCurveItem(pen=pg.mkPen(color=(150, 150, 150, 60), width=1))
+        self.upper_curve = pg.PlotCurveItem(pen=pg.mkPen(color=(255, 215, 0, 150), width=1))
+        self.lower_curve = pg.PlotCurveItem(pen=pg.mkPen(color=(255, 215, 0, 150), width=1))
+        self.band = pg.FillBetweenItem(self.upper_curve, self.lower_curve, brush=pg.mkBrush(255, 215, 0, 50))
+        self.mean_curve = pg.PlotCurveItem(pen=pg.mkPen(color='#FFD700', width=3))
+        for item in (self.steps_curve, self.band, self.upper_curve, self.lower_curve, self.mean_curve):
+            self.plot_widget.addItem(item)
+
+        self.update_devices()
+
+    def update_devices(self):
+        current = self.device_selector.currentData()
+        self.device_selector.blockSignals(True)
+        self.device_selector.clear()
+        for device in self.player.session or []:
+            self.device_selector.addItem(device.label, device.role)
+        self.device_selector.setCurrentIndex(max(self.device_selector.findData(current), 0))
+        self.device_selector.blockSignals(False)
+        self.update_channels()
+
+    def update_channels(self):
+        role = self.device_selector.currentData()
+        current = self.channel_selector.currentText()
+        self.channel_selector.blockSignals(True)
+        self.channel_selector.clear()
+        if role is not None:
+            self.channel_selector.addItems(self.player.session.device(role).store.column_names)
+        index = self.channel_selector.findText(current)
+        self.channel_selector.setCurrentIndex(index if index >= 0 else 0)
+        self.channel_selector.blockSignals(False)
+        self.refresh()
+
+    def refresh(self):
+        role = self.device_selector.currentData()
+        channel = self.channel_selector.currentText()
+        if role is None or not channel:
+            return
+        store = self.player.session.device(role).store
+
+        # Solo i passi completi, da un marker al successivo
+        markers = np.unique(np.asarray(self.player.step_markers.get(role, []), dtype=np.float64))
+        starts, ends = markers[:-1], markers[1:]
+        matrix = self.cache.matrix(store, channel, starts, ends)
+        self.plot_widget.setLabel('left', channel)
+
+        if len(matrix) == 0:
+            for curve in (self.steps_curve, self.upper_curve, self.lower_curve, self.mean_curve):
+                curve.setData([], [])
+            self.summary_label.setText("Servono almeno due marker di passo")
+            return
+
+        percent = np.linspace(0.0, 100.0, ENSEMBLE_POINTS)
+        # Le righe sono concatenate: connect spezza il tracciato alla fine di ogni passo
+        connect = np.ones(matrix.size, dtype=bool)
+        connect[ENSEMBLE_POINTS - 1::ENSEMBLE_POINTS] = False
+        self.steps_curve.setData(np.tile(percent, len(matrix)), matrix.ravel(), connect=connect)
+
+        mean = matrix.mean(axis=0)
+        std = matrix.std(axis=0)
+        self.upper_curve.setData(percent, mean + std)
+        self.lower_curve.setData(percent, mean - std)
+        self.mean_curve.setData(percent, mean)
+        self.summary_label.setText(f"{len(matrix)} passi")
@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+
+# Versione del formato su disco: cambiarla invalida le tabelle già salvate
+CACHE_VERSION = 1
+
+
+def constant_rate_timestamps(total_frames, fps):
+    return np.arange(0, total_frames) / fps
+
+
+def load_timestamps(cache_path):
+    try:
+        return np.load(cache_path)
+    except (OSError, ValueError):
+        return None
+
+
+def scan_timestamps(video_path, cache=None, cache_path=None):
+    """
+    Tabella dei tempi di presentazione reali, uno per frame, in secondi dal
+    primo frame. Si usa solo grab(): niente conversione di colore né copia del
+    frame, quindi la scansione è molto più veloce del tempo reale. Serve per i
+    video a frame rate variabile (telefoni), dove FPS e numero di frame
+    dichiarati non sono affidabili. Restituisce None se il backend non fornisce
+    i tempi dei frame.
+    """
+    cap = cv2.VideoCapture(video_path)
+    times = []
+    try:
+        while cap.grab():
+            times.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+    finally:
+        cap.release()
+    if len(times) < 2:
+        return None
+    timestamps = np.asarray(times, dtype=np.float64) / 1000.0
+    if timestamps[-1] <= timestamps[0]:
+        return None
+    # Alcuni file hanno tempi duplicati o fuori ordine: la tabella deve essere crescente
+    timestamps = np.maximum.accumulate(timestamps - timestamps[0])
+
+    if cache is not None:
+        cache.store_array(cache_path, timestamps)
+    return timestamps
+
+
+def same_timestamps(a, b, tolerance):
+    return len(a) == len(b) and (not len(a) or float(np.max(np.abs(a - b))) <= tolerance)